@@ -4,15 +4,13 @@ import asyncio
 import nest_asyncio
 import torch
 from course_generator.video_processor import VideoProcessor
-from course_generator.transcriber import Transcriber
-from course_generator.course_generator import CourseGenerator
-from course_generator.exporter import CourseExporter
 from course_generator.config import Config
 from course_generator.model_detector import ModelDetector
-import tempfile
+from course_generator.jobs import JobQueue, QUEUED, RUNNING, FAILED
+from course_generator.pipeline import EXPORT_EXTENSIONS, format_metrics
 import logging
 import time
-from datetime import timedelta
+import uuid
 
 # Disable PyTorch's custom class handling for Streamlit
 os.environ['PYTORCH_CUDA_ALLOC_CONF'] = 'max_split_size_mb:512'
@@ -41,11 +39,25 @@ st.set_page_config(
 st.title("🎓 AI Course Generator")
 st.markdown("Transform videos into complete course modules with AI")
 
-# Initialize session state
-if 'processing' not in st.session_state:
-    st.session_state.processing = False
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    """Start one background job queue per server process, shared by all sessions."""
+    return JobQueue().start()
 
-# Detect available models
+EXPORT_MIME_TYPES = {
+    "PDF": "application/pdf",
+    "DOCX": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+}
+
+# Initialize session state; job IDs are mirrored in the URL so a browser
+# refresh reconnects to running jobs
+job_queue = get_job_queue()
+if 'job_ids' not in st.session_state:
+    st.session_state.job_ids = st.query_params.get_all("job")
+if 'download_requests' not in st.session_state:
+    st.session_state.download_requests = set()
+
+# Detect available models (cached across reruns, refreshed in the background)
 model_detector = ModelDetector()
 ollama_available, lmstudio_available, ollama_models, lmstudio_models = model_detector.detect_available_models()
 
@@ -78,6 +90,9 @@ if lmstudio_available:
 
 if not available_hosts:
     st.error("No LLM hosts (Ollama or LM Studio) are available. Please start one of them.")
+    if st.button("Check again"):
+        model_detector.refresh()
+        st.rerun()
     st.stop()
 
 host_type = st.radio(
@@ -108,6 +123,41 @@ else:  # lmstudio
         index=lmstudio_models.index(default_model) if default_model in lmstudio_models else 0
     )
 
+# Performance options
+st.sidebar.header("Performance")
+llm_concurrency = st.sidebar.slider(
+    "Concurrent LLM requests",
+    min_value=1,
+    max_value=16,
+    value=max(1, min(16, Config.LLM_MAX_CONCURRENCY)),
+    help="Number of section batches sent to the LLM host at once. "
+         "Match this to the host's parallel request setting (e.g. OLLAMA_NUM_PARALLEL)."
+)
+transcribe_workers = st.sidebar.slider(
+    "Whisper worker processes",
+    min_value=1,
+    max_value=max(2, os.cpu_count() or 2),
+    value=max(1, min(os.cpu_count() or 1, Config.TRANSCRIBE_WORKERS)),
+    help="Split long audio at silences and transcribe the chunks in parallel processes, "
+         f"each using {Config.TRANSCRIBE_THREADS_PER_WORKER} threads."
+)
+streaming_pipeline = st.sidebar.checkbox(
+    "Overlap transcription and generation",
+    value=Config.STREAMING_PIPELINE,
+    help="Send finished sections to the LLM while Whisper is still transcribing later audio."
+)
+stream_llm = st.sidebar.checkbox(
+    "Stream LLM responses",
+    value=Config.LLM_STREAMING,
+    help="Parse each section as soon as it has been generated and stop runaway generations early."
+)
+use_llm_cache = st.sidebar.checkbox(
+    "Reuse cached LLM responses",
+    value=True,
+    disabled=not Config.LLM_CACHE_ENABLED,
+    help="Untick to bypass the response cache and request fresh output from the model."
+)
+
 # Export options
 st.header("Export Options")
 export_format = st.multiselect(
@@ -117,105 +167,100 @@ export_format = st.multiselect(
 )
 
 # Process button
-if st.button("Generate Course", disabled=st.session_state.processing):
+if st.button("Generate Course"):
     if not video_source:
         st.error("Please provide a video source")
     else:
-        st.session_state.processing = True
-        progress_bar = st.progress(0)
-        start_time = time.time()
-        
         try:
-            # Initialize components
-            video_processor = VideoProcessor()
-            transcriber = Transcriber(model_size=model_size)
-            course_generator = CourseGenerator(model_name=llm_model, host_type=host_type)
-            exporter = CourseExporter()
-            
-            # Process video
-            st.text("Processing video...")
-            video_start = time.time()
+            params = {
+                "model_size": model_size,
+                "transcribe_workers": transcribe_workers,
+                "llm_model": llm_model,
+                "host_type": host_type,
+                "llm_concurrency": llm_concurrency,
+                "use_llm_cache": use_llm_cache,
+                "stream_llm": stream_llm,
+                "streaming_pipeline": streaming_pipeline,
+                "export_formats": export_format
+            }
             if input_type == "YouTube URL":
-                video_path, audio_path = video_processor.process_video(video_source)
+                params.update(source=video_source, input_type="youtube")
             else:
-                # Save uploaded file
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-                    tmp_file.write(video_source.getvalue())
-                    video_path = tmp_file.name
-                audio_path = video_processor.extract_audio(video_path)
-            video_time = time.time() - video_start
-            progress_bar.progress(25)
-            
-            # Transcribe audio
-            st.text("Transcribing audio...")
-            transcribe_start = time.time()
-            transcription = transcriber.transcribe(audio_path)
-            segments = transcriber.segment_transcription(transcription)
-            transcribe_time = time.time() - transcribe_start
-            progress_bar.progress(50)
-            
-            # Generate course content
-            st.text("Generating course content...")
-            course_content = course_generator.generate_course_content(segments)
-            progress_bar.progress(75)
-            
-            # Export course
-            st.text("Exporting course...")
-            export_start = time.time()
-            os.makedirs(Config.OUTPUT_DIR, exist_ok=True)
-            
-            # Sanitize the course title for filenames
-            safe_title = exporter._sanitize_filename(course_content["title"])
-            
-            if "PDF" in export_format:
-                pdf_path = os.path.join(Config.OUTPUT_DIR, f"{safe_title}.pdf")
-                exporter.export_to_pdf(course_content, pdf_path)
-                st.download_button(
-                    "Download PDF",
-                    open(pdf_path, "rb").read(),
-                    file_name=f"{safe_title}.pdf",
-                    mime="application/pdf"
+                # Stream uploaded file to disk; the job deletes it when done
+                video_processor = VideoProcessor()
+                source_path = video_processor.save_upload(
+                    video_source,
+                    f"{uuid.uuid4().hex}_{video_source.name}",
+                    directory=Config.JOB_UPLOAD_DIR
                 )
-            
-            if "DOCX" in export_format:
-                docx_path = os.path.join(Config.OUTPUT_DIR, f"{safe_title}.docx")
-                exporter.export_to_docx(course_content, docx_path)
-                st.download_button(
-                    "Download DOCX",
-                    open(docx_path, "rb").read(),
-                    file_name=f"{safe_title}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                video_processor.cleanup()
+                params.update(
+                    source=source_path,
+                    input_type="file",
+                    upload_metrics=video_processor.upload_metrics,
+                    delete_source=True
                 )
-            export_time = time.time() - export_start
-            
-            progress_bar.progress(100)
-            total_time = time.time() - start_time
-            
-            # Display timing metrics
-            st.success("Course generation completed!")
-            st.markdown("### Generation Metrics")
-            metrics = course_content["generation_metrics"]
-            st.markdown(f"""
-            - **Total Processing Time**: {str(timedelta(seconds=int(total_time)))}
-            - **Video Processing**: {str(timedelta(seconds=int(video_time)))}
-            - **Transcription**: {str(timedelta(seconds=int(transcribe_time)))}
-            - **Content Generation**: {metrics['total_time']}
-              - Initial Generation: {metrics['initial_generation']}
-              - Section Generation: {metrics['section_generation']}
-            - **Export**: {str(timedelta(seconds=int(export_time)))}
-            - **Total API Calls**: {metrics['total_api_calls']}
-            - **Sections Processed**: {metrics['sections_processed']}
-            - **Average Time per Section**: {metrics['average_time_per_section']}
-            """)
-            
+            job_id = job_queue.submit(params)
+            st.session_state.job_ids.append(job_id)
+            st.query_params["job"] = st.session_state.job_ids
         except Exception as e:
-            logger.error(f"Error during course generation: {str(e)}", exc_info=True)
+            logger.error(f"Error submitting course generation job: {str(e)}", exc_info=True)
             st.error(f"An error occurred: {str(e)}")
-        finally:
-            st.button("Refresh", on_click=lambda: setattr(st.session_state, 'processing', False))
-            if 'video_processor' in locals():
-                video_processor.cleanup()
+
+# Job status
+jobs_active = False
+if st.session_state.job_ids:
+    st.header("Jobs")
+for job_id in reversed(st.session_state.job_ids):
+    job = job_queue.get(job_id)
+    if job is None:
+        continue
+    if job["status"] in (QUEUED, RUNNING):
+        jobs_active = True
+        message = job["message"]
+        if job["status"] == QUEUED and job["queue_position"]:
+            message = f"Queued behind {job['queue_position']} job(s)"
+        st.progress(job["progress"], text=message)
+    elif job["status"] == FAILED:
+        st.error(f"An error occurred: {job['error']}")
+        if st.button("Retry", key=f"retry-{job_id}",
+                     help="Run the job again, reusing the audio, transcription and sections already generated."):
+            job_queue.retry(job_id)
+            st.rerun()
+    else:
+        result = job["result"]
+        st.success(f"Course generation completed: {result['title']}")
+        for fmt, path in result["files"].items():
+            if not os.path.exists(path):
+                continue
+            # st.download_button reads the whole file into Streamlit's in-memory
+            # media store on every rerun (including job polling), so a file is
+            # only loaded once the user asks for it, and dropped once downloaded
+            request = f"{job_id}-{fmt}"
+            if request not in st.session_state.download_requests:
+                if st.button(f"Prepare {fmt} download", key=f"prepare-{request}"):
+                    st.session_state.download_requests.add(request)
+                    st.rerun()
+                continue
+            with open(path, "rb") as export_file:
+                if st.download_button(
+                    f"Download {fmt}",
+                    export_file,
+                    file_name=f"{os.path.splitext(os.path.basename(path))[0]}.{EXPORT_EXTENSIONS[fmt]}",
+                    mime=EXPORT_MIME_TYPES[fmt],
+                    key=f"download-{request}"
+                ):
+                    st.session_state.download_requests.discard(request)
+        
+        # Display timing metrics
+        with st.expander("Generation Metrics"):
+            st.markdown(format_metrics(result))
 
 # Footer
 st.markdown("---")
-st.markdown("Made with ❤️ by AI Course Generator") 
\ No newline at end of file
+st.markdown("Made with ❤️ by AI Course Generator") 
+
+# Poll running jobs
+if jobs_active:
+    time.sleep(Config.JOB_POLL_SECONDS)
+    st.rerun()
@@ -0,0 +1,305 @@
+"""
+Headless batch mode: generate courses from many videos without Streamlit.
+
+    python -m course_generator lecture1.mp4 lectures/ https://youtu.be/...
+    python -m course_generator --from-file playlist.txt --format PDF DOCX
+
+One Transcriber and one LLM session are shared by the whole run, and videos
+are pipelined: while one is at the LLM, the next is being transcribed and
+the one after that is being downloaded or extracted.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .checkpoint import remove_stale_runs
+from .config import Config
+from .course_generator import CourseGenerator
+from .exporter import shutdown_export_pool
+from .model_detector import ModelDetector
+from .pipeline import PipelineRun
+from .video_processor import VideoProcessor
+from .transcriber import Transcriber
+
+logger = logging.getLogger("course_generator")
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.avi', '.webm', '.m4v', '.mp3', '.m4a', '.wav')
+
+def collect_sources(inputs: List[str], list_files: List[str]) -> List[str]:
+    """Expand files, directories, URLs and list files into a list of sources."""
+    entries = list(inputs)
+    for list_file in list_files:
+        with open(list_file, 'r', encoding='utf-8') as f:
+            entries.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+    sources = []
+    for entry in entries:
+        if entry.startswith(('http://', 'https://')):
+            sources.append(entry)
+        elif os.path.isdir(entry):
+            for root, _, names in sorted(os.walk(entry)):
+                sources.extend(
+                    os.path.join(root, name) for name in sorted(names)
+                    if name.lower().endswith(VIDEO_EXTENSIONS)
+                )
+        elif os.path.isfile(entry):
+            sources.append(entry)
+        else:
+            logger.warning(f"Skipping {entry}: not a file, directory or URL")
+    return sources
+
+def _slug(source: str) -> str:
+    """Return a filesystem-friendly name for a source."""
+    if source.startswith(('http://', 'https://')):
+        match = re.search(r'(?:v=|youtu\.be/|shorts/|embed/|live/)([A-Za-z0-9_-]{11})', source)
+        name = match.group(1) if match else hashlib.sha256(source.encode('utf-8')).hexdigest()[:12]
+    else:
+        name = os.path.splitext(os.path.basename(source))[0]
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', name).strip('_') or 'video'
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m course_generator",
+        description="Generate courses from video files, directories or YouTube URLs."
+    )
+    parser.add_argument("sources", nargs="*", help="video files, directories or YouTube URLs")
+    parser.add_argument("--from-file", action="append", default=[], metavar="PATH",
+                        help="text file with one source per line (may be repeated)")
+    parser.add_argument("--output-dir", default=Config.OUTPUT_DIR,
+                        help="directory for exports and metrics (default: %(default)s)")
+    parser.add_argument("--format", nargs="+", choices=["PDF", "DOCX"],
+                        default=[Config.DEFAULT_EXPORT_FORMAT], dest="formats",
+                        help="export format(s) (default: %(default)s)")
+    parser.add_argument("--whisper-model", default=Config.DEFAULT_WHISPER_MODEL,
+                        choices=["tiny", "base", "small", "medium", "large"],
+                        help="Whisper model size (default: %(default)s)")
+    parser.add_argument("--transcribe-workers", type=int, default=Config.TRANSCRIBE_WORKERS,
+                        help="Whisper worker processes per video (default: %(default)s)")
+    parser.add_argument("--host", choices=["ollama", "lmstudio"],
+                        help="LLM host (default: the first one available)")
+    parser.add_argument("--model", help="LLM model name (default: the host's preferred model)")
+    parser.add_argument("--llm-concurrency", type=int, default=Config.LLM_MAX_CONCURRENCY,
+                        help="concurrent LLM requests (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the LLM response cache")
+    parser.add_argument("--no-stream", action="store_true", help="do not stream LLM responses")
+    return parser.parse_args(argv)
+
+def resolve_llm(host: Optional[str], model: Optional[str]) -> Tuple[str, str]:
+    """Pick the LLM host and model, detecting them when not given."""
+    if host is not None and model is not None:
+        return host, model
+    detector = ModelDetector()
+    ollama_available, lmstudio_available, ollama_models, lmstudio_models = detector.detect_available_models()
+    if host is None:
+        if ollama_available:
+            host = "ollama"
+        elif lmstudio_available:
+            host = "lmstudio"
+        else:
+            raise RuntimeError("No LLM hosts (Ollama or LM Studio) are available. Please start one of them.")
+    if model is None:
+        models = ollama_models if host == "ollama" else lmstudio_models
+        if not models:
+            raise RuntimeError(f"No models found in {host}. Please install at least one model.")
+        model = detector.get_default_model(host, models)
+    return host, model
+
+class BatchRunner:
+    """Run many videos through the pipeline with the stages overlapped.
+
+    Three threads form the pipeline: one downloads and extracts audio, one
+    transcribes, and one generates and exports. Bounded queues between them
+    keep at most one finished item waiting at each hand-off, so only a few
+    videos' audio is on disk at a time.
+    """
+
+    def __init__(self, params: Dict, transcriber: Transcriber,
+                 course_generator: CourseGenerator, output_dir: str):
+        self.params = params
+        self.transcriber = transcriber
+        self.course_generator = course_generator
+        self.output_dir = output_dir
+        self.summaries: List[Dict] = []
+        # Only used to fingerprint sources
+        self.video_processor = VideoProcessor()
+
+    def _run_id(self, slug: str, source_key: str) -> str:
+        """Derive a stable run ID, so re-running a batch resumes failed videos.
+
+        The ID is based on the source's content fingerprint rather than its
+        name, so a different video with the same file name never resumes
+        another video's checkpoints.
+        """
+        settings = f"{source_key}:{self.params['model_size']}:{self.params['host_type']}:{self.params['llm_model']}"
+        return f"cli-{slug}-{hashlib.sha256(settings.encode('utf-8')).hexdigest()[:16]}"
+
+    def _stage(self, inbox: queue.Queue, outbox: queue.Queue, name: str, work):
+        """Apply work to every run from inbox and pass it on, skipping failed runs."""
+        while True:
+            item = inbox.get()
+            if item is None:
+                outbox.put(None)
+                return
+            run, error = item
+            if error is None:
+                try:
+                    work(run)
+                except Exception as e:
+                    logger.error(f"{name} failed for {run.source}: {str(e)}", exc_info=True)
+                    error = e
+            outbox.put((run, error))
+
+    def _extract_all(self, sources: List[str], outbox: queue.Queue):
+        """Create a run per source, then load and extract its audio."""
+        used_slugs = set()
+        for source in sources:
+            slug = base = _slug(source)
+            suffix = 1
+            while slug in used_slugs:
+                suffix += 1
+                slug = f"{base}_{suffix}"
+            used_slugs.add(slug)
+            error = None
+            try:
+                source_key = self.video_processor.get_source_key(source)
+            except Exception as e:
+                logger.error(f"Could not read {source}: {str(e)}", exc_info=True)
+                source_key, error = None, e
+            run = PipelineRun(
+                {**self.params, "source": source, "source_key": source_key,
+                 "input_type": "youtube" if source.startswith(('http://', 'https://')) else "file"},
+                self.transcriber,
+                course_generator=self.course_generator,
+                output_dir=os.path.join(self.output_dir, slug),
+                run_id=self._run_id(slug, source_key) if source_key else None
+            )
+            if error is None:
+                try:
+                    run.load()
+                    run.extract()
+                except Exception as e:
+                    logger.error(f"Audio extraction failed for {source}: {str(e)}", exc_info=True)
+                    error = e
+            outbox.put((run, error))
+        outbox.put(None)
+        self.video_processor.cleanup()
+
+    def _transcribe(self, run: PipelineRun):
+        run.transcribe()
+
+    def _write_metrics(self, run: PipelineRun, error: Optional[Exception]) -> Dict:
+        """Write the per-video metrics JSON and return its summary."""
+        summary = {"source": run.source, "status": "failed" if error else "completed"}
+        if error:
+            summary["error"] = str(error)
+        else:
+            result = run.result()
+            summary.update({
+                "title": result["title"],
+                "files": result["files"],
+                "timings": result["timings"],
+                "exports": result["exports"],
+                "extraction": result["extraction"],
+                "whisper_model": result["model_size"],
+                "whisper_info": result["whisper_info"],
+                "generation_metrics": result["generation_metrics"]
+            })
+        os.makedirs(run.output_dir, exist_ok=True)
+        with open(os.path.join(run.output_dir, "metrics.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def run(self, sources: List[str]) -> List[Dict]:
+        """Process all sources and return one summary per video, in order."""
+        to_transcribe, to_generate = queue.Queue(maxsize=1), queue.Queue(maxsize=1)
+        threads = [
+            threading.Thread(target=self._extract_all, name="batch-extract", daemon=True,
+                             args=(sources, to_transcribe)),
+            threading.Thread(target=self._stage, name="batch-transcribe", daemon=True,
+                             args=(to_transcribe, to_generate, "Transcription", self._transcribe)),
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Generation and export run on this thread
+        total = len(sources)
+        while True:
+            item = to_generate.get()
+            if item is None:
+                break
+            run, error = item
+            if error is None:
+                try:
+                    run.generate()
+                    run.export()
+                except Exception as e:
+                    logger.error(f"Generation failed for {run.source}: {str(e)}", exc_info=True)
+                    error = e
+            summary = self._write_metrics(run, error)
+            run.finish(error is None)
+            self.summaries.append(summary)
+            logger.info(f"[{len(self.summaries)}/{total}] {summary['status']}: {run.source}")
+
+        for thread in threads:
+            thread.join()
+        return self.summaries
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    args = parse_args(argv)
+    Config.setup()
+    remove_stale_runs(Config.STALE_RUN_MAX_AGE_HOURS * 3600)
+
+    sources = collect_sources(args.sources, args.from_file)
+    if not sources:
+        logger.error("No video sources given")
+        return 2
+
+    host_type, llm_model = resolve_llm(args.host, args.model)
+    logger.info(f"Generating {len(sources)} course(s) with {llm_model} on {host_type}")
+    params = {
+        "model_size": args.whisper_model,
+        "transcribe_workers": args.transcribe_workers,
+        "llm_model": llm_model,
+        "host_type": host_type,
+        "llm_concurrency": args.llm_concurrency,
+        "use_llm_cache": not args.no_cache,
+        "stream_llm": not args.no_stream,
+        "streaming_pipeline": False,
+        "export_formats": args.formats
+    }
+    transcriber = Transcriber(model_size=args.whisper_model, workers=args.transcribe_workers)
+    course_generator = CourseGenerator(
+        model_name=llm_model,
+        host_type=host_type,
+        max_concurrency=args.llm_concurrency,
+        use_cache=not args.no_cache,
+        streaming=not args.no_stream
+    )
+
+    start = time.time()
+    try:
+        summaries = BatchRunner(params, transcriber, course_generator, args.output_dir).run(sources)
+    finally:
+        transcriber.close()
+        shutdown_export_pool()
+
+    with open(os.path.join(args.output_dir, "summary.json"), 'w', encoding='utf-8') as f:
+        json.dump({"total_time": time.time() - start, "videos": summaries}, f, indent=2)
+    failed = sum(1 for summary in summaries if summary["status"] == "failed")
+    logger.info(f"Finished {len(summaries)} video(s) in {time.time() - start:.0f}s, {failed} failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
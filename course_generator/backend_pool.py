@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Dict, List
+import logging
+from .config import Config
+from .model_detector import ModelDetector
+
+logger = logging.getLogger(__name__)
+
+class Backend:
+    """One Ollama/LM Studio endpoint and its routing state."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.latency = None
+        self.requests = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+class BackendPool:
+    """Routes LLM requests across several endpoints of the same host type.
+
+    Endpoints are health-checked with ModelDetector. Each request goes to
+    the healthy endpoint with the fewest outstanding requests
+    ("least_outstanding") or the lowest expected wait, latency times queue
+    depth ("latency"). An endpoint whose request fails is ejected for
+    LLM_BACKEND_EJECT_SECONDS and then becomes eligible again. The last
+    healthy endpoint is never ejected for a failed request, so with a
+    single endpoint a transient error only fails that request.
+    """
+
+    def __init__(self, host_type: str, urls: List[str], model_name: str = None,
+                 routing: str = None, eject_seconds: float = None, detector: ModelDetector = None):
+        if not urls:
+            raise ValueError(f"No endpoints configured for {host_type}")
+        self.host_type = host_type
+        self.model_name = model_name
+        self.routing = routing or Config.LLM_ROUTING
+        self.eject_seconds = Config.LLM_BACKEND_EJECT_SECONDS if eject_seconds is None else eject_seconds
+        self.backends = [Backend(url) for url in urls]
+        self._detector = detector
+        self._lock = threading.Lock()
+        self._checked = len(self.backends) == 1
+
+    def health_check(self):
+        """Probe all endpoints and eject those that are down or lack the model."""
+        detector = self._detector or ModelDetector()
+        results = detector.probe_all(self.host_type, [b.url for b in self.backends])
+        for backend, (available, models) in zip(self.backends, results):
+            healthy = available and (not self.model_name or self.model_name in models)
+            with self._lock:
+                backend.ejected_until = 0.0 if healthy else time.time() + self.eject_seconds
+            if not healthy:
+                logger.warning(f"Ejecting LLM backend {backend.url}: unavailable or missing {self.model_name}")
+        self._checked = True
+
+    def acquire(self) -> Backend:
+        """Pick an endpoint for the next request and count it as outstanding."""
+        if not self._checked:
+            self.health_check()
+        with self._lock:
+            now = time.time()
+            candidates = [b for b in self.backends if b.ejected_until <= now]
+            if not candidates:
+                # Everything is ejected: try the one that comes back soonest
+                candidates = [min(self.backends, key=lambda b: b.ejected_until)]
+            if self.routing == "latency":
+                backend = min(candidates, key=lambda b: (b.latency or 0.0) * (b.outstanding + 1))
+            else:
+                backend = min(candidates, key=lambda b: (b.outstanding, b.latency or 0.0))
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend, latency: float = None, failed: bool = False):
+        """Finish a request, updating latency or ejecting the endpoint on failure."""
+        with self._lock:
+            backend.outstanding -= 1
+            if failed:
+                backend.failures += 1
+                now = time.time()
+                others = sum(1 for b in self.backends if b is not backend and b.ejected_until <= now)
+                if others:
+                    backend.ejected_until = now + self.eject_seconds
+                    logger.warning(f"Ejecting LLM backend {backend.url} after a failed request")
+                else:
+                    logger.warning(f"Request to the last healthy LLM backend {backend.url} failed")
+            elif latency is not None:
+                backend.latency = latency if backend.latency is None else 0.7 * backend.latency + 0.3 * latency
+
+    def healthy_count(self) -> int:
+        now = time.time()
+        with self._lock:
+            return sum(1 for b in self.backends if b.ejected_until <= now)
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "url": b.url,
+                    "requests": b.requests,
+                    "failures": b.failures,
+                    "latency": round(b.latency, 2) if b.latency is not None else None
+                }
+                for b in self.backends
+            ]
@@ -0,0 +1,120 @@
+import json
+import threading
+from typing import Dict, Iterable, Iterator, List
+from .config import Config
+
+def estimate_tokens(text: str, chars_per_token: float = None) -> int:
+    """Estimate the token count of text with a calibrated characters-per-token ratio."""
+    ratio = chars_per_token or Config.LLM_CHARS_PER_TOKEN
+    return int(len(text) / ratio) + 1
+
+def section_prompt_text(segment: Dict) -> str:
+    """Return the text a section contributes to a batch prompt."""
+    return json.dumps({"title": segment["title"], "text": segment["text"]})
+
+class BatchPlanner:
+    """Groups transcription sections into LLM request batches.
+
+    Planners consume sections lazily, so they work on streamed sections as
+    well as lists, and may learn from observed responses via observe().
+    """
+
+    name = "base"
+
+    def plan(self, segments: Iterable[Dict]) -> Iterator[List[Dict]]:
+        raise NotImplementedError
+
+    def observe(self, section_count: int, output_chars: int):
+        """Record the size of a response generated for section_count sections."""
+
+    def expected_output_tokens(self, section_count: int) -> int:
+        """Return the output tokens to reserve for a batch of section_count sections."""
+        return Config.LLM_MAX_OUTPUT_TOKENS
+
+    def describe(self) -> Dict:
+        return {"planner": self.name}
+
+class FixedBatchPlanner(BatchPlanner):
+    """Fixed number of sections per batch (the original behaviour)."""
+
+    name = "fixed"
+
+    def __init__(self, batch_size: int = 2):
+        self.batch_size = batch_size
+
+    def plan(self, segments: Iterable[Dict]) -> Iterator[List[Dict]]:
+        batch = []
+        for segment in segments:
+            batch.append(segment)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+class TokenBudgetPlanner(BatchPlanner):
+    """Packs sections into batches that fit the model's context and output budget.
+
+    Each section costs its estimated prompt tokens plus the expected output
+    tokens per section. The expected output is an exponentially weighted
+    average of observed response sizes, so batches shrink when the model
+    writes long sections and grow when it writes short ones.
+    """
+
+    name = "token_budget"
+
+    def __init__(self, context_window: int = None, max_output_tokens: int = None,
+                 prompt_overhead_tokens: int = 0, max_sections: int = None,
+                 output_tokens_per_section: float = None, smoothing: float = 0.3):
+        self.context_window = context_window or Config.LLM_CONTEXT_WINDOW
+        self.max_output_tokens = max_output_tokens or Config.LLM_MAX_OUTPUT_TOKENS
+        self.prompt_overhead_tokens = prompt_overhead_tokens
+        self.max_sections = max_sections or Config.LLM_MAX_BATCH_SECTIONS
+        self.output_tokens_per_section = output_tokens_per_section or Config.LLM_OUTPUT_TOKENS_PER_SECTION
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+
+    def observe(self, section_count: int, output_chars: int):
+        if section_count <= 0:
+            return
+        observed = output_chars / Config.LLM_CHARS_PER_TOKEN / section_count
+        with self._lock:
+            self.output_tokens_per_section = (
+                (1 - self.smoothing) * self.output_tokens_per_section + self.smoothing * observed
+            )
+
+    def expected_output_tokens(self, section_count: int) -> int:
+        with self._lock:
+            expected = self.output_tokens_per_section * section_count
+        return int(min(expected, self.max_output_tokens))
+
+    def _fits(self, prompt_tokens: int, section_count: int) -> bool:
+        with self._lock:
+            output_tokens = self.output_tokens_per_section * section_count
+        return (
+            section_count <= self.max_sections
+            and output_tokens <= self.max_output_tokens
+            and self.prompt_overhead_tokens + prompt_tokens + output_tokens <= self.context_window
+        )
+
+    def plan(self, segments: Iterable[Dict]) -> Iterator[List[Dict]]:
+        batch = []
+        prompt_tokens = 0
+        for segment in segments:
+            tokens = estimate_tokens(section_prompt_text(segment))
+            # A section is always sent, even if it alone exceeds the budget
+            if batch and not self._fits(prompt_tokens + tokens, len(batch) + 1):
+                yield batch
+                batch = []
+                prompt_tokens = 0
+            batch.append(segment)
+            prompt_tokens += tokens
+        if batch:
+            yield batch
+
+    def describe(self) -> Dict:
+        with self._lock:
+            return {
+                "planner": self.name,
+                "output_tokens_per_section": round(self.output_tokens_per_section)
+            }
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+import logging
+
+from .transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """SQLite-backed key/value store with size-bounded LRU and optional age-based eviction."""
+
+    def __init__(self, path: str, max_bytes: int, max_age: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.max_age is not None and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: bytes):
+        """Store value under key and evict entries beyond the size/age limits."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), len(value), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """Remove key, if stored."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        if self.max_age is not None:
+            self._conn.execute("DELETE FROM entries WHERE created < ?", (now - self.max_age,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        logger.info(f"Evicted {len(evicted)} entries from {self.path}")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current cache size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache(DiskCache):
+    """Content-addressed cache of LLM responses."""
+
+    @staticmethod
+    def make_key(host_type: str, model_name: str, options: Dict, prompt: str) -> str:
+        """Build a cache key from the host, model, sampling options and prompt hash."""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        options_json = json.dumps(options, sort_keys=True)
+        return hashlib.sha256(
+            f"{host_type}\0{model_name}\0{options_json}\0{prompt_hash}".encode("utf-8")
+        ).hexdigest()
+
+    def get_response(self, key: str) -> Optional[str]:
+        value = self.get(key)
+        if value is None:
+            return None
+        return zlib.decompress(value).decode("utf-8")
+
+    def set_response(self, key: str, response: str):
+        self.set(key, zlib.compress(response.encode("utf-8")))
+
+
+class TranscriptionCache(DiskCache):
+    """Cache of Whisper transcriptions keyed by source fingerprint and model size."""
+
+    @staticmethod
+    def make_key(source_key: str, model_size: str) -> str:
+        return hashlib.sha256(f"{source_key}\0{model_size}".encode("utf-8")).hexdigest()
+
+    def get_transcription(self, key: str) -> Optional[Transcript]:
+        """Return the cached transcription as a compact Transcript."""
+        value = self.get(key)
+        if value is None:
+            return None
+        data = json.loads(zlib.decompress(value).decode("utf-8"))
+        segments = data["segments"]
+        return Transcript(
+            [segment[0] for segment in segments],
+            [segment[1] for segment in segments],
+            [segment[2] for segment in segments],
+            language=data.get("language")
+        )
+
+    def set_transcription(self, key: str, transcription: Transcript):
+        """Store only timestamps and text of each segment, dropping tokens and scores."""
+        data = {
+            "language": transcription.language,
+            "segments": [
+                [segment["start"], segment["end"], segment["text"]]
+                for segment in transcription.segments()
+            ]
+        }
+        self.set(key, zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8")))
+
+
+class ExportStore:
+    """Content-addressed store of rendered export files, bounded by total size.
+
+    Files are kept in one directory under their key, so a hit is served
+    straight from disk. Reading an entry refreshes its modification time,
+    which eviction uses as the last access time.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash: str, fmt: str, renderer: str, template_version: str) -> str:
+        """Build a key from the course content hash, format, renderer and template version."""
+        return hashlib.sha256(
+            f"{content_hash}\0{fmt}\0{renderer}\0{template_version}".encode("utf-8")
+        ).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    @staticmethod
+    def _place(source: str, destination: str):
+        """Copy source to destination, replacing it atomically.
+
+        Entries are always copied, never hard-linked, so a writer that later
+        overwrites the output file in place cannot change the stored entry.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(destination)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as out, open(source, 'rb') as src:
+                shutil.copyfileobj(src, out)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """Place the stored file for key at output_path; return False on a miss."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+            self._place(path, output_path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key: str, source_path: str):
+        """Store a copy of source_path under key and evict beyond max_bytes."""
+        self._place(source_path, self._path(key))
+        with self._lock:
+            self._evict()
+
+    def _entries(self) -> List:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        """Drop the least recently used files until under max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        logger.info(f"Evicted {evicted} files from {self.directory}")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current store size."""
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries)
+        }
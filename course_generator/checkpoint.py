@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable, List, Optional, Union
+import logging
+
+import numpy as np
+
+from .config import Config
+from .transcript import json_default
+
+logger = logging.getLogger(__name__)
+
+class RunCheckpoint:
+    """Per-run store of pipeline stage outputs, so a failed run can resume.
+
+    Everything lives under RUNS_DIR/<run_id>: the extracted audio, the
+    segmented transcription, the course metadata, and one JSON file per
+    generated batch of sections. Files are written atomically, so a run
+    killed mid-write never leaves a truncated checkpoint behind.
+    """
+
+    def __init__(self, run_id: str, root: str = None):
+        self.run_id = run_id
+        self.run_dir = os.path.join(root or Config.RUNS_DIR, run_id)
+        self.sections_dir = os.path.join(self.run_dir, "sections")
+        os.makedirs(self.sections_dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.run_dir, name)
+
+    def _write_json(self, path: str, data):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, default=json_default)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: str):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError:
+            logger.warning(f"Ignoring unreadable checkpoint {path}")
+            return None
+
+    def save_audio(self, audio: Union[str, np.ndarray]) -> Union[str, np.ndarray]:
+        """Move extracted audio into the run directory and return its new location.
+
+        WAV paths are moved (a rename on the same filesystem); in-memory
+        sample arrays are saved as .npy and returned unchanged.
+        """
+        if isinstance(audio, np.ndarray):
+            tmp_path = self._path("audio.tmp.npy")
+            np.save(tmp_path, audio)
+            os.replace(tmp_path, self._path("audio.npy"))
+            return audio
+        path = self._path("audio.wav")
+        shutil.move(audio, path)
+        return path
+
+    def load_audio(self) -> Optional[Union[str, np.ndarray]]:
+        """Return the checkpointed audio path or samples, or None."""
+        if os.path.exists(self._path("audio.wav")):
+            return self._path("audio.wav")
+        if os.path.exists(self._path("audio.npy")):
+            return np.load(self._path("audio.npy"))
+        return None
+
+    def save_segments(self, segments: List[Dict]):
+        """Persist the segmented transcription."""
+        self._write_json(self._path("segments.json"), segments)
+
+    def load_segments(self) -> Optional[List[Dict]]:
+        """Return the checkpointed transcription segments, or None."""
+        return self._read_json(self._path("segments.json"))
+
+    def save_metadata(self, metadata: Dict):
+        """Persist the generated course title, description and objectives."""
+        self._write_json(self._path("metadata.json"), metadata)
+
+    def load_metadata(self) -> Optional[Dict]:
+        """Return the checkpointed course metadata, or None."""
+        return self._read_json(self._path("metadata.json"))
+
+    def save_sections(self, sections: Dict[int, Dict]):
+        """Persist generated sections keyed by their index in the transcript.
+
+        Sections are only saved once, so the lowest index names the file
+        uniquely even when a resumed run regenerates a partial batch.
+        """
+        if not sections:
+            return
+        path = os.path.join(self.sections_dir, f"{min(sections):06d}.json")
+        self._write_json(path, {str(index): section for index, section in sections.items()})
+
+    def load_sections(self) -> Dict[int, Dict]:
+        """Return every checkpointed section keyed by its index."""
+        sections = {}
+        for name in sorted(os.listdir(self.sections_dir)):
+            if name.endswith(".json"):
+                data = self._read_json(os.path.join(self.sections_dir, name)) or {}
+                sections.update((int(index), section) for index, section in data.items())
+        return sections
+
+    def reset_generation(self):
+        """Drop checkpointed metadata and sections, keeping audio and segments."""
+        if os.path.exists(self._path("metadata.json")):
+            os.remove(self._path("metadata.json"))
+        shutil.rmtree(self.sections_dir, ignore_errors=True)
+        os.makedirs(self.sections_dir, exist_ok=True)
+
+    def clear(self):
+        """Delete the run directory."""
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+def _last_modified(directory: str) -> float:
+    """Return the latest modification time of a directory or anything in it."""
+    latest = os.path.getmtime(directory)
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for name in dirnames + filenames:
+            try:
+                latest = max(latest, os.path.getmtime(os.path.join(dirpath, name)))
+            except OSError:
+                pass
+    return latest
+
+def remove_stale_runs(max_age: float, keep: Iterable[str] = (), root: str = None) -> int:
+    """Delete run directories untouched for max_age seconds, except the run IDs in keep.
+
+    Failed runs keep their checkpoints, including the full extracted audio,
+    so they can resume; this bounds how long that disk space stays in use.
+    Returns the number of runs removed.
+    """
+    root = root or Config.RUNS_DIR
+    if not os.path.isdir(root):
+        return 0
+    keep = set(keep)
+    cutoff = time.time() - max_age
+    removed = 0
+    for run_id in os.listdir(root):
+        run_dir = os.path.join(root, run_id)
+        if run_id in keep or not os.path.isdir(run_dir):
+            continue
+        try:
+            if _last_modified(run_dir) >= cutoff:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(run_dir, ignore_errors=True)
+        removed += 1
+    return removed
@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from typing import Optional
+from typing import List, Optional
 
 # Load environment variables from .env file
 load_dotenv()
@@ -11,6 +11,43 @@ class Config:
     # LLM Host Configuration
     DEFAULT_LLM_HOST: str = os.getenv("DEFAULT_LLM_HOST", "ollama")
     DEFAULT_LLM_MODEL: str = os.getenv("DEFAULT_LLM_MODEL", "mistral")
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+    
+    # LLM Backend Pool (comma-separated API base URLs per host type)
+    OLLAMA_ENDPOINTS: str = os.getenv("OLLAMA_ENDPOINTS", "http://localhost:11434/api")
+    LMSTUDIO_ENDPOINTS: str = os.getenv("LMSTUDIO_ENDPOINTS", "http://localhost:1234/v1")
+    LLM_ROUTING: str = os.getenv("LLM_ROUTING", "least_outstanding").lower()
+    LLM_BACKEND_EJECT_SECONDS: float = float(os.getenv("LLM_BACKEND_EJECT_SECONDS", "30"))
+    LLM_STREAMING: bool = os.getenv("LLM_STREAMING", "True").lower() == "true"
+    LLM_MAX_RESPONSE_CHARS: int = int(os.getenv("LLM_MAX_RESPONSE_CHARS", "32000"))
+    LLM_STRUCTURED_OUTPUT: bool = os.getenv("LLM_STRUCTURED_OUTPUT", "True").lower() == "true"
+    LLM_SECTION_RETRIES: int = int(os.getenv("LLM_SECTION_RETRIES", "1"))
+    LLM_CHAT_LAYOUT: bool = os.getenv("LLM_CHAT_LAYOUT", "True").lower() == "true"
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    
+    # Batch Planning Settings
+    LLM_BATCH_PLANNER: str = os.getenv("LLM_BATCH_PLANNER", "token_budget").lower()
+    LLM_CONTEXT_WINDOW: int = int(os.getenv("LLM_CONTEXT_WINDOW", "4096"))
+    # Per-model overrides, e.g. "mistral=8192,phi=2048" (matched by name prefix)
+    LLM_CONTEXT_WINDOWS: str = os.getenv("LLM_CONTEXT_WINDOWS", "")
+    LLM_CLEAN_PROMPTS: bool = os.getenv("LLM_CLEAN_PROMPTS", "True").lower() == "true"
+    LLM_MAX_OUTPUT_TOKENS: int = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", "2048"))
+    LLM_MAX_BATCH_SECTIONS: int = int(os.getenv("LLM_MAX_BATCH_SECTIONS", "8"))
+    LLM_OUTPUT_TOKENS_PER_SECTION: float = float(os.getenv("LLM_OUTPUT_TOKENS_PER_SECTION", "400"))
+    LLM_CHARS_PER_TOKEN: float = float(os.getenv("LLM_CHARS_PER_TOKEN", "4.0"))
+    
+    # HTTP Client Settings (shared by LocalLLM and ModelDetector)
+    HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "8"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+    HTTP_READ_TIMEOUT: float = float(os.getenv("HTTP_READ_TIMEOUT", "600"))
+    HTTP_MAX_RETRIES: int = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+    HTTP_BACKOFF_FACTOR: float = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+    MODEL_DETECT_TIMEOUT: float = float(os.getenv("MODEL_DETECT_TIMEOUT", "2"))
+    MODEL_DETECT_TTL: float = float(os.getenv("MODEL_DETECT_TTL", "30"))
+    
+    # LLM Response Cache Settings
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    LLM_CACHE_MAX_MB: int = int(os.getenv("LLM_CACHE_MAX_MB", "256"))
     
     # AssemblyAI Configuration (Optional)
     ASSEMBLYAI_API_KEY: Optional[str] = os.getenv("ASSEMBLYAI_API_KEY")
@@ -25,12 +62,87 @@ class Config:
     # Output Settings
     OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "output")
     TEMP_DIR: str = os.getenv("TEMP_DIR", "temp")
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "cache")
+    
+    # Upload Settings
+    UPLOAD_CHUNK_MB: int = int(os.getenv("UPLOAD_CHUNK_MB", "8"))
+    
+    # YouTube Download Settings
+    YOUTUBE_AUDIO_ONLY: bool = os.getenv("YOUTUBE_AUDIO_ONLY", "True").lower() == "true"
+    
+    # Audio Extraction Settings
+    AUDIO_EXTRACTION_ENGINE: str = os.getenv("AUDIO_EXTRACTION_ENGINE", "ffmpeg").lower()
+    AUDIO_IN_MEMORY: bool = os.getenv("AUDIO_IN_MEMORY", "False").lower() == "true"
     
     # Model Settings
     DEFAULT_WHISPER_MODEL: str = os.getenv("DEFAULT_WHISPER_MODEL", "base")
+    WHISPER_MEMORY_BUDGET_MB: int = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "4096"))
+    
+    # Streaming Pipeline Settings
+    STREAMING_PIPELINE: bool = os.getenv("STREAMING_PIPELINE", "False").lower() == "true"
+    STREAM_CHUNK_SECONDS: float = float(os.getenv("STREAM_CHUNK_SECONDS", "60"))
+    
+    # Parallel Transcription Settings
+    TRANSCRIBE_WORKERS: int = int(os.getenv("TRANSCRIBE_WORKERS", "1"))
+    TRANSCRIBE_THREADS_PER_WORKER: int = int(os.getenv("TRANSCRIBE_THREADS_PER_WORKER", "4"))
+    TRANSCRIBE_CHUNK_SECONDS: float = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "120"))
+    
+    # Segmentation Settings
+    SEGMENT_MAX_GAP_SECONDS: float = float(os.getenv("SEGMENT_MAX_GAP_SECONDS", "2"))
+    SEGMENT_MAX_SECONDS: float = float(os.getenv("SEGMENT_MAX_SECONDS", "30"))
+    SEGMENT_SEMANTIC: bool = os.getenv("SEGMENT_SEMANTIC", "False").lower() == "true"
+    SEGMENT_SEMANTIC_WINDOW: int = int(os.getenv("SEGMENT_SEMANTIC_WINDOW", "3"))
+    SEGMENT_SEMANTIC_THRESHOLD: float = float(os.getenv("SEGMENT_SEMANTIC_THRESHOLD", "0.1"))
+    SEGMENT_MIN_SECONDS: float = float(os.getenv("SEGMENT_MIN_SECONDS", "10"))
+    
+    # Transcription Cache Settings
+    TRANSCRIPTION_CACHE_ENABLED: bool = os.getenv("TRANSCRIPTION_CACHE_ENABLED", "True").lower() == "true"
+    TRANSCRIPTION_CACHE_MAX_MB: int = int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "512"))
+    TRANSCRIPTION_CACHE_MAX_AGE_DAYS: float = float(os.getenv("TRANSCRIPTION_CACHE_MAX_AGE_DAYS", "30"))
+    
+    # Background Job Settings
+    JOBS_DB_PATH: str = os.getenv("JOBS_DB_PATH", os.path.join(CACHE_DIR, "jobs.sqlite"))
+    JOB_UPLOAD_DIR: str = os.getenv("JOB_UPLOAD_DIR", os.path.join(TEMP_DIR, "uploads"))
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_POLL_SECONDS: float = float(os.getenv("JOB_POLL_SECONDS", "2"))
+    # Jobs extracting and transcribing at once; jobs sharing a model size
+    # still take turns on its model (WhisperModelRegistry.model_lock)
+    MAX_CONCURRENT_TRANSCRIPTIONS: int = int(os.getenv("MAX_CONCURRENT_TRANSCRIPTIONS", "1"))
+    JOB_HEARTBEAT_SECONDS: float = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))
+    # Running jobs without a heartbeat for this long are requeued
+    JOB_STALE_SECONDS: float = float(os.getenv("JOB_STALE_SECONDS", "60"))
+    
+    # Checkpoint Settings
+    CHECKPOINTS_ENABLED: bool = os.getenv("CHECKPOINTS_ENABLED", "True").lower() == "true"
+    RUNS_DIR: str = os.getenv("RUNS_DIR", os.path.join(CACHE_DIR, "runs"))
+    KEEP_CHECKPOINTS: bool = os.getenv("KEEP_CHECKPOINTS", "False").lower() == "true"
+    # Checkpoints and uploads of failed runs untouched for this long are deleted
+    STALE_RUN_MAX_AGE_HOURS: float = float(os.getenv("STALE_RUN_MAX_AGE_HOURS", "72"))
     
     # Export Settings
     DEFAULT_EXPORT_FORMAT: str = os.getenv("DEFAULT_EXPORT_FORMAT", "PDF")
+    # Worker processes rendering export formats in parallel (0 renders in-process)
+    EXPORT_WORKERS: int = int(os.getenv("EXPORT_WORKERS", "2"))
+    # PDF renderers in order of preference: wkhtmltopdf, builtin (pure Python)
+    PDF_BACKENDS: str = os.getenv("PDF_BACKENDS", "wkhtmltopdf,builtin")
+    EXPORT_CACHE_ENABLED: bool = os.getenv("EXPORT_CACHE_ENABLED", "True").lower() == "true"
+    EXPORT_CACHE_DIR: str = os.getenv("EXPORT_CACHE_DIR", os.path.join(CACHE_DIR, "exports"))
+    EXPORT_CACHE_MAX_MB: int = int(os.getenv("EXPORT_CACHE_MAX_MB", "1024"))
+    
+    @classmethod
+    def endpoints_for(cls, host_type: str) -> List[str]:
+        """Return the configured API base URLs for a host type."""
+        raw = cls.OLLAMA_ENDPOINTS if host_type == "ollama" else cls.LMSTUDIO_ENDPOINTS
+        return [url.strip().rstrip("/") for url in raw.split(",") if url.strip()]
+    
+    @classmethod
+    def context_window_for(cls, model_name: str) -> int:
+        """Return the context window for a model, honouring LLM_CONTEXT_WINDOWS overrides."""
+        for entry in cls.LLM_CONTEXT_WINDOWS.split(","):
+            name, _, size = entry.partition("=")
+            if name.strip() and size.strip() and model_name.startswith(name.strip()):
+                return int(size)
+        return cls.LLM_CONTEXT_WINDOW
     
     @classmethod
     def validate(cls) -> bool:
@@ -44,6 +156,7 @@ class Config:
         # Create output and temp directories if they don't exist
         os.makedirs(cls.OUTPUT_DIR, exist_ok=True)
         os.makedirs(cls.TEMP_DIR, exist_ok=True)
+        os.makedirs(cls.CACHE_DIR, exist_ok=True)
         
         # Validate configuration
         cls.validate()
@@ -1,14 +1,19 @@
-from typing import List, Dict
+from typing import Callable, Iterable, List, Dict
 import json
 import time
 from datetime import timedelta
 from .config import Config
+from .checkpoint import RunCheckpoint
 from .local_llm import LocalLLM
 
 class CourseGenerator:
-    def __init__(self, model_name: str = "llama2", host_type: str = "ollama"):
+    def __init__(self, model_name: str = "llama2", host_type: str = "ollama",
+                 max_concurrency: int = None, use_cache: bool = None,
+                 streaming: bool = None):
         """Initialize the course generator with local LLM."""
-        self.llm = LocalLLM(model_name=model_name, host_type=host_type)
+        self.llm = LocalLLM(model_name=model_name, host_type=host_type,
+                            max_concurrency=max_concurrency, use_cache=use_cache,
+                            streaming=streaming)
         self.timing_metrics = {
             "total_time": 0,
             "initial_generation": 0,
@@ -16,6 +21,8 @@ class CourseGenerator:
             "api_calls": 0
         }
 
-    def generate_course_content(self, segments: List[Dict]) -> Dict:
+    def generate_course_content(self, segments: Iterable[Dict],
+                                on_section: Callable[[Dict], None] = None,
+                                checkpoint: RunCheckpoint = None) -> Dict:
         """Generate course content from transcription segments."""
-        return self.llm.generate_course_content(segments) 
\ No newline at end of file
+        return self.llm.generate_course_content(segments, on_section=on_section, checkpoint=checkpoint) 
\ No newline at end of file
@@ -1,46 +1,386 @@
 from docx import Document
 from docx.shared import Pt, Inches
 import pdfkit
+import hashlib
+import io
+import json
+import multiprocessing
 import os
-from typing import Dict
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait
+from functools import lru_cache
+from html import escape as escape_html
+from typing import Dict, Iterable, Optional
+from xml.sax.saxutils import escape as escape_xml
 import re
-import subprocess
+import logging
+
+from .cache import ExportStore
+from .config import Config
+from .pdf_writer import SimplePdfWriter
+from .transcript import json_default
+
+logger = logging.getLogger(__name__)
+
+# Bump when the HTML, DOCX or PDF layout changes, so cached exports are re-rendered
+EXPORT_TEMPLATE_VERSION = "1"
+
+HTML_HEAD = """<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; }
+        h1 { color: #2c3e50; }
+        h2 { color: #34495e; }
+        .objective { margin: 10px 0; }
+        .section { margin: 20px 0; }
+        .quiz { margin: 15px 0; }
+    </style>
+</head>
+<body>
+"""
+
+HTML_TAIL = """</body>
+</html>
+"""
+
+# Characters XML 1.0 does not allow, which python-docx would also reject
+_XML_INVALID_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def _html_intro(course_content: Dict) -> str:
+    """Return the HTML for the course title and learning objectives."""
+    parts = [f"<h1>{escape_html(course_content['title'])}</h1>\n<h2>Learning Objectives</h2>\n<ul>\n"]
+    parts.extend(f'<li class="objective">{escape_html(obj)}</li>\n' for obj in course_content["objectives"])
+    parts.append("</ul>\n")
+    return "".join(parts)
+
+def _html_section(section: Dict) -> str:
+    """Return the HTML for one course section."""
+    parts = [
+        f'<div class="section">\n<h2>{escape_html(section["title"])}</h2>\n',
+        f'<p>{escape_html(section["content"])}</p>\n',
+        f'<h3>Summary</h3>\n<p>{escape_html(section["summary"])}</p>\n',
+        '<h3>Quiz</h3>\n'
+    ]
+    for i, question in enumerate(section["quiz"], 1):
+        parts.append(f'<div class="quiz">\n<p><strong>Question {i}:</strong> {escape_html(question["question"])}</p>\n<ul>\n')
+        parts.extend(f'<li>{escape_html(option)}</li>\n' for option in question["options"])
+        parts.append(f'</ul>\n<p><em>Correct Answer: {escape_html(question["correct_answer"])}</em></p>\n</div>\n')
+    parts.append('</div>\n')
+    return "".join(parts)
+
+def _docx_paragraph(text: str, style: str = None) -> str:
+    """Return a WordprocessingML paragraph, with line breaks kept as in python-docx."""
+    style_xml = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+    lines = escape_xml(_XML_INVALID_RE.sub('', str(text))).split('\n')
+    runs = '<w:br/>'.join(f'<w:t xml:space="preserve">{line}</w:t>' for line in lines)
+    return f'<w:p>{style_xml}<w:r>{runs}</w:r></w:p>'
+
+def _docx_intro(course_content: Dict) -> str:
+    """Return the DOCX body XML for the course title and learning objectives."""
+    parts = [
+        _docx_paragraph(course_content["title"], "Title"),
+        _docx_paragraph("Learning Objectives", "Heading1")
+    ]
+    parts.extend(_docx_paragraph(objective, "ListBullet") for objective in course_content["objectives"])
+    return "".join(parts)
+
+def _docx_section(section: Dict) -> str:
+    """Return the DOCX body XML for one course section."""
+    parts = [
+        _docx_paragraph(section["title"], "Heading1"),
+        _docx_paragraph(section["content"]),
+        _docx_paragraph("Summary", "Heading2"),
+        _docx_paragraph(section["summary"]),
+        _docx_paragraph("Quiz", "Heading2")
+    ]
+    for i, question in enumerate(section["quiz"], 1):
+        parts.append(_docx_paragraph(f"Question {i}: {question['question']}"))
+        parts.extend(_docx_paragraph(option, "ListBullet") for option in question["options"])
+        parts.append(_docx_paragraph(f"Correct Answer: {question['correct_answer']}"))
+    return "".join(parts)
+
+class DocxWriter:
+    """Writes DOCX from python-docx's default template and streamed body XML."""
+
+    name = "python-docx template"
+
+    render_section = staticmethod(_docx_section)
+
+    def write(self, course_content: Dict, part_path: str, output_path: str):
+        """Write the DOCX with the sections from part_path.
+
+        Only word/document.xml is replaced; styles (Title, Heading 1/2,
+        List Bullet) and the page setup come from the template. The body
+        is copied into the zip in chunks rather than built in memory.
+        """
+        with zipfile.ZipFile(io.BytesIO(_docx_template())) as template:
+            document_xml = template.read("word/document.xml").decode("utf-8")
+            body_start = document_xml.index("<w:body>") + len("<w:body>")
+            section_properties = document_xml.index("<w:sectPr")
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".docx.tmp")
+            try:
+                with os.fdopen(fd, 'wb') as out, zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as package:
+                    for item in template.infolist():
+                        if item.filename != "word/document.xml":
+                            package.writestr(item, template.read(item.filename))
+                    with package.open("word/document.xml", 'w', force_zip64=True) as document, \
+                            open(part_path, 'rb') as body:
+                        document.write(document_xml[:body_start].encode("utf-8"))
+                        document.write(_docx_intro(course_content).encode("utf-8"))
+                        shutil.copyfileobj(body, document)
+                        document.write(document_xml[section_properties:].encode("utf-8"))
+                os.replace(tmp_path, output_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+@lru_cache(maxsize=1)
+def _docx_template() -> bytes:
+    """Return python-docx's default document package."""
+    buffer = io.BytesIO()
+    Document().save(buffer)
+    return buffer.getvalue()
+
+class WkhtmltopdfBackend:
+    """Renders PDF by converting the streamed HTML with wkhtmltopdf (via pdfkit)."""
+
+    name = "wkhtmltopdf"
+
+    # Common installation paths when wkhtmltopdf is not on PATH
+    POSSIBLE_PATHS = [
+        r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe',
+        r'C:\Program Files (x86)\wkhtmltopdf\bin\wkhtmltopdf.exe',
+        r'C:\wkhtmltopdf\bin\wkhtmltopdf.exe',
+        '/usr/local/bin/wkhtmltopdf',
+        '/usr/bin/wkhtmltopdf',
+        '/opt/homebrew/bin/wkhtmltopdf'
+    ]
+
+    render_section = staticmethod(_html_section)
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def create(cls) -> Optional["WkhtmltopdfBackend"]:
+        """Return a backend if the wkhtmltopdf executable can be found."""
+        path = shutil.which("wkhtmltopdf")
+        if path is None:
+            path = next((p for p in cls.POSSIBLE_PATHS if os.path.exists(p)), None)
+        return cls(path) if path else None
+
+    def write(self, course_content: Dict, part_path: str, output_path: str):
+        """Assemble the HTML with the sections from part_path and convert it to PDF."""
+        fd, temp_html = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".html")
+        tmp_pdf = None
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f, open(part_path, 'r', encoding='utf-8') as body:
+                f.write(HTML_HEAD)
+                f.write(_html_intro(course_content))
+                shutil.copyfileobj(body, f)
+                f.write(HTML_TAIL)
+            # Convert HTML to PDF in a temp file, then move it into place
+            fd, tmp_pdf = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".pdf.tmp")
+            os.close(fd)
+            pdfkit.from_file(temp_html, tmp_pdf, configuration=pdfkit.configuration(wkhtmltopdf=self.path))
+            os.replace(tmp_pdf, output_path)
+        finally:
+            # Clean up temporary files
+            for path in (temp_html, tmp_pdf):
+                if path is not None and os.path.exists(path):
+                    os.remove(path)
+
+class BuiltinPdfBackend:
+    """Renders PDF in-process with SimplePdfWriter; needs no external binary.
+
+    Sections are streamed as JSON lines and laid out page by page when the
+    PDF is written, mirroring the structure of the HTML and DOCX exports.
+    """
+
+    name = "builtin"
+
+    @classmethod
+    def create(cls) -> "BuiltinPdfBackend":
+        return cls()
+
+    @staticmethod
+    def render_section(section: Dict) -> str:
+        return json.dumps(section, default=json_default) + "\n"
+
+    def write(self, course_content: Dict, part_path: str, output_path: str):
+        """Lay out the course with the sections from part_path as a PDF."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix=".pdf.tmp")
+        try:
+            with os.fdopen(fd, 'wb') as out, open(part_path, 'r', encoding='utf-8') as body:
+                pdf = SimplePdfWriter(out)
+                pdf.paragraph(course_content["title"], "bold", 22)
+                pdf.paragraph("Learning Objectives", "bold", 16, space_before=12)
+                for objective in course_content["objectives"]:
+                    pdf.paragraph(objective, indent=18, space_before=4, bullet=True)
+                for line in body:
+                    section = json.loads(line)
+                    pdf.paragraph(section["title"], "bold", 16, space_before=20)
+                    pdf.paragraph(section["content"], space_before=6)
+                    pdf.paragraph("Summary", "bold", 13, space_before=10)
+                    pdf.paragraph(section["summary"], space_before=4)
+                    pdf.paragraph("Quiz", "bold", 13, space_before=10)
+                    for i, question in enumerate(section["quiz"], 1):
+                        pdf.paragraph(f"Question {i}: {question['question']}", "bold", space_before=8)
+                        for option in question["options"]:
+                            pdf.paragraph(option, indent=18, space_before=2, bullet=True)
+                        pdf.paragraph(f"Correct Answer: {question['correct_answer']}", "italic", space_before=4)
+                pdf.close()
+            os.replace(tmp_path, output_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+# PDF backends by name, tried in the order given by Config.PDF_BACKENDS
+PDF_BACKENDS = {
+    "wkhtmltopdf": WkhtmltopdfBackend,
+    "builtin": BuiltinPdfBackend
+}
+
+_export_pool = None
+_export_pool_lock = threading.Lock()
+
+def get_export_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the process-wide export worker pool, or None if EXPORT_WORKERS is 0."""
+    global _export_pool
+    if Config.EXPORT_WORKERS < 1:
+        return None
+    if _export_pool is None:
+        with _export_pool_lock:
+            if _export_pool is None:
+                _export_pool = ProcessPoolExecutor(
+                    max_workers=Config.EXPORT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _export_pool
+
+def shutdown_export_pool():
+    """Shut down the export worker pool, if one was started."""
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is not None:
+            _export_pool.shutdown()
+            _export_pool = None
+
+def _timed_write(writer, course_content: Dict, part_path: str, output_path: str) -> float:
+    """Run writer.write and return how long it took (runs in an export worker)."""
+    start = time.time()
+    writer.write(course_content, part_path, output_path)
+    return time.time() - start
+
+class StreamingExport:
+    """Export formats written section by section while a course is generated.
+
+    Each section is rendered by every format's writer and appended to that
+    format's part file as soon as it is added, so memory use does not grow
+    with the number of sections. The course title and objectives are only
+    known at the end, so finish() writes them and streams the part files
+    into the final documents, rendering all formats concurrently in the
+    export worker pool. Part files get unique names, so concurrent jobs
+    writing to the same directory never clash.
+
+    add_section() must not be called concurrently; LocalLLM's on_section
+    callback already delivers sections one at a time and in order.
+    """
+
+    def __init__(self, writers: Dict, work_dir: str):
+        self.writers = writers
+        self.work_dir = work_dir
+        self.sections_written = 0
+        self._parts = {}
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            for fmt in writers:
+                fd, path = tempfile.mkstemp(dir=work_dir, prefix=".course-", suffix=f".{fmt.lower()}.part")
+                self._parts[fmt] = (path, os.fdopen(fd, 'w', encoding='utf-8'))
+        except Exception:
+            self.abort()
+            raise
+
+    def add_section(self, section: Dict):
+        """Render one section into every format's part file."""
+        for fmt, (_, f) in self._parts.items():
+            f.write(self.writers[fmt].render_section(section))
+        self.sections_written += 1
+
+    def finish(self, course_content: Dict, paths: Dict[str, str]) -> Dict[str, Dict]:
+        """Write each format to its path in paths ({"PDF": path, ...}).
+
+        Returns the render time and backend of each format.
+        """
+        try:
+            for _, f in self._parts.values():
+                f.close()
+            # Workers only need the metadata; the sections are in the part files
+            intro = {"title": course_content["title"], "objectives": list(course_content["objectives"])}
+            jobs = {
+                fmt: (self.writers[fmt], intro, self._parts[fmt][0], output_path)
+                for fmt, output_path in paths.items()
+            }
+            pool = get_export_pool()
+            if pool is None:
+                times = {fmt: _timed_write(*args) for fmt, args in jobs.items()}
+            else:
+                futures = {fmt: pool.submit(_timed_write, *args) for fmt, args in jobs.items()}
+                # Part files are deleted below, so let every format finish first
+                wait(futures.values())
+                times = {fmt: future.result() for fmt, future in futures.items()}
+            return {fmt: {"time": times[fmt], "backend": self.writers[fmt].name} for fmt in jobs}
+        finally:
+            self.abort()
+
+    def abort(self):
+        """Delete the part files."""
+        for path, f in self._parts.values():
+            f.close()
+            if os.path.exists(path):
+                os.remove(path)
+        self._parts = {}
+
+def content_hash(course_content: Dict) -> str:
+    """Hash the parts of the course content that appear in exports.
+
+    The JSON is fed to the hash piece by piece, so large courses are never
+    serialised into one string.
+    """
+    digest = hashlib.sha256()
+    encoder = json.JSONEncoder(sort_keys=True, ensure_ascii=False, default=json_default)
+    exported = {key: course_content[key] for key in ("title", "objectives", "sections")}
+    for chunk in encoder.iterencode(exported):
+        digest.update(chunk.encode("utf-8"))
+    return digest.hexdigest()
 
 class CourseExporter:
     def __init__(self):
         """Initialize the course exporter."""
-        # Configure pdfkit with wkhtmltopdf path
-        self.wkhtmltopdf_path = self._find_wkhtmltopdf()
-        if self.wkhtmltopdf_path:
-            self.config = pdfkit.configuration(wkhtmltopdf=self.wkhtmltopdf_path)
-        else:
-            self.config = None
-
-    def _find_wkhtmltopdf(self) -> str:
-        """Find wkhtmltopdf executable path."""
-        # Common installation paths
-        possible_paths = [
-            r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe',
-            r'C:\Program Files (x86)\wkhtmltopdf\bin\wkhtmltopdf.exe',
-            r'C:\wkhtmltopdf\bin\wkhtmltopdf.exe'
-        ]
-        
-        # Check if wkhtmltopdf is in PATH
-        try:
-            result = subprocess.run(['where', 'wkhtmltopdf'], 
-                                 capture_output=True, 
-                                 text=True, 
-                                 check=True)
-            if result.stdout:
-                return result.stdout.strip()
-        except:
-            pass
-        
-        # Check common installation paths
-        for path in possible_paths:
-            if os.path.exists(path):
-                return path
-        
+        self.pdf_backend = self._select_pdf_backend()
+        self.docx_writer = DocxWriter()
+        self.store = ExportStore(
+            Config.EXPORT_CACHE_DIR, Config.EXPORT_CACHE_MAX_MB * 1024 * 1024
+        ) if Config.EXPORT_CACHE_ENABLED else None
+
+    def _select_pdf_backend(self):
+        """Return the first available backend listed in Config.PDF_BACKENDS, or None."""
+        for name in Config.PDF_BACKENDS.split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name not in PDF_BACKENDS:
+                logger.warning(f"Ignoring unknown PDF backend {name}")
+                continue
+            backend = PDF_BACKENDS[name].create()
+            if backend is not None:
+                return backend
         return None
 
     def _sanitize_filename(self, filename: str) -> str:
@@ -51,110 +391,74 @@ class CourseExporter:
         filename = re.sub(r'\s+', ' ', filename)
         return filename.strip()
 
+    def writer_for(self, fmt: str):
+        """Return the writer that renders the given export format."""
+        if fmt == "DOCX":
+            return self.docx_writer
+        if fmt == "PDF":
+            if self.pdf_backend is None:
+                raise RuntimeError(
+                    f"No PDF backend available (tried {Config.PDF_BACKENDS}). Install wkhtmltopdf "
+                    "from https://wkhtmltopdf.org/downloads.html or add 'builtin' to PDF_BACKENDS"
+                )
+            return self.pdf_backend
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    def open_stream(self, formats: Iterable[str], work_dir: str) -> StreamingExport:
+        """Start a streaming export of the given formats, with part files in work_dir."""
+        return StreamingExport({fmt: self.writer_for(fmt) for fmt in formats}, work_dir)
+
+    def export(self, course_content: Dict, paths: Dict[str, str],
+               stream: StreamingExport = None) -> Dict[str, Dict]:
+        """Export finished course content to each format in paths ({"PDF": path, ...}).
+
+        Formats already rendered for the same content, renderer and template
+        version are served from the export store without rendering. The
+        rest are rendered from stream, if given (it must hold all of the
+        course's sections), or from course_content["sections"].
+
+        Returns the time, backend and whether it was cached for each format.
+        """
+        exports = {}
+        keys = {}
+        if self.store is not None and paths:
+            try:
+                digest = content_hash(course_content)
+                for fmt, output_path in paths.items():
+                    name = self.writer_for(fmt).name
+                    keys[fmt] = ExportStore.make_key(digest, fmt, name, EXPORT_TEMPLATE_VERSION)
+                    start = time.time()
+                    if self.store.fetch(keys[fmt], output_path):
+                        exports[fmt] = {"time": time.time() - start, "backend": name, "cached": True}
+            except Exception:
+                if stream is not None:
+                    stream.abort()
+                raise
+
+        missing = {fmt: path for fmt, path in paths.items() if fmt not in exports}
+        if not missing:
+            if stream is not None:
+                stream.abort()
+            return exports
+        if stream is None:
+            stream = self.open_stream(list(missing), os.path.dirname(os.path.abspath(next(iter(missing.values())))))
+            try:
+                for section in course_content["sections"]:
+                    stream.add_section(section)
+            except Exception:
+                stream.abort()
+                raise
+        rendered = stream.finish(course_content, missing)
+        for fmt, export in rendered.items():
+            if fmt in keys:
+                self.store.put(keys[fmt], missing[fmt])
+            exports[fmt] = {**export, "cached": False}
+        return exports
+
     def export_to_docx(self, course_content: Dict, output_path: str):
         """Export course content to DOCX format."""
-        doc = Document()
-        
-        # Add title
-        doc.add_heading(course_content["title"], 0)
-        
-        # Add objectives
-        doc.add_heading("Learning Objectives", level=1)
-        for objective in course_content["objectives"]:
-            doc.add_paragraph(objective, style='List Bullet')
-        
-        # Add sections
-        for section in course_content["sections"]:
-            doc.add_heading(section["title"], level=1)
-            
-            # Add content
-            doc.add_paragraph(section["content"])
-            
-            # Add summary
-            doc.add_heading("Summary", level=2)
-            doc.add_paragraph(section["summary"])
-            
-            # Add quiz
-            doc.add_heading("Quiz", level=2)
-            for i, question in enumerate(section["quiz"], 1):
-                doc.add_paragraph(f"Question {i}: {question['question']}")
-                for option in question["options"]:
-                    doc.add_paragraph(option, style='List Bullet')
-                doc.add_paragraph(f"Correct Answer: {question['correct_answer']}")
-        
-        # Save document
-        doc.save(output_path)
+        self.export(course_content, {"DOCX": output_path})
 
     def export_to_pdf(self, course_content: Dict, output_path: str):
         """Export course content to PDF format."""
-        if not self.wkhtmltopdf_path:
-            raise RuntimeError(
-                "wkhtmltopdf not found. Please install it from https://wkhtmltopdf.org/downloads.html"
-            )
-
-        # First create a temporary HTML file
-        html_content = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                h1 {{ color: #2c3e50; }}
-                h2 {{ color: #34495e; }}
-                .objective {{ margin: 10px 0; }}
-                .section {{ margin: 20px 0; }}
-                .quiz {{ margin: 15px 0; }}
-            </style>
-        </head>
-        <body>
-            <h1>{course_content["title"]}</h1>
-            
-            <h2>Learning Objectives</h2>
-            <ul>
-                {"".join(f'<li class="objective">{obj}</li>' for obj in course_content["objectives"])}
-            </ul>
-        """
-        
-        for section in course_content["sections"]:
-            html_content += f"""
-            <div class="section">
-                <h2>{section["title"]}</h2>
-                <p>{section["content"]}</p>
-                
-                <h3>Summary</h3>
-                <p>{section["summary"]}</p>
-                
-                <h3>Quiz</h3>
-            """
-            
-            for i, question in enumerate(section["quiz"]):
-                html_content += f"""
-                <div class="quiz">
-                    <p><strong>Question {i+1}:</strong> {question["question"]}</p>
-                    <ul>
-                        {"".join(f'<li>{opt}</li>' for opt in question["options"])}
-                    </ul>
-                    <p><em>Correct Answer: {question["correct_answer"]}</em></p>
-                </div>
-                """
-            
-            html_content += """
-            </div>
-            """
-        
-        html_content += """
-        </body>
-        </html>
-        """
-        
-        # Write HTML to temporary file
-        temp_html = "temp_course.html"
-        with open(temp_html, "w", encoding="utf-8") as f:
-            f.write(html_content)
-        
-        try:
-            # Convert HTML to PDF
-            pdfkit.from_file(temp_html, output_path, configuration=self.config)
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_html):
-                os.remove(temp_html) 
\ No newline at end of file
+        self.export(course_content, {"PDF": output_path})
@@ -0,0 +1,71 @@
+import threading
+from typing import Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .config import Config
+
+_session = None
+_probe_session = None
+_session_lock = threading.Lock()
+
+def _build_session(max_retries: int = None) -> requests.Session:
+    """Create a pooled keep-alive session with retry/backoff configured from Config.
+
+    Only failed connections and 502/503/504 responses are retried. A read
+    timeout means the host may still be generating, so re-sending the
+    request would start the same generation again.
+    """
+    retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False
+    )
+    # Keep at least one pooled connection per in-flight LLM request
+    pool_size = max(Config.HTTP_POOL_SIZE, Config.LLM_MAX_CONCURRENCY)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+def get_session() -> requests.Session:
+    """Return the process-wide HTTP session shared by LocalLLM and ModelDetector."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def get_probe_session() -> requests.Session:
+    """Return a shared session without retries, for fast-failing health probes."""
+    global _probe_session
+    if _probe_session is None:
+        with _session_lock:
+            if _probe_session is None:
+                _probe_session = _build_session(max_retries=0)
+    return _probe_session
+
+def connections_opened(session: requests.Session) -> int:
+    """Return how many HTTP connections session has opened so far."""
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    total = 0
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total += pool.num_connections
+    return total
+
+def get_timeout() -> Tuple[float, float]:
+    """Return the (connect, read) timeout tuple for LLM host requests."""
+    return (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
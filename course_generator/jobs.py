@@ -0,0 +1,352 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from .checkpoint import remove_stale_runs
+from .config import Config
+from .transcriber import Transcriber
+from .pipeline import run_pipeline
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+class JobStore:
+    """SQLite-backed persistent queue of course generation jobs.
+
+    A running job records the worker that owns it and a heartbeat the
+    owner refreshes while it runs. Only jobs whose heartbeat has gone
+    stale are requeued, so several queues (another server process, or a
+    queue rebuilt by clearing Streamlit's cache) can share one database
+    without running a live job twice.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                params TEXT NOT NULL,
+                progress INTEGER NOT NULL DEFAULT 0,
+                message TEXT NOT NULL DEFAULT '',
+                result TEXT,
+                error TEXT,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                owner TEXT,
+                heartbeat REAL
+            )"""
+        )
+        # Databases created before jobs had owners
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created)")
+        self._conn.commit()
+
+    def submit(self, params: Dict) -> str:
+        """Queue a job and return its ID."""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, params, message, created) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(params), "Queued", time.time())
+            )
+            self._conn.commit()
+        return job_id
+
+    def claim(self, owner: str) -> Optional[Tuple[str, Dict]]:
+        """Mark the oldest queued job as running for owner and return (job_id, params).
+
+        The update only succeeds while the job is still queued, so when
+        another process claims the same job first, the next one is tried.
+        """
+        with self._lock:
+            while True:
+                row = self._conn.execute(
+                    "SELECT id, params FROM jobs WHERE status = ? ORDER BY created ASC LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, started = ?, message = ?, owner = ?, heartbeat = ? "
+                    "WHERE id = ? AND status = ?",
+                    (RUNNING, now, "Starting", owner, now, row[0], QUEUED)
+                )
+                self._conn.commit()
+                if cursor.rowcount:
+                    return row[0], json.loads(row[1])
+
+    def update_progress(self, job_id: str, progress: int, message: str, owner: str = None):
+        """Record how far a running job has got (ignored if owner no longer owns it)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, message = ?, heartbeat = ? "
+                "WHERE id = ? AND (? IS NULL OR owner = ?)",
+                (progress, message, time.time(), job_id, owner, owner)
+            )
+            self._conn.commit()
+
+    def heartbeat(self, owner: str) -> int:
+        """Refresh the heartbeat of every job owner is running."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = ?", (time.time(), owner, RUNNING)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def complete(self, job_id: str, result: Dict, owner: str = None):
+        """Mark a job as completed with its result (ignored if owner no longer owns it)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = 100, result = ?, finished = ? "
+                "WHERE id = ? AND (? IS NULL OR owner = ?)",
+                (COMPLETED, json.dumps(result), time.time(), job_id, owner, owner)
+            )
+            self._conn.commit()
+
+    def fail(self, job_id: str, error: str, owner: str = None):
+        """Mark a job as failed with an error message (ignored if owner no longer owns it)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, message = ?, finished = ? "
+                "WHERE id = ? AND (? IS NULL OR owner = ?)",
+                (FAILED, error, "Failed", time.time(), job_id, owner, owner)
+            )
+            self._conn.commit()
+
+    def retry(self, job_id: str) -> bool:
+        """Queue a failed job again; it resumes from its checkpoints."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = 0, message = ?, error = NULL, finished = NULL "
+                "WHERE id = ? AND status = ?",
+                (QUEUED, "Queued for retry", job_id, FAILED)
+            )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def recent(self, cutoff: float) -> List[Tuple[str, Dict]]:
+        """Return (job_id, params) of jobs still pending or finished since cutoff."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, params FROM jobs WHERE status IN (?, ?) OR finished >= ?",
+                (QUEUED, RUNNING, cutoff)
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def requeue_stale(self, max_age: float) -> int:
+        """Put running jobs whose owner stopped heartbeating back in the queue."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = 0, message = ?, owner = NULL "
+                "WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?)",
+                (QUEUED, "Requeued after its worker stopped", RUNNING, time.time() - max_age)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a job's status, progress and result, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, progress, message, result, error, created, started, finished "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            position = None
+            if row is not None and row[1] == QUEUED:
+                position = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND created < ?", (QUEUED, row[6])
+                ).fetchone()[0]
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "status": row[1],
+            "progress": row[2],
+            "message": row[3],
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "created": row[6],
+            "started": row[7],
+            "finished": row[8],
+            "queue_position": position
+        }
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+class JobQueue:
+    """Worker threads that run queued jobs through the course pipeline.
+
+    Jobs persist in a JobStore, so they survive Streamlit reruns and browser
+    refreshes. A heartbeat thread keeps this queue's running jobs fresh;
+    jobs whose worker died (no heartbeat for JOB_STALE_SECONDS) are picked
+    up again by any queue on the same database. Each job checkpoints
+    under its own ID, so requeued and retried jobs resume where they
+    stopped.
+    A semaphore limits how many jobs extract and transcribe audio at once,
+    so concurrent jobs do not oversubscribe the CPU with Whisper.
+    """
+
+    def __init__(self, store: JobStore = None, workers: int = None,
+                 max_transcriptions: int = None, runner: Callable = None):
+        self.store = store or JobStore(Config.JOBS_DB_PATH)
+        self.workers = max(1, workers or Config.JOB_WORKERS)
+        self.transcription_slot = threading.BoundedSemaphore(
+            max(1, max_transcriptions or Config.MAX_CONCURRENT_TRANSCRIPTIONS)
+        )
+        self.runner = runner or run_pipeline
+        self._transcribers = {}
+        self._transcribers_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        # Identifies this queue's workers in the store
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._requeue_stale()
+        try:
+            self.cleanup()
+        except OSError as e:
+            logger.warning(f"Cleaning up stale job files failed: {str(e)}")
+
+    def cleanup(self, max_age: float = None) -> int:
+        """Delete checkpoints and uploads of runs that stopped over max_age seconds ago.
+
+        Failed jobs keep both so they can be retried; once a failed job
+        (or an orphaned upload or CLI run) is older than
+        STALE_RUN_MAX_AGE_HOURS its files are removed, and retrying it
+        fails. Returns the number of run directories and uploads deleted.
+        """
+        if max_age is None:
+            max_age = Config.STALE_RUN_MAX_AGE_HOURS * 3600
+        cutoff = time.time() - max_age
+        recent = self.store.recent(cutoff)
+        removed = remove_stale_runs(max_age, keep=[job_id for job_id, _ in recent])
+
+        if os.path.isdir(Config.JOB_UPLOAD_DIR):
+            keep = {
+                os.path.abspath(params["source"])
+                for _, params in recent if params.get("input_type") == "file"
+            }
+            for name in os.listdir(Config.JOB_UPLOAD_DIR):
+                path = os.path.abspath(os.path.join(Config.JOB_UPLOAD_DIR, name))
+                if path in keep or not os.path.isfile(path) or os.path.getmtime(path) >= cutoff:
+                    continue
+                os.remove(path)
+                removed += 1
+        if removed:
+            logger.info(f"Removed {removed} stale run checkpoint(s) and upload(s)")
+        return removed
+
+    def _requeue_stale(self):
+        requeued = self.store.requeue_stale(Config.JOB_STALE_SECONDS)
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted job(s)")
+
+    def start(self):
+        """Start the worker threads and the heartbeat thread."""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"course-job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name="course-job-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def _heartbeat(self):
+        """Refresh this queue's running jobs until stopped."""
+        while not self._stop.wait(Config.JOB_HEARTBEAT_SECONDS):
+            try:
+                self.store.heartbeat(self.owner)
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed: {str(e)}")
+
+    def submit(self, params: Dict) -> str:
+        """Queue a pipeline job and wake an idle worker.
+
+        params: source, input_type ("youtube" or "file"), model_size,
+        transcribe_workers, llm_model, host_type, llm_concurrency,
+        use_llm_cache, stream_llm, streaming_pipeline, export_formats,
+        and optionally upload_metrics and delete_source.
+        """
+        job_id = self.store.submit(params)
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return the current state of a job."""
+        return self.store.get(job_id)
+
+    def retry(self, job_id: str) -> bool:
+        """Requeue a failed job and wake an idle worker."""
+        retried = self.store.retry(job_id)
+        self._wakeup.set()
+        return retried
+
+    def _get_transcriber(self, model_size: str, workers: int) -> Transcriber:
+        """Share one Transcriber per model size and worker count across jobs."""
+        key = (model_size, max(1, workers or 1))
+        with self._transcribers_lock:
+            if key not in self._transcribers:
+                self._transcribers[key] = Transcriber(model_size=model_size, workers=key[1])
+            return self._transcribers[key]
+
+    def _work(self):
+        """Claim and run jobs until stopped."""
+        while not self._stop.is_set():
+            claimed = self.store.claim(self.owner)
+            if claimed is None:
+                self._requeue_stale()
+                self._wakeup.wait(Config.JOB_POLL_SECONDS)
+                self._wakeup.clear()
+                continue
+            job_id, params = claimed
+            logger.info(f"Running job {job_id}")
+            try:
+                result = self.runner(
+                    params,
+                    self._get_transcriber(params["model_size"], params.get("transcribe_workers")),
+                    progress=lambda percent, message: self.store.update_progress(job_id, percent, message, self.owner),
+                    transcription_slot=self.transcription_slot,
+                    output_dir=os.path.join(Config.OUTPUT_DIR, job_id),
+                    run_id=job_id
+                )
+                self.store.complete(job_id, result, self.owner)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+                self.store.fail(job_id, str(e), self.owner)
+
+    def stop(self):
+        """Stop the workers after their current job and release transcribers."""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        for transcriber in self._transcribers.values():
+            transcriber.close()
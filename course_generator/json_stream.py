@@ -0,0 +1,55 @@
+import json
+from typing import Dict, List, Optional
+
+class SectionStreamParser:
+    """Incrementally parse a streamed {"sections": [...]} response.
+
+    Text is fed in arbitrary chunks as tokens arrive. Each object inside the
+    top-level array is decoded and returned as soon as its closing brace has
+    been seen, without waiting for the rest of the response. An object that
+    fails to decode is returned as None, so later objects keep their
+    position in the array.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.position = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.object_start = None
+
+    def feed(self, chunk: str) -> List[Optional[Dict]]:
+        """Consume a chunk of response text and return the objects it completed."""
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self.position, len(text)):
+            char = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                # Strings only matter once the top-level object has started
+                self.in_string = bool(self.stack)
+            elif char in '{[':
+                # An object directly inside the top-level array is a section
+                if char == '{' and self.stack == ['{', '[']:
+                    self.object_start = i
+                self.stack.append(char)
+            elif char in '}]' and self.stack:
+                self.stack.pop()
+                if char == '}' and self.stack == ['{', '['] and self.object_start is not None:
+                    try:
+                        completed.append(json.loads(text[self.object_start:i + 1]))
+                    except ValueError:
+                        completed.append(None)
+                    self.object_start = None
+        self.position = len(text)
+        return completed
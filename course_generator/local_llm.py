@@ -1,64 +1,598 @@
-import requests
 import json
-from typing import Dict, List
+import logging
+import requests
+from typing import Callable, Dict, Iterable, Iterator, List
+import itertools
 import time
 from datetime import timedelta
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .config import Config
+from .http_client import connections_opened, get_session, get_timeout
+from .cache import ResponseCache
+from .checkpoint import RunCheckpoint
+from .transcript import CourseSection
+from .json_stream import SectionStreamParser
+from .backend_pool import BackendPool
+from .batching import BatchPlanner, FixedBatchPlanner, TokenBudgetPlanner, estimate_tokens
+from .prompt_prep import PromptPreparer
+from .schemas import METADATA_SCHEMA, batch_schema, validate_metadata, validate_section
+
+# Fixed instruction prefixes. They are sent as a stable system message so the
+# host can reuse the prompt prefix (KV cache) across requests; only the user
+# message changes from batch to batch.
+BATCH_SYSTEM_PROMPT = """You generate course material from sections of a video transcript.
+For each section you are given, provide:
+1. Structured learning content
+2. A concise summary
+3. 3 multiple choice questions
+
+Return one entry per section, in the order given, formatted as JSON:
+{
+    "sections": [
+        {
+            "content": "Structured content here",
+            "summary": "Summary here",
+            "quiz": [
+                {
+                    "question": "Question text",
+                    "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
+                    "correct_answer": "Option 1"
+                }
+            ]
+        }
+    ]
+}"""
+
+METADATA_SYSTEM_PROMPT = """You design courses from video content.
+Given the opening of a video transcript, generate:
+1. A concise, engaging title
+2. A brief description
+3. 3-5 learning objectives
+
+Format the response as JSON:
+{
+    "title": "Course Title",
+    "description": "Course Description",
+    "objectives": ["Objective 1", "Objective 2", "Objective 3"]
+}"""
+
+logger = logging.getLogger(__name__)
 
 class LocalLLM:
-    def __init__(self, model_name: str = "llama2", host_type: str = "ollama"):
+    def __init__(self, model_name: str = "llama2", host_type: str = "ollama",
+                 max_concurrency: int = None, use_cache: bool = None,
+                 streaming: bool = None, batch_planner: BatchPlanner = None):
         """Initialize the local LLM with the specified model and host type."""
         self.model_name = model_name
         self.host_type = host_type.lower()
+        # Stream tokens and parse sections as they complete
+        self.streaming = Config.LLM_STREAMING if streaming is None else streaming
+        # Constrain output with JSON schemas (Ollama format / LM Studio response_format)
+        self.structured_output = Config.LLM_STRUCTURED_OUTPUT
+        # Send instructions as a stable system message via the chat endpoints
+        self.chat_layout = Config.LLM_CHAT_LAYOUT
+        # Number of section batch requests kept in flight at once
+        self.max_concurrency = max(1, max_concurrency or Config.LLM_MAX_CONCURRENCY)
+        self._metrics_lock = threading.Lock()
         
         # Configure API endpoints based on host type
-        if self.host_type == "ollama":
-            self.api_base = "http://localhost:11434/api"
-        elif self.host_type == "lmstudio":
-            self.api_base = "http://localhost:1234/v1"
-        else:
+        if self.host_type not in ("ollama", "lmstudio"):
             raise ValueError("host_type must be either 'ollama' or 'lmstudio'")
+        self.pool = BackendPool(self.host_type, Config.endpoints_for(self.host_type), model_name=model_name)
+        self.api_base = self.pool.backends[0].url
+        
+        self.session = get_session()
+        self.sampling_options = {
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "max_tokens": Config.LLM_MAX_OUTPUT_TOKENS
+        }
+        
+        # Decides how sections are grouped into requests
+        self.context_window = Config.context_window_for(self.model_name)
+        self.prompt_overhead_tokens = (
+            estimate_tokens(BATCH_SYSTEM_PROMPT) + estimate_tokens(self._build_batch_prompt([]))
+        )
+        if batch_planner is None:
+            if Config.LLM_BATCH_PLANNER == "fixed":
+                batch_planner = FixedBatchPlanner(batch_size=2)
+            else:
+                batch_planner = TokenBudgetPlanner(
+                    context_window=self.context_window,
+                    prompt_overhead_tokens=self.prompt_overhead_tokens
+                )
+        self.batch_planner = batch_planner
+        self.prompt_preparer = PromptPreparer(clean=Config.LLM_CLEAN_PROMPTS)
+        
+        # On-disk response cache; use_cache=False bypasses lookups to force
+        # fresh output while still refreshing the stored responses
+        self.use_cache = use_cache if use_cache is not None else True
+        self.cache = ResponseCache(
+            os.path.join(Config.CACHE_DIR, "llm_responses.sqlite"),
+            max_bytes=Config.LLM_CACHE_MAX_MB * 1024 * 1024
+        ) if Config.LLM_CACHE_ENABLED else None
             
         self.timing_metrics = {
             "total_time": 0,
             "initial_generation": 0,
             "section_generation": 0,
-            "api_calls": 0
+            "api_calls": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "time_to_first_section": None,
+            "parse_failures": 0,
+            "retries": 0,
+            "prompt_tokens": [],
+            "prefill_time": 0.0,
+            "prefill_tokens": 0
         }
+        self._run_start = None
+
+    def _cache_key(self, prompt: str, schema: Dict = None, system: str = None) -> str:
+        """Return the response cache key; the output schema is part of the options."""
+        options = dict(self.sampling_options, schema=schema) if schema else self.sampling_options
+        if system:
+            prompt = f"{system}\0{prompt}"
+        return ResponseCache.make_key(self.host_type, self.model_name, options, prompt)
 
-    def generate_response(self, prompt: str) -> str:
+    def _forget_response(self, prompt: str, schema: Dict = None, system: str = None):
+        """Drop a cached response that failed validation, so reruns request it again."""
+        if self.cache is not None:
+            self.cache.delete(self._cache_key(prompt, schema, system))
+
+    def generate_response(self, prompt: str, schema: Dict = None, bypass_cache: bool = False,
+                          system: str = None) -> str:
+        """Generate a response, serving it from the response cache when possible.
+        
+        bypass_cache skips the lookup (e.g. when re-requesting output that
+        failed validation) but still stores the fresh response. Callers
+        call _forget_response() for responses that fail validation.
+        """
+        if self.cache is None:
+            return self._request_response(prompt, schema, system)
+        
+        key = self._cache_key(prompt, schema, system)
+        response = self.cache.get_response(key) if self.use_cache and not bypass_cache else None
+        if response is not None:
+            with self._metrics_lock:
+                self.timing_metrics["cache_hits"] += 1
+            return response
+        
+        with self._metrics_lock:
+            self.timing_metrics["cache_misses"] += 1
+        response = self._request_response(prompt, schema, system)
+        self.cache.set_response(key, response)
+        return response
+
+    def _messages(self, prompt: str, system: str = None) -> List[Dict]:
+        """Build chat messages; without the chat layout the system text is inlined."""
+        if not system:
+            return [{"role": "user", "content": prompt}]
+        if self.chat_layout:
+            return [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+        return [{"role": "user", "content": f"{system}\n\n{prompt}"}]
+
+    def _request_payload(self, prompt: str, stream: bool, schema: Dict = None,
+                         system: str = None) -> tuple:
+        """Return the endpoint path and JSON body for a completion request.
+        
+        With a schema, the host is asked for structured output: Ollama's
+        format field or LM Studio's response_format.
+        """
+        if self.host_type == "ollama":
+            payload = {
+                "model": self.model_name,
+                "stream": stream,
+                "options": self.sampling_options,
+                "keep_alive": Config.OLLAMA_KEEP_ALIVE
+            }
+            if schema:
+                payload["format"] = schema
+            if self.chat_layout:
+                payload["messages"] = self._messages(prompt, system)
+                return "/chat", payload
+            payload["prompt"] = self._messages(prompt, system)[0]["content"]
+            return "/generate", payload
+        
+        payload = {
+            "model": self.model_name,
+            "messages": self._messages(prompt, system),
+            "temperature": self.sampling_options["temperature"],
+            "max_tokens": self.sampling_options["max_tokens"],
+            "stream": stream
+        }
+        if schema:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "course_content", "strict": True, "schema": schema}
+            }
+        return "/chat/completions", payload
+
+    def _record_prefill(self, data: Dict):
+        """Accumulate prompt evaluation (prefill) time and tokens reported by Ollama."""
+        if "prompt_eval_duration" not in data:
+            return
+        with self._metrics_lock:
+            self.timing_metrics["prefill_time"] += data["prompt_eval_duration"] / 1e9
+            self.timing_metrics["prefill_tokens"] += data.get("prompt_eval_count", 0)
+
+    def _ollama_text(self, data: Dict) -> str:
+        """Return the generated text from an Ollama chat or generate response."""
+        if "message" in data:
+            return data["message"].get("content", "")
+        return data.get("response", "")
+
+    def _is_backend_failure(self, error: Exception) -> bool:
+        """Connection errors, timeouts and 5xx responses count against the endpoint."""
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code >= 500
+        return True
+
+    def _post(self, path: str, payload: Dict, stream: bool = False):
+        """POST to a backend from the pool, moving on to the next one if it fails.
+        
+        Returns (backend, response); the caller must release the backend.
+        """
+        attempts = len(self.pool.backends)
+        for attempt in range(attempts):
+            backend = self.pool.acquire()
+            try:
+                response = self.session.post(f"{backend.url}{path}", json=payload,
+                                             timeout=get_timeout(), stream=stream)
+                response.raise_for_status()
+                return backend, response
+            except requests.exceptions.RequestException as e:
+                failed = self._is_backend_failure(e)
+                self.pool.release(backend, failed=failed)
+                if not failed or attempt == attempts - 1 or not self.pool.healthy_count():
+                    raise
+                logger.warning(f"Request to {backend.url} failed, re-queueing: {str(e)}")
+
+    def _request_response(self, prompt: str, schema: Dict = None, system: str = None) -> str:
         """Generate a response using the local LLM API."""
+        with self._metrics_lock:
+            self.timing_metrics["api_calls"] += 1
+        
+        path, payload = self._request_payload(prompt, stream=False, schema=schema, system=system)
+        start = time.time()
+        backend, response = self._post(path, payload)
+        try:
+            data = response.json()
+        except ValueError:
+            self.pool.release(backend, failed=True)
+            raise
+        self.pool.release(backend, latency=time.time() - start)
         if self.host_type == "ollama":
-            response = requests.post(
-                f"{self.api_base}/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "max_tokens": 2048
-                    }
-                }
-            )
-            return response.json()["response"]
+            self._record_prefill(data)
+            return self._ollama_text(data)
         else:  # LM Studio
-            response = requests.post(
-                f"{self.api_base}/chat/completions",
-                json={
-                    "model": self.model_name,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.7,
-                    "max_tokens": 2048
+            return data["choices"][0]["message"]["content"]
+
+    def _request_response_stream(self, prompt: str, schema: Dict = None,
+                                 system: str = None) -> Iterator[str]:
+        """Yield response text chunks from Ollama's NDJSON or LM Studio's SSE stream.
+        
+        Closing the generator early closes the connection, which makes the
+        host stop generating.
+        """
+        with self._metrics_lock:
+            self.timing_metrics["api_calls"] += 1
+        
+        path, payload = self._request_payload(prompt, stream=True, schema=schema, system=system)
+        start = time.time()
+        backend, response = self._post(path, payload, stream=True)
+        failed = False
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                if self.host_type == "ollama":
+                    data = json.loads(line)
+                    text = self._ollama_text(data)
+                    if text:
+                        yield text
+                    if data.get("done"):
+                        self._record_prefill(data)
+                        break
+                else:  # LM Studio server-sent events
+                    line = line.decode("utf-8")
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    content = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+        except requests.exceptions.RequestException:
+            failed = True
+            raise
+        finally:
+            response.close()
+            self.pool.release(backend, latency=None if failed else time.time() - start, failed=failed)
+
+    def generate_response_stream(self, prompt: str, schema: Dict = None,
+                                 bypass_cache: bool = False, system: str = None) -> Iterator[str]:
+        """Stream a response, serving it from the response cache when possible.
+        
+        Only responses that were streamed to completion are cached.
+        """
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(prompt, schema, system)
+            response = self.cache.get_response(key) if self.use_cache and not bypass_cache else None
+            if response is not None:
+                with self._metrics_lock:
+                    self.timing_metrics["cache_hits"] += 1
+                yield response
+                return
+            with self._metrics_lock:
+                self.timing_metrics["cache_misses"] += 1
+        
+        chunks = []
+        for chunk in self._request_response_stream(prompt, schema, system):
+            chunks.append(chunk)
+            yield chunk
+        if key is not None:
+            self.cache.set_response(key, "".join(chunks))
+
+    def _record_section_done(self):
+        """Record the time to the first completed section of the current run."""
+        if self._run_start is None:
+            return
+        with self._metrics_lock:
+            if self.timing_metrics["time_to_first_section"] is None:
+                self.timing_metrics["time_to_first_section"] = time.time() - self._run_start
+
+    def _count(self, metric: str, amount: int = 1):
+        with self._metrics_lock:
+            self.timing_metrics[metric] += amount
+
+    def _fallback_section(self, segment: Dict) -> Dict:
+        """Return the placeholder section used when generation fails."""
+        return {
+            "title": segment["title"],
+            "content": segment["text"],
+            "summary": "Summary not available",
+            "quiz": [{
+                "question": "Error generating quiz questions",
+                "options": ["Please try again", "Contact support", "Check the content", "Review the section"],
+                "correct_answer": "Please try again"
+            }]
+        }
+
+    def _build_batch_prompt(self, batch_segments: List[Dict]) -> str:
+        """Return the per-batch part of the prompt; instructions live in BATCH_SYSTEM_PROMPT."""
+        return f"""Generate course content for {len(batch_segments)} sections.
+
+Section contents:
+{json.dumps([{"title": s["title"], "text": s["text"]} for s in batch_segments])}"""
+
+    def _iter_section_objects(self, prompt: str, expected: int, schema: Dict = None,
+                              bypass_cache: bool = False) -> Iterator[Dict]:
+        """Yield up to expected raw section objects from the model's response.
+        
+        In streaming mode objects are yielded as soon as they close, and the
+        stream is aborted once it produces more objects than expected or
+        exceeds LLM_MAX_RESPONSE_CHARS.
+        """
+        if not self.streaming:
+            response = self.generate_response(prompt, schema, bypass_cache, system=BATCH_SYSTEM_PROMPT)
+            try:
+                # Extract JSON from response
+                json_start = response.find('{')
+                json_end = response.rfind('}') + 1
+                section_objects = json.loads(response[json_start:json_end])["sections"]
+            except (ValueError, KeyError, TypeError):
+                return
+            if isinstance(section_objects, list):
+                yield from section_objects[:expected]
+            return
+        
+        parser = SectionStreamParser()
+        received = 0
+        received_chars = 0
+        stream = self.generate_response_stream(prompt, schema, bypass_cache, system=BATCH_SYSTEM_PROMPT)
+        try:
+            for chunk in stream:
+                received_chars += len(chunk)
+                for section_object in parser.feed(chunk):
+                    if received == expected:
+                        # Runaway generation: stop reading and drop the connection
+                        return
+                    received += 1
+                    yield section_object
+                if received_chars > Config.LLM_MAX_RESPONSE_CHARS:
+                    return
+        finally:
+            stream.close()
+
+    def _request_sections(self, batch_segments: List[Dict],
+                          on_section: Callable[[int, Dict], None] = None,
+                          bypass_cache: bool = False) -> List[Dict]:
+        """Request one batch of sections; entries that fail validation are None."""
+        schema = batch_schema(len(batch_segments)) if self.structured_output else None
+        prompt = self._build_batch_prompt(batch_segments)
+        sections = [None] * len(batch_segments)
+        section_objects = self._iter_section_objects(prompt, len(batch_segments), schema, bypass_cache)
+        valid_count = 0
+        output_chars = 0
+        try:
+            for j, section_object in enumerate(section_objects):
+                if not validate_section(section_object):
+                    continue
+                valid_count += 1
+                output_chars += len(json.dumps(section_object))
+                sections[j] = {
+                    "title": batch_segments[j]["title"],
+                    "content": section_object["content"],
+                    "summary": section_object["summary"],
+                    "quiz": section_object["quiz"]
                 }
+                self._record_section_done()
+                if on_section:
+                    on_section(j, sections[j])
+        except requests.exceptions.RequestException as e:
+            # The backend died mid-response: leave the missing sections to be
+            # re-requested on another backend, if any is left
+            if not self.pool.healthy_count():
+                raise
+            logger.warning(f"Batch request failed, re-queueing missing sections: {str(e)}")
+        if valid_count < len(batch_segments):
+            self._forget_response(prompt, schema, BATCH_SYSTEM_PROMPT)
+        self.batch_planner.observe(valid_count, output_chars)
+        return sections
+
+    def _generate_batch(self, batch_segments: List[Dict], base_index: int = 0,
+                        on_section: Callable[[int, Dict], None] = None,
+                        checkpoint: RunCheckpoint = None) -> List[Dict]:
+        """Generate the course sections for one batch of transcription segments.
+        
+        Sections that are missing or fail validation are re-requested on
+        their own, up to LLM_SECTION_RETRIES times, before falling back to
+        placeholders. on_section, if given, is called with
+        (base_index + j, section) for each section as soon as it is final.
+        Valid sections are saved to checkpoint, if given; placeholders are
+        not, so a resumed run generates them again.
+        """
+        def emit_at(indices: List[int]):
+            if not on_section:
+                return None
+            return lambda k, section: on_section(base_index + indices[k], section)
+        
+        # Clean the section text and trim it to what the context window can
+        # hold next to the instructions and the expected output
+        input_budget = (
+            self.context_window
+            - self.prompt_overhead_tokens
+            - self.batch_planner.expected_output_tokens(len(batch_segments))
+        )
+        prompt_segments, tokens_before, tokens_after = self.prompt_preparer.prepare(
+            batch_segments, max(1, input_budget)
+        )
+        with self._metrics_lock:
+            self.timing_metrics["prompt_tokens"].append({
+                "first_section": base_index + 1,
+                "before": tokens_before,
+                "after": tokens_after
+            })
+        
+        indices = list(range(len(batch_segments)))
+        sections = self._request_sections(prompt_segments, emit_at(indices))
+        
+        for _ in range(Config.LLM_SECTION_RETRIES):
+            missing = [j for j, section in enumerate(sections) if section is None]
+            if not missing:
+                break
+            self._count("parse_failures", len(missing))
+            self._count("retries")
+            retried = self._request_sections(
+                [prompt_segments[j] for j in missing], emit_at(missing), bypass_cache=True
             )
-            return response.json()["choices"][0]["message"]["content"]
+            for j, section in zip(missing, retried):
+                sections[j] = section
+        
+        if checkpoint is not None:
+            checkpoint.save_sections({
+                base_index + j: section for j, section in enumerate(sections) if section is not None
+            })
+        
+        missing = [j for j, section in enumerate(sections) if section is None]
+        if missing:
+            self._count("parse_failures", len(missing))
+        for j in missing:
+            # Fallback if no valid section could be generated
+            sections[j] = self._fallback_section(batch_segments[j])
+            if on_section:
+                on_section(base_index + j, sections[j])
+        return sections
 
-    def generate_course_content(self, segments: List[Dict]) -> Dict:
-        """Generate course content from transcription segments."""
+    def _generate_metadata(self, first_segment: Dict, checkpoint: RunCheckpoint = None) -> Dict:
+        """Generate the course title, description, and objectives."""
+        initial_start = time.time()
+        initial_prompt = f"""Based on this content: {first_segment['text'][:500]}"""
+        schema = METADATA_SCHEMA if self.structured_output else None
+        
+        try:
+            for attempt in range(Config.LLM_SECTION_RETRIES + 1):
+                if attempt:
+                    self._count("retries")
+                initial_response = self.generate_response(
+                    initial_prompt, schema, bypass_cache=attempt > 0, system=METADATA_SYSTEM_PROMPT
+                )
+                try:
+                    # Extract JSON from response
+                    json_start = initial_response.find('{')
+                    json_end = initial_response.rfind('}') + 1
+                    initial_content = json.loads(initial_response[json_start:json_end])
+                except ValueError:
+                    initial_content = None
+                if validate_metadata(initial_content):
+                    metadata = {
+                        "title": initial_content["title"],
+                        "description": initial_content["description"],
+                        "objectives": initial_content["objectives"]
+                    }
+                    if checkpoint is not None:
+                        checkpoint.save_metadata(metadata)
+                    return metadata
+                self._forget_response(initial_prompt, schema, METADATA_SYSTEM_PROMPT)
+                self._count("parse_failures")
+        finally:
+            self.timing_metrics["initial_generation"] = time.time() - initial_start
+        
+        # Fallback if no valid metadata could be generated
+        return {
+            "title": "Course Generated from Video",
+            "description": "A comprehensive course generated from video content",
+            "objectives": ["Understand the main concepts", "Apply the knowledge", "Master the skills"]
+        }
+
+    def generate_course_content(self, segments: Iterable[Dict],
+                                on_section: Callable[[Dict], None] = None,
+                                checkpoint: RunCheckpoint = None) -> Dict:
+        """Generate course content from transcription segments.
+        
+        segments may be a list or a generator (e.g. Transcriber.stream_sections);
+        batches are dispatched as soon as they fill up, so generation overlaps
+        with whatever produces the segments. Sections keep transcript order.
+        
+        on_section, if given, receives each finished section in transcript
+        order as soon as it and all sections before it are available. It is
+        called from worker threads.
+        
+        With a checkpoint, metadata and sections saved by an earlier attempt
+        of the same run are reused and only the missing sections are sent
+        to the LLM.
+        """
         start_time = time.time()
+        self._run_start = start_time
         self.timing_metrics["api_calls"] = 0
+        self.timing_metrics["cache_hits"] = 0
+        self.timing_metrics["cache_misses"] = 0
+        self.timing_metrics["time_to_first_section"] = None
+        self.timing_metrics["parse_failures"] = 0
+        self.timing_metrics["retries"] = 0
+        self.timing_metrics["prompt_tokens"] = []
+        self.timing_metrics["prefill_time"] = 0.0
+        self.timing_metrics["prefill_tokens"] = 0
+        # The session is shared, so concurrent runs count each other's connections
+        connections_at_start = connections_opened(self.session)
+        
+        # Reorder sections finished out of order by concurrent batches
+        pending = {}
+        next_index = 0
+        emit_lock = threading.Lock()
+        
+        def emit(index: int, section: Dict):
+            nonlocal next_index
+            with emit_lock:
+                pending[index] = section
+                while next_index in pending:
+                    on_section(pending.pop(next_index))
+                    next_index += 1
         
         course_content = {
             "title": "",
@@ -67,101 +601,57 @@ class LocalLLM:
             "sections": []
         }
 
-        # Generate course title, description, and objectives
-        initial_start = time.time()
-        initial_prompt = f"""Based on this content: {segments[0]['text'][:500]}
-        Generate:
-        1. A concise, engaging title
-        2. A brief description
-        3. 3-5 learning objectives
-        
-        Format the response as JSON:
-        {{
-            "title": "Course Title",
-            "description": "Course Description",
-            "objectives": ["Objective 1", "Objective 2", "Objective 3"]
-        }}"""
-        
-        initial_response = self.generate_response(initial_prompt)
-        self.timing_metrics["api_calls"] += 1
-        self.timing_metrics["initial_generation"] = time.time() - initial_start
+        resumed = checkpoint.load_sections() if checkpoint is not None else {}
+        metadata = checkpoint.load_metadata() if checkpoint is not None else None
+        if resumed or metadata:
+            logger.info(f"Resuming run with {len(resumed)} checkpointed sections")
         
-        try:
-            # Extract JSON from response
-            json_start = initial_response.find('{')
-            json_end = initial_response.rfind('}') + 1
-            initial_content = json.loads(initial_response[json_start:json_end])
-            course_content["title"] = initial_content["title"]
-            course_content["description"] = initial_content["description"]
-            course_content["objectives"] = initial_content["objectives"]
-        except:
-            # Fallback if JSON parsing fails
-            course_content["title"] = "Course Generated from Video"
-            course_content["description"] = "A comprehensive course generated from video content"
-            course_content["objectives"] = ["Understand the main concepts", "Apply the knowledge", "Master the skills"]
-
-        # Process sections in batches
+        segment_iter = iter(segments)
+        first_segment = next(segment_iter, None)
+        if first_segment is None:
+            raise ValueError("No transcription segments to generate course content from")
+
+        # Process sections in batches, keeping up to max_concurrency requests
+        # in flight; futures are collected in submission order
         section_start = time.time()
-        batch_size = 2  # Process 2 sections at a time to manage memory
-        for i in range(0, len(segments), batch_size):
-            batch_segments = segments[i:i + batch_size]
+        sections_processed = 0
+        batch_count = 0
+        batch_futures = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            # The course metadata only needs the first section, so it is
+            # generated alongside the section batches
+            if metadata is None:
+                metadata_future = executor.submit(self._generate_metadata, first_segment, checkpoint)
             
-            batch_prompt = f"""Generate course content for {len(batch_segments)} sections.
-            For each section, provide:
-            1. Structured learning content
-            2. A concise summary
-            3. 3 multiple choice questions
+            callback = emit if on_section else None
+            sections_by_index = {}
+            for batch in self.batch_planner.plan(itertools.chain([first_segment], segment_iter)):
+                # Only request runs of consecutive sections not checkpointed yet
+                runs = []
+                for j, segment in enumerate(batch):
+                    index = sections_processed + j
+                    if index in resumed:
+                        sections_by_index[index] = resumed[index]
+                        if callback:
+                            callback(index, resumed[index])
+                    elif runs and runs[-1][0] + len(runs[-1][1]) == index:
+                        runs[-1][1].append(segment)
+                    else:
+                        runs.append((index, [segment]))
+                for base_index, run in runs:
+                    batch_futures.append((base_index, executor.submit(
+                        self._generate_batch, run, base_index, callback, checkpoint
+                    )))
+                sections_processed += len(batch)
+                batch_count += 1
             
-            Format the response as JSON:
-            {{
-                "sections": [
-                    {{
-                        "content": "Structured content here",
-                        "summary": "Summary here",
-                        "quiz": [
-                            {{
-                                "question": "Question text",
-                                "options": ["Option 1", "Option 2", "Option 3", "Option 4"],
-                                "correct_answer": "Option 1"
-                            }}
-                        ]
-                    }}
-                ]
-            }}
-            
-            Section contents:
-            {json.dumps([{"title": s["title"], "text": s["text"]} for s in batch_segments])}"""
-            
-            batch_response = self.generate_response(batch_prompt)
-            self.timing_metrics["api_calls"] += 1
-            
-            try:
-                # Extract JSON from response
-                json_start = batch_response.find('{')
-                json_end = batch_response.rfind('}') + 1
-                batch_content = json.loads(batch_response[json_start:json_end])
-                for j, section_content in enumerate(batch_content["sections"]):
-                    section = {
-                        "title": batch_segments[j]["title"],
-                        "content": section_content["content"],
-                        "summary": section_content["summary"],
-                        "quiz": section_content["quiz"]
-                    }
-                    course_content["sections"].append(section)
-            except:
-                # Fallback if JSON parsing fails
-                for segment in batch_segments:
-                    section = {
-                        "title": segment["title"],
-                        "content": segment["text"],
-                        "summary": "Summary not available",
-                        "quiz": [{
-                            "question": "Error generating quiz questions",
-                            "options": ["Please try again", "Contact support", "Check the content", "Review the section"],
-                            "correct_answer": "Please try again"
-                        }]
-                    }
-                    course_content["sections"].append(section)
+            course_content.update(metadata if metadata is not None else metadata_future.result())
+            for base_index, future in batch_futures:
+                for j, section in enumerate(future.result()):
+                    sections_by_index[base_index + j] = section
+            course_content["sections"] = [
+                CourseSection.from_dict(sections_by_index[i]) for i in range(sections_processed)
+            ]
         
         self.timing_metrics["section_generation"] = time.time() - section_start
         self.timing_metrics["total_time"] = time.time() - start_time
@@ -172,8 +662,27 @@ class LocalLLM:
             "initial_generation": str(timedelta(seconds=int(self.timing_metrics["initial_generation"]))),
             "section_generation": str(timedelta(seconds=int(self.timing_metrics["section_generation"]))),
             "total_api_calls": self.timing_metrics["api_calls"],
-            "sections_processed": len(segments),
-            "average_time_per_section": str(timedelta(seconds=int(self.timing_metrics["section_generation"] / len(segments))))
+            "http_connections_opened": connections_opened(self.session) - connections_at_start,
+            "sections_processed": sections_processed,
+            "average_time_per_section": str(timedelta(seconds=int(self.timing_metrics["section_generation"] / sections_processed))),
+            "max_concurrency": self.max_concurrency,
+            "cache_hits": self.timing_metrics["cache_hits"],
+            "cache_misses": self.timing_metrics["cache_misses"],
+            "time_to_first_section": str(timedelta(seconds=int(self.timing_metrics["time_to_first_section"] or 0))),
+            "streaming": self.streaming,
+            "parse_failures": self.timing_metrics["parse_failures"],
+            "retries": self.timing_metrics["retries"],
+            "batches": batch_count,
+            "resumed_sections": sum(1 for i in resumed if i < sections_processed),
+            "input_tokens_before": sum(b["before"] for b in self.timing_metrics["prompt_tokens"]),
+            "input_tokens_after": sum(b["after"] for b in self.timing_metrics["prompt_tokens"]),
+            "prefill_time": f"{self.timing_metrics['prefill_time']:.1f}s",
+            "prefill_tokens": self.timing_metrics["prefill_tokens"],
+            "backends": self.pool.stats(),
+            "prompt_tokens_per_batch": sorted(
+                self.timing_metrics["prompt_tokens"], key=lambda b: b["first_section"]
+            ),
+            **self.batch_planner.describe()
         }
 
         return course_content 
\ No newline at end of file
@@ -1,48 +1,122 @@
 import requests
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 import logging
+from .config import Config
+from .http_client import get_probe_session
 
 logger = logging.getLogger(__name__)
 
+# Detection results shared by every ModelDetector in the process, so
+# Streamlit reruns reuse them instead of probing the hosts again
+_cache_lock = threading.Lock()
+_cached_result = None
+_cached_at = 0.0
+_refreshing = False
+
 class ModelDetector:
     def __init__(self):
-        self.ollama_url = "http://localhost:11434/api"
-        self.lmstudio_url = "http://localhost:1234/v1"
+        self.ollama_urls = Config.endpoints_for("ollama")
+        self.lmstudio_urls = Config.endpoints_for("lmstudio")
+        self.ollama_url = self.ollama_urls[0]
+        self.lmstudio_url = self.lmstudio_urls[0]
+        self.session = get_probe_session()
+        self.timeout = Config.MODEL_DETECT_TIMEOUT
 
-    def detect_available_models(self) -> Tuple[bool, bool, List[str], List[str]]:
+    def probe(self, host_type: str, url: str) -> Tuple[bool, List[str]]:
         """
-        Detect available models from both Ollama and LM Studio.
-        Returns: (ollama_available, lmstudio_available, ollama_models, lmstudio_models)
+        Check a single Ollama or LM Studio endpoint.
+        Returns: (available, models)
         """
-        ollama_available = False
-        lmstudio_available = False
-        ollama_models = []
-        lmstudio_models = []
-
-        # Check Ollama
+        name = "Ollama" if host_type == "ollama" else "LM Studio"
         try:
-            response = requests.get(f"{self.ollama_url}/tags")
-            if response.status_code == 200:
-                ollama_available = True
-                models_data = response.json()
-                ollama_models = [model['name'] for model in models_data.get('models', [])]
-                logger.info(f"Found Ollama models: {ollama_models}")
+            if host_type == "ollama":
+                response = self.session.get(f"{url}/tags", timeout=self.timeout)
+            else:
+                response = self.session.get(f"{url}/models", timeout=self.timeout)
+            if response.status_code != 200:
+                return False, []
+            models_data = response.json()
+            if host_type == "ollama":
+                models = [model['name'] for model in models_data.get('models', [])]
+            else:
+                models = [model['id'] for model in models_data.get('data', [])]
+            logger.info(f"Found {name} models at {url}: {models}")
+            return True, models
         except requests.exceptions.RequestException as e:
-            logger.warning(f"Ollama not available: {str(e)}")
+            logger.warning(f"{name} not available at {url}: {str(e)}")
+            return False, []
 
-        # Check LM Studio
-        try:
-            response = requests.get(f"{self.lmstudio_url}/models")
-            if response.status_code == 200:
-                lmstudio_available = True
-                models_data = response.json()
-                lmstudio_models = [model['id'] for model in models_data.get('data', [])]
-                logger.info(f"Found LM Studio models: {lmstudio_models}")
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"LM Studio not available: {str(e)}")
+    def probe_all(self, host_type: str, urls: List[str]) -> List[Tuple[bool, List[str]]]:
+        """Probe several endpoints of one host type concurrently."""
+        if len(urls) == 1:
+            return [self.probe(host_type, urls[0])]
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            return list(executor.map(lambda url: self.probe(host_type, url), urls))
+
+    def _detect(self) -> Tuple[bool, bool, List[str], List[str]]:
+        """Probe every configured endpoint of both hosts in parallel."""
+        targets = [("ollama", url) for url in self.ollama_urls] + \
+                  [("lmstudio", url) for url in self.lmstudio_urls]
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            results = list(executor.map(lambda target: self.probe(*target), targets))
+        
+        detected = {"ollama": (False, []), "lmstudio": (False, [])}
+        for (host_type, _), (url_available, url_models) in zip(targets, results):
+            available, models = detected[host_type]
+            models = models + [m for m in url_models if m not in models]
+            detected[host_type] = (available or url_available, models)
+        return detected["ollama"][0], detected["lmstudio"][0], detected["ollama"][1], detected["lmstudio"][1]
 
-        return ollama_available, lmstudio_available, ollama_models, lmstudio_models
+    def refresh(self) -> Tuple[bool, bool, List[str], List[str]]:
+        """Detect models now and update the shared cache."""
+        global _cached_result, _cached_at
+        result = self._detect()
+        with _cache_lock:
+            _cached_result = result
+            _cached_at = time.time()
+        return result
+
+    def _refresh_in_background(self):
+        """Start a background refresh unless one is already running."""
+        global _refreshing
+        with _cache_lock:
+            if _refreshing:
+                return
+            _refreshing = True
+        
+        def run():
+            global _refreshing
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Background model detection failed: {str(e)}")
+            finally:
+                with _cache_lock:
+                    _refreshing = False
+        
+        threading.Thread(target=run, name="model-detector-refresh", daemon=True).start()
+
+    def detect_available_models(self, max_age: float = None) -> Tuple[bool, bool, List[str], List[str]]:
+        """
+        Detect available models from both Ollama and LM Studio.
+        Returns: (ollama_available, lmstudio_available, ollama_models, lmstudio_models)
+        
+        Results are cached for MODEL_DETECT_TTL seconds. Once stale, the
+        cached result is still returned immediately while a background
+        thread refreshes it; only the very first call probes synchronously.
+        """
+        ttl = Config.MODEL_DETECT_TTL if max_age is None else max_age
+        with _cache_lock:
+            result, cached_at = _cached_result, _cached_at
+        if result is None:
+            return self.refresh()
+        if time.time() - cached_at > ttl:
+            self._refresh_in_background()
+        return result
 
     def get_default_model(self, host_type: str, available_models: List[str]) -> str:
         """Get the default model based on availability and host type."""
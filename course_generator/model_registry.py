@@ -0,0 +1,116 @@
+import gc
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+import logging
+import whisper
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+def _model_nbytes(model) -> int:
+    """Return the resident size of a model's parameters and buffers in bytes."""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+class WhisperModelRegistry:
+    """Thread-safe, process-wide registry that loads each Whisper model size once.
+
+    Models are kept in LRU order and the least recently used ones are
+    unloaded when the total resident size exceeds the memory budget. The
+    most recently requested model is never unloaded, even if it alone is
+    over budget.
+
+    The same model instance is shared by every caller. Whisper installs
+    kv-cache hooks on the model for each decode, so concurrent transcribe
+    calls on one instance corrupt each other; callers hold model_lock()
+    around them.
+    """
+
+    def __init__(self, memory_budget_mb: int = None):
+        budget = memory_budget_mb if memory_budget_mb is not None else Config.WHISPER_MEMORY_BUDGET_MB
+        self.memory_budget = budget * 1024 * 1024
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._use_locks = {}
+
+    def get(self, model_size: str):
+        """Return the loaded model for model_size, loading it on first use."""
+        with self._lock:
+            entry = self._models.get(model_size)
+            if entry is not None:
+                self._models.move_to_end(model_size)
+                return entry["model"]
+            load_lock = self._load_locks.setdefault(model_size, threading.Lock())
+
+        # Load outside the registry lock so other sizes stay available, while
+        # concurrent requests for the same size wait for a single load
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(model_size)
+                if entry is not None:
+                    self._models.move_to_end(model_size)
+                    return entry["model"]
+
+            start = time.time()
+            model = whisper.load_model(model_size)
+            entry = {
+                "model": model,
+                "load_time": time.time() - start,
+                "nbytes": _model_nbytes(model)
+            }
+            logger.info(
+                f"Loaded Whisper '{model_size}' in {entry['load_time']:.1f}s "
+                f"({entry['nbytes'] / 1024 / 1024:.0f} MB)"
+            )
+
+            with self._lock:
+                self._models[model_size] = entry
+                self._evict()
+            return model
+
+    def model_lock(self, model_size: str) -> threading.Lock:
+        """Return the lock serializing transcriptions on the shared model_size model."""
+        with self._lock:
+            return self._use_locks.setdefault(model_size, threading.Lock())
+
+    def _evict(self):
+        """Unload least recently used models until within the memory budget."""
+        evicted = False
+        while len(self._models) > 1 and self.resident_bytes() > self.memory_budget:
+            model_size, _ = self._models.popitem(last=False)
+            logger.info(f"Unloading Whisper '{model_size}' to stay within memory budget")
+            evicted = True
+        if evicted:
+            gc.collect()
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except ImportError:
+                pass
+
+    def resident_bytes(self) -> int:
+        return sum(entry["nbytes"] for entry in self._models.values())
+
+    def stats(self) -> Dict[str, Dict]:
+        """Return load time and resident size for each loaded model."""
+        with self._lock:
+            return {
+                model_size: {"load_time": entry["load_time"], "nbytes": entry["nbytes"]}
+                for model_size, entry in self._models.items()
+            }
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_model_registry() -> WhisperModelRegistry:
+    """Return the process-wide Whisper model registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = WhisperModelRegistry()
+    return _registry
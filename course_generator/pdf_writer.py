@@ -0,0 +1,168 @@
+import zlib
+from typing import BinaryIO, Dict, List
+
+# Advance widths (1/1000 em) of the printable ASCII characters, from the
+# Adobe Font Metrics of the standard Helvetica fonts
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584
+]
+_HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584
+]
+
+def _width_table(ascii_widths: List[int]) -> List[int]:
+    """Expand ASCII widths to all 256 WinAnsi codes (others get an average width)."""
+    table = [556] * 256
+    table[32:127] = ascii_widths
+    table[0x95] = 350  # bullet
+    return table
+
+class SimplePdfWriter:
+    """Minimal PDF writer for flowing text, with no external dependencies.
+
+    Text is set in the standard Helvetica fonts, which every PDF viewer
+    provides, so no font is embedded. Text is encoded as WinAnsi (cp1252);
+    characters outside it are replaced with '?'. Each page is written to
+    the file as soon as it is full, so memory use does not depend on the
+    length of the document. Call close() to write the page tree and the
+    cross-reference table.
+    """
+
+    PAGE_WIDTH = 612
+    PAGE_HEIGHT = 792
+    MARGIN = 72
+    # style: (resource name, base font, width table)
+    FONTS = {
+        "regular": ("F1", "Helvetica", _width_table(_HELVETICA_WIDTHS)),
+        "bold": ("F2", "Helvetica-Bold", _width_table(_HELVETICA_BOLD_WIDTHS)),
+        "italic": ("F3", "Helvetica-Oblique", _width_table(_HELVETICA_WIDTHS)),
+    }
+    # Object numbers reserved for objects written by close()
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    FIRST_FONT_ID = 3
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.position = 0
+        self.offsets: Dict[int, int] = {}
+        self.page_ids: List[int] = []
+        self.next_id = self.FIRST_FONT_ID + len(self.FONTS)
+        self._content: List[bytes] = []
+        self.y = None
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data: bytes):
+        self.f.write(data)
+        self.position += len(data)
+
+    def _object(self, obj_id: int, body: bytes):
+        self.offsets[obj_id] = self.position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, body))
+
+    def _allocate(self) -> int:
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def _wrap(self, text: bytes, widths: List[int], size: float, max_width: float) -> List[bytes]:
+        """Break encoded text into lines that fit max_width points."""
+        lines = []
+        scale = size / 1000.0
+        space = widths[32] * scale
+        width_of = widths.__getitem__
+        for paragraph in text.split(b"\n"):
+            line, line_width = [], 0.0
+            for word in paragraph.split(b" "):
+                word_width = sum(map(width_of, word)) * scale
+                if line and line_width + space + word_width > max_width:
+                    lines.append(b" ".join(line))
+                    line, line_width = [], 0.0
+                # Words wider than a whole line are broken anywhere
+                while word_width > max_width and len(word) > 1:
+                    cut, cut_width = 0, 0.0
+                    while cut < len(word) and cut_width + widths[word[cut]] * scale <= max_width:
+                        cut_width += widths[word[cut]] * scale
+                        cut += 1
+                    cut = max(cut, 1)
+                    lines.append(word[:cut])
+                    word = word[cut:]
+                    word_width = sum(map(width_of, word)) * scale
+                line_width += (space if line else 0.0) + word_width
+                line.append(word)
+            lines.append(b" ".join(line))
+        return lines
+
+    def _start_page(self):
+        self._content = []
+        self.y = self.PAGE_HEIGHT - self.MARGIN
+
+    def _finish_page(self):
+        stream = zlib.compress(b"\n".join(self._content))
+        content_id, page_id = self._allocate(), self._allocate()
+        self._object(content_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        fonts = b" ".join(
+            b"/%s %d 0 R" % (name.encode("ascii"), self.FIRST_FONT_ID + i)
+            for i, (name, _, _) in enumerate(self.FONTS.values())
+        )
+        self._object(page_id, (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << %s >> >> >>"
+        ) % (self.PAGES_ID, self.PAGE_WIDTH, self.PAGE_HEIGHT, content_id, fonts))
+        self.page_ids.append(page_id)
+        self.y = None
+
+    def paragraph(self, text: str, style: str = "regular", size: float = 11,
+                  indent: float = 0, space_before: float = 0, bullet: bool = False):
+        """Add a paragraph of text, wrapped to the page width and split across pages."""
+        name, _, widths = self.FONTS[style]
+        leading = size * 1.3
+        encoded = str(text).encode("cp1252", errors="replace")
+        lines = self._wrap(encoded, widths, size, self.PAGE_WIDTH - 2 * self.MARGIN - indent)
+        if self.y is None:
+            self._start_page()
+        elif self.y < self.PAGE_HEIGHT - self.MARGIN:
+            self.y -= space_before
+        x = self.MARGIN + indent
+        for i, line in enumerate(lines):
+            if self.y - leading < self.MARGIN:
+                self._finish_page()
+                self._start_page()
+            self.y -= leading
+            if bullet and i == 0:
+                self._content.append(b"BT /F1 %g Tf %.2f %.2f Td (\x95) Tj ET" % (size, x - 12, self.y))
+            escaped = line.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"")
+            self._content.append(b"BT /%s %g Tf %.2f %.2f Td (%s) Tj ET" % (
+                name.encode("ascii"), size, x, self.y, escaped
+            ))
+
+    def close(self):
+        """Write the last page, the fonts, the page tree and the trailer."""
+        if self.y is not None or not self.page_ids:
+            if self.y is None:
+                self._start_page()
+            self._finish_page()
+        for i, (_, base_font, _) in enumerate(self.FONTS.values()):
+            self._object(self.FIRST_FONT_ID + i, (
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+            ) % base_font.encode("ascii"))
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(self.PAGES_ID, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+        self._object(self.CATALOG_ID, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES_ID)
+
+        xref_position = self.position
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id)
+        self._write(b"".join(b"%010d 00000 n \n" % self.offsets[obj_id] for obj_id in range(1, self.next_id)))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            self.next_id, self.CATALOG_ID, xref_position
+        ))
@@ -0,0 +1,292 @@
+import os
+import time
+import logging
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from .config import Config
+from .checkpoint import RunCheckpoint
+from .video_processor import VideoProcessor
+from .transcriber import Transcriber
+from .course_generator import CourseGenerator
+from .exporter import CourseExporter
+
+logger = logging.getLogger(__name__)
+
+EXPORT_EXTENSIONS = {"PDF": "pdf", "DOCX": "docx"}
+
+class PipelineRun:
+    """One video moving through the pipeline stages.
+
+    The stages are load() (reuse checkpoints or a cached transcription),
+    extract() (download and extract audio), transcribe(), generate() and
+    export(). They are separate methods so callers can hold resources
+    around some of them (run_pipeline) or overlap them across several
+    videos (the command line batch mode). Call finish() when done.
+
+    params holds the options chosen in the UI (see JobQueue.submit), plus
+    optionally the source's fingerprint as source_key if already computed.
+    progress(percent, message) is called as stages complete. A shared
+    course_generator may be passed to reuse one LLM session across runs.
+    With a run_id, stage outputs are checkpointed under RUNS_DIR/<run_id>
+    and running the same run_id again resumes after the last completed
+    stage, regenerating only the sections that are missing.
+
+    Export formats are written section by section while the course is
+    generated (see StreamingExport), so export() only has to add the title
+    and objectives and assemble the final files.
+    """
+
+    def __init__(self, params: Dict, transcriber: Transcriber,
+                 course_generator: CourseGenerator = None,
+                 progress: Optional[Callable[[int, str], None]] = None,
+                 output_dir: str = None, run_id: str = None):
+        self.params = params
+        self.transcriber = transcriber
+        self.course_generator = course_generator or CourseGenerator(
+            model_name=params["llm_model"],
+            host_type=params["host_type"],
+            max_concurrency=params.get("llm_concurrency"),
+            use_cache=params.get("use_llm_cache"),
+            streaming=params.get("stream_llm")
+        )
+        self.progress = progress or (lambda percent, message: None)
+        self.output_dir = output_dir or Config.OUTPUT_DIR
+        self.checkpoint = RunCheckpoint(run_id) if run_id and Config.CHECKPOINTS_ENABLED else None
+        self.video_processor = VideoProcessor()
+        self.exporter = CourseExporter()
+        self.source = params["source"]
+        self.is_url = params["input_type"] == "youtube"
+        self.streaming = bool(params.get("streaming_pipeline"))
+
+        self.source_key = None
+        self.audio_path = None
+        self.transcription = None
+        self.segments = None
+        self.course_content = None
+        self.export_stream = None
+        self.files = {}
+        self.exports = {}
+        self.start_time = time.time()
+        self.timings = {"video": 0.0, "transcribe": 0.0, "export": 0.0}
+
+    @property
+    def needs_transcription(self) -> bool:
+        """Whether Whisper still has to run for this video (valid after load())."""
+        return self.segments is None and self.transcription is None
+
+    def load(self):
+        """Reuse checkpointed segments or a cached transcription, if any."""
+        self.progress(5, "Processing video...")
+        self.segments = self.checkpoint.load_segments() if self.checkpoint is not None else None
+        if self.segments is not None:
+            self.progress(25, "Resuming from checkpointed transcription...")
+            return
+
+        if self.checkpoint is not None:
+            # Sections generated from an unfinished transcription may not
+            # line up with a fresh one
+            self.checkpoint.reset_generation()
+
+        # Skip video processing if this source was already transcribed with
+        # the selected Whisper model
+        video_start = time.time()
+        self.source_key = self.params.get("source_key") or self.video_processor.get_source_key(self.source)
+        self.transcription = self.transcriber.get_cached_transcription(self.source_key)
+        self.timings["video"] += time.time() - video_start
+        if self.transcription is not None:
+            self.progress(25, "Using cached transcription...")
+
+    def extract(self):
+        """Download and/or extract the audio track, reusing a checkpointed copy."""
+        if not self.needs_transcription:
+            return
+        video_start = time.time()
+        self.audio_path = self.checkpoint.load_audio() if self.checkpoint is not None else None
+        if self.audio_path is None:
+            if self.is_url:
+                _, self.audio_path = self.video_processor.process_video(
+                    self.source, in_memory=Config.AUDIO_IN_MEMORY
+                )
+            elif Config.AUDIO_IN_MEMORY:
+                self.audio_path = self.video_processor.extract_audio_pcm(self.source)
+            else:
+                self.audio_path = self.video_processor.extract_audio(self.source)
+            if self.checkpoint is not None:
+                self.audio_path = self.checkpoint.save_audio(self.audio_path)
+        self.timings["video"] += time.time() - video_start
+
+    def transcribe(self):
+        """Run Whisper on the extracted audio.
+
+        In streaming mode generation runs here too, fed with sections as
+        soon as Whisper has produced them.
+        """
+        if not self.needs_transcription:
+            return
+        transcribe_start = time.time()
+        if self.streaming:
+            self.progress(25, "Transcribing audio and generating course content...")
+            stream_timing = {}
+
+            def timed_sections():
+                streamed = []
+                for section in self.transcriber.stream_sections(self.audio_path, source_key=self.source_key):
+                    streamed.append(section)
+                    yield section
+                stream_timing["transcribe"] = time.time() - transcribe_start
+                self.segments = streamed
+                if self.checkpoint is not None:
+                    self.checkpoint.save_segments(streamed)
+
+            self.course_content = self.course_generator.generate_course_content(
+                timed_sections(), on_section=self._open_export_stream(), checkpoint=self.checkpoint
+            )
+            self.timings["transcribe"] = stream_timing.get("transcribe", time.time() - transcribe_start)
+        else:
+            self.progress(25, "Transcribing audio...")
+            self.transcription = self.transcriber.transcribe(self.audio_path, source_key=self.source_key)
+            self.timings["transcribe"] = time.time() - transcribe_start
+
+    def generate(self):
+        """Generate the course content from the transcription segments."""
+        if self.course_content is not None:
+            return
+        if self.segments is None:
+            self.segments = self.transcriber.segment_transcription(self.transcription)
+            # The sections now hold what is still needed of the transcript
+            self.transcription = None
+            if self.checkpoint is not None:
+                self.checkpoint.save_segments(self.segments)
+        self.progress(50, "Generating course content...")
+        self.course_content = self.course_generator.generate_course_content(
+            self.segments, on_section=self._open_export_stream(), checkpoint=self.checkpoint
+        )
+
+    def _open_export_stream(self) -> Callable[[Dict], None]:
+        """Start streaming the selected export formats and return the section callback."""
+        if self.export_stream is not None:
+            self.export_stream.abort()
+        self.export_stream = self.exporter.open_stream(self.params["export_formats"], self.output_dir)
+        return self.export_stream.add_section
+
+    def export(self):
+        """Write the selected export formats to the output directory."""
+        self.progress(75, "Exporting course...")
+        export_start = time.time()
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_title = self.exporter._sanitize_filename(self.course_content["title"])
+        paths = {
+            fmt: os.path.join(self.output_dir, f"{safe_title}.{EXPORT_EXTENSIONS[fmt]}")
+            for fmt in self.params["export_formats"]
+        }
+        stream, self.export_stream = self.export_stream, None
+        if stream is not None and stream.sections_written != len(self.course_content["sections"]):
+            logger.warning("Streamed export is incomplete, exporting the finished course instead")
+            stream.abort()
+            stream = None
+        self.exports = self.exporter.export(self.course_content, paths, stream=stream)
+        self.files.update(paths)
+        self.timings["export"] = time.time() - export_start
+        self.progress(100, "Course generation completed!")
+
+    def result(self) -> Dict:
+        """Return a JSON-serialisable summary of the finished run."""
+        return {
+            "title": self.course_content["title"],
+            "generation_metrics": self.course_content["generation_metrics"],
+            "files": self.files,
+            "timings": {"total": time.time() - self.start_time, **self.timings},
+            "exports": self.exports,
+            "extraction": self.video_processor.extraction_metrics,
+            "upload": self.params.get("upload_metrics") or self.video_processor.upload_metrics,
+            "whisper_info": self.transcriber.model_info(),
+            "model_size": self.transcriber.model_size
+        }
+
+    def finish(self, succeeded: bool):
+        """Remove temporary files.
+
+        Checkpoints and the uploaded source are only needed to resume, so
+        they are kept when the run fails.
+        """
+        self.video_processor.cleanup()
+        if self.export_stream is not None:
+            self.export_stream.abort()
+        if not succeeded:
+            return
+        if self.checkpoint is not None and not Config.KEEP_CHECKPOINTS:
+            self.checkpoint.clear()
+        if self.params.get("delete_source") and not self.is_url and os.path.exists(self.source):
+            os.remove(self.source)
+
+def run_pipeline(params: Dict, transcriber: Transcriber,
+                 progress: Optional[Callable[[int, str], None]] = None,
+                 transcription_slot=None, output_dir: str = None,
+                 run_id: str = None) -> Dict:
+    """Run video processing, transcription, generation and export for one job.
+
+    transcription_slot is an optional semaphore held while audio is
+    extracted and transcribed, to bound concurrent CPU-heavy Whisper work.
+    See PipelineRun for the other arguments.
+    """
+    run = PipelineRun(params, transcriber, progress=progress, output_dir=output_dir, run_id=run_id)
+    succeeded = False
+    try:
+        run.load()
+        if run.needs_transcription:
+            run.progress(5, "Waiting for a transcription slot...")
+            with transcription_slot or nullcontext():
+                run.extract()
+                run.transcribe()
+        run.generate()
+        run.export()
+        succeeded = True
+        return run.result()
+    finally:
+        run.finish(succeeded)
+
+def format_metrics(result: Dict) -> str:
+    """Render a pipeline result's metrics as the markdown list shown in the UI."""
+    metrics = result["generation_metrics"]
+    timings = result["timings"]
+    extraction = result["extraction"]
+    upload = result["upload"]
+    whisper_info = result["whisper_info"]
+    exports = ", ".join(
+        f"{fmt} {export['time']:.1f}s ({'cached' if export.get('cached') else export['backend']})"
+        for fmt, export in result.get("exports", {}).items()
+    )
+    whisper_summary = (
+        f"loaded in {whisper_info['load_time']:.1f}s, "
+        f"{whisper_info['nbytes'] / 1024 / 1024:.0f} MB resident"
+        if whisper_info else "not loaded (cached transcription)"
+    )
+    if whisper_info.get("workers"):
+        whisper_summary += f" across {whisper_info['workers']} worker processes"
+    return f"""
+    - **Total Processing Time**: {str(timedelta(seconds=int(timings['total'])))}
+    - **Video Processing**: {str(timedelta(seconds=int(timings['video'])))}
+      - Upload: {upload['bytes'] / 1024 / 1024:.1f} MB in {upload['time']:.1f}s, peak RSS +{upload['peak_rss_increase'] / 1024 / 1024:.1f} MB
+      - Audio Extraction: {extraction['engine'] or 'skipped'}, {extraction['time']:.1f}s, {extraction['bytes_written'] / 1024 / 1024:.1f} MB written
+    - **Transcription**: {str(timedelta(seconds=int(timings['transcribe'])))}
+      - Whisper Model ({result['model_size']}): {whisper_summary}
+    - **Content Generation**: {metrics['total_time']}
+      - Initial Generation: {metrics['initial_generation']}
+      - Section Generation: {metrics['section_generation']}
+    - **Export**: {str(timedelta(seconds=int(timings['export'])))}
+      - Formats: {exports or 'none'}
+      - Time to First Section: {metrics['time_to_first_section']}
+    - **Total API Calls**: {metrics['total_api_calls']}
+      - HTTP Connections Opened: {metrics.get('http_connections_opened', 'n/a')}
+      - Backends: {", ".join(f"{b['url']} ({b['requests']} requests, {b['failures']} failed)" for b in metrics['backends'])}
+      - Parse Failures / Retries: {metrics['parse_failures']} / {metrics['retries']}
+    - **Response Cache**: {metrics['cache_hits']} hits / {metrics['cache_misses']} misses
+    - **Prompt Prefill (Ollama)**: {metrics['prefill_tokens']} tokens in {metrics['prefill_time']}
+    - **Input Tokens**: {metrics['input_tokens_before']} before / {metrics['input_tokens_after']} after prompt preparation
+    - **Sections Processed**: {metrics['sections_processed']} in {metrics['batches']} batches ({metrics['planner']} planner)
+      - Resumed from Checkpoint: {metrics['resumed_sections']}
+    - **Average Time per Section**: {metrics['average_time_per_section']}
+    - **Concurrent LLM Requests**: {metrics['max_concurrency']}
+    """
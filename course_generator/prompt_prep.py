@@ -0,0 +1,102 @@
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+from .batching import estimate_tokens
+
+# Spoken fillers Whisper transcribes verbatim, with any trailing comma. Only
+# sounds that are never words; case-sensitive so acronyms like "UM" survive
+FILLER_PATTERN = re.compile(r"\b(?:[Uu]h+|[Uu]m+|[Ee]rm+|[Hh]mm+|[Mm]m+)\b,?\s*")
+# "you know" / "I mean" only when set off by commas as an aside
+ASIDE_PATTERN = re.compile(r",\s*(?:you know|I mean)\s*(?=,)", re.IGNORECASE)
+# An alphabetic word or short phrase (up to four words) repeated back to back
+REPEAT_PATTERN = re.compile(r"\b([A-Za-z]+(?:\s+[A-Za-z]+){0,3})(?:[\s,]+\1\b)+", re.IGNORECASE)
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+WORD_PATTERN = re.compile(r"[a-z']+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its of on or so "
+    "that the this to was we were what when which will with you your our they".split()
+)
+
+def _collapse_repeat(match: re.Match) -> str:
+    phrase = match.group(1)
+    # "had had", "that that" are usually grammatical, not stutters
+    if " " not in phrase and (len(phrase) <= 3 or phrase.lower() in STOPWORDS):
+        return match.group(0)
+    return phrase
+
+def clean_text(text: str) -> str:
+    """Strip fillers, collapse stuttered repeats and drop repeated sentences."""
+    text = FILLER_PATTERN.sub("", text)
+    text = ASIDE_PATTERN.sub("", text)
+    text = REPEAT_PATTERN.sub(_collapse_repeat, text)
+    
+    seen = set()
+    sentences = []
+    for sentence in SENTENCE_PATTERN.split(text):
+        sentence = sentence.strip()
+        key = sentence.lower()
+        if not sentence or key in seen:
+            continue
+        seen.add(key)
+        sentences.append(sentence)
+    return re.sub(r"\s{2,}", " ", " ".join(sentences)).strip()
+
+def trim_to_budget(text: str, max_tokens: int) -> str:
+    """Extractively keep the most informative sentences that fit in max_tokens.
+    
+    Sentences are scored by the average corpus frequency of their content
+    words and kept in their original order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    
+    sentences = [s for s in SENTENCE_PATTERN.split(text) if s.strip()]
+    words_per_sentence = [
+        [w for w in WORD_PATTERN.findall(s.lower()) if w not in STOPWORDS]
+        for s in sentences
+    ]
+    frequency = Counter(w for words in words_per_sentence for w in words)
+    scores = [
+        sum(frequency[w] for w in words) / (len(words) or 1)
+        for words in words_per_sentence
+    ]
+    
+    kept = set()
+    used = 0
+    for i in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        cost = estimate_tokens(sentences[i])
+        if used + cost <= max_tokens:
+            kept.add(i)
+            used += cost
+    if not kept:
+        # A single overlong sentence: hard-cut it to the budget
+        return text[:int(max_tokens * len(text) / estimate_tokens(text))]
+    return " ".join(sentences[i] for i in sorted(kept))
+
+class PromptPreparer:
+    """Cleans section text and fits a batch into a model's input token budget."""
+
+    def __init__(self, clean: bool = True):
+        self.clean = clean
+
+    def prepare(self, batch_segments: List[Dict], max_input_tokens: int) -> Tuple[List[Dict], int, int]:
+        """Return copies of the sections with prepared text, and input tokens before/after.
+        
+        Cleaning and trimming both lose information, so the text is left
+        untouched when the batch already fits the budget.
+        """
+        texts = [s["text"] for s in batch_segments]
+        tokens_before = total = sum(estimate_tokens(t) for t in texts)
+        if total > max_input_tokens and self.clean:
+            texts = [clean_text(t) for t in texts]
+            total = sum(estimate_tokens(t) for t in texts)
+        if total > max_input_tokens:
+            # Share the budget in proportion to each section's length
+            texts = [
+                trim_to_budget(t, max(1, int(max_input_tokens * estimate_tokens(t) / total)))
+                for t in texts
+            ]
+        
+        prepared = [dict(segment, text=text) for segment, text in zip(batch_segments, texts)]
+        tokens_after = sum(estimate_tokens(t) for t in texts)
+        return prepared, tokens_before, tokens_after
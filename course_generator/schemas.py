@@ -0,0 +1,80 @@
+from typing import Dict
+
+# JSON schemas sent to the LLM host for structured (JSON-mode) output, and
+# matching validators applied to what comes back.
+
+QUIZ_QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}, "minItems": 2},
+        "correct_answer": {"type": "string"}
+    },
+    "required": ["question", "options", "correct_answer"]
+}
+
+SECTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "content": {"type": "string"},
+        "summary": {"type": "string"},
+        "quiz": {"type": "array", "items": QUIZ_QUESTION_SCHEMA, "minItems": 1}
+    },
+    "required": ["content", "summary", "quiz"]
+}
+
+METADATA_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "objectives": {"type": "array", "items": {"type": "string"}, "minItems": 1}
+    },
+    "required": ["title", "description", "objectives"]
+}
+
+def batch_schema(section_count: int) -> Dict:
+    """Return the schema for a response holding exactly section_count sections."""
+    return {
+        "type": "object",
+        "properties": {
+            "sections": {
+                "type": "array",
+                "items": SECTION_SCHEMA,
+                "minItems": section_count,
+                "maxItems": section_count
+            }
+        },
+        "required": ["sections"]
+    }
+
+def _is_string_list(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(v, str) for v in value)
+
+def validate_section(section) -> bool:
+    """Check that a generated section has non-empty content, summary and quiz."""
+    if not isinstance(section, dict):
+        return False
+    if not (isinstance(section.get("content"), str) and section["content"].strip()):
+        return False
+    if not isinstance(section.get("summary"), str):
+        return False
+    quiz = section.get("quiz")
+    if not isinstance(quiz, list) or not quiz:
+        return False
+    return all(
+        isinstance(q, dict)
+        and isinstance(q.get("question"), str)
+        and _is_string_list(q.get("options"))
+        and isinstance(q.get("correct_answer"), str)
+        for q in quiz
+    )
+
+def validate_metadata(metadata) -> bool:
+    """Check that generated course metadata has a title, description and objectives."""
+    return (
+        isinstance(metadata, dict)
+        and isinstance(metadata.get("title"), str) and bool(metadata["title"].strip())
+        and isinstance(metadata.get("description"), str)
+        and _is_string_list(metadata.get("objectives"))
+    )
@@ -0,0 +1,212 @@
+import re
+import zlib
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Sequence, Union
+import logging
+
+import numpy as np
+
+from .config import Config
+from .transcript import Section, Transcript
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z']{3,}")
+
+class Segmenter:
+    """Group Whisper segments into sections with vectorised boundary detection.
+
+    A section is closed when a segment starts more than max_gap seconds after
+    the previous one ended, or when adding it would make the section longer
+    than max_duration seconds. With semantic scoring enabled, a section is
+    also closed where the vocabulary of the segments before and after a
+    point overlaps less than semantic_threshold (cosine similarity of hashed
+    bag-of-words over semantic_window segments each side), provided the
+    section is already min_duration seconds long.
+
+    Produces the same sections as IncrementalSegmenter for the same
+    thresholds, but works on a Transcript's time arrays and takes each
+    section's text as one slice of its text buffer instead of growing it
+    segment by segment.
+    """
+
+    def __init__(self, max_gap: float = None, max_duration: float = None,
+                 semantic: bool = None, semantic_window: int = None,
+                 semantic_threshold: float = None, min_duration: float = None,
+                 hash_dim: int = 256):
+        self.max_gap = Config.SEGMENT_MAX_GAP_SECONDS if max_gap is None else max_gap
+        self.max_duration = Config.SEGMENT_MAX_SECONDS if max_duration is None else max_duration
+        self.semantic = Config.SEGMENT_SEMANTIC if semantic is None else semantic
+        self.semantic_window = max(1, semantic_window or Config.SEGMENT_SEMANTIC_WINDOW)
+        self.semantic_threshold = (
+            Config.SEGMENT_SEMANTIC_THRESHOLD if semantic_threshold is None else semantic_threshold
+        )
+        self.min_duration = Config.SEGMENT_MIN_SECONDS if min_duration is None else min_duration
+        self.hash_dim = hash_dim
+
+    def semantic_scores(self, texts: Sequence[str]) -> np.ndarray:
+        """Return the lexical similarity across each segment boundary.
+
+        scores[i] compares the words of the semantic_window segments before
+        segment i with those of segment i and the ones after it. Boundaries
+        without a full window on both sides score 1.0 (never split).
+        """
+        n = len(texts)
+        scores = np.ones(n, dtype=np.float32)
+        k = self.semantic_window
+        if n < 2 * k:
+            return scores
+
+        # Hashed bag-of-words per segment, then prefix sums so every window
+        # sum is a difference of two rows
+        rows, cols = [], []
+        for i, text in enumerate(texts):
+            words = _WORD_RE.findall(text.lower())
+            rows.extend([i] * len(words))
+            # crc32 rather than hash(): str hashes are randomised per process
+            cols.extend(zlib.crc32(word.encode('utf-8')) % self.hash_dim for word in words)
+        counts = np.bincount(
+            np.asarray(rows, dtype=np.int64) * self.hash_dim + np.asarray(cols, dtype=np.int64),
+            minlength=n * self.hash_dim
+        ).reshape(n, self.hash_dim).astype(np.float32)
+        prefix = np.zeros((n + 1, self.hash_dim), dtype=np.float32)
+        np.cumsum(counts, axis=0, out=prefix[1:])
+
+        i = np.arange(k, n - k + 1)
+        before = prefix[i] - prefix[i - k]
+        after = prefix[i + k] - prefix[i]
+        norms = np.linalg.norm(before, axis=1) * np.linalg.norm(after, axis=1)
+        dots = np.einsum('ij,ij->i', before, after)
+        scores[i] = np.where(norms > 0, dots / np.maximum(norms, 1e-9), 1.0)
+        return scores
+
+    def boundaries(self, starts: np.ndarray, ends: np.ndarray,
+                   texts: Sequence[str] = None) -> List[int]:
+        """Return the indices of the segments that start a new section.
+
+        The pause rule only depends on neighbouring segments, so it is
+        computed for all segments at once and cuts the transcript into runs.
+        A run whose latest end is within max_duration of its start is one
+        section; that is checked for all runs at once too. Only runs that
+        are too long (or contain a topic shift) are split further, one
+        section at a time, with a binary search over the running maximum
+        of the end times to find the segment that overruns each section.
+        """
+        n = len(starts)
+        if n == 0:
+            return []
+
+        # Before the first boundary the open section starts and ends at 0
+        previous_end = np.empty(n, dtype=np.float64)
+        previous_end[0] = 0.0
+        previous_end[1:] = ends[:-1]
+        hard_breaks = np.flatnonzero(starts - previous_end > self.max_gap)
+
+        # The run before the first break is the open initial section, which
+        # starts at 0 rather than at its first segment
+        opens_with_break = bool(hard_breaks.size) and hard_breaks[0] == 0
+        run_starts = hard_breaks if opens_with_break else np.concatenate(([0], hard_breaks)).astype(np.int64)
+        run_start_times = starts[run_starts]
+        if not opens_with_break:
+            run_start_times[0] = 0.0
+        # Subtraction is monotonic, so the latest end decides for the run
+        needs_split = np.maximum.reduceat(ends, run_starts) - run_start_times > self.max_duration
+
+        soft_breaks = []
+        if self.semantic and texts is not None:
+            scores = self.semantic_scores(texts)
+            candidates = np.flatnonzero(scores < self.semantic_threshold)
+            if candidates.size:
+                soft_breaks = candidates.tolist()
+                needs_split[np.searchsorted(run_starts, candidates, side='right') - 1] = True
+
+        result = hard_breaks.tolist()
+        split_runs = np.flatnonzero(needs_split)
+        if split_runs.size:
+            # Per-section lookups use plain lists and bisect, which are much
+            # cheaper than NumPy calls on scalars
+            running_max_end = np.maximum.accumulate(ends).tolist()
+            start_times = starts.tolist()
+            end_times = ends.tolist()
+            run_ends = np.append(run_starts[1:], n)
+            for run in split_runs.tolist():
+                # The initial section has no segment yet, so its first
+                # segment can overrun it too
+                first = int(run_starts[run]) + (0 if run == 0 and not opens_with_break else 1)
+                result.extend(self._split_run(
+                    first, int(run_ends[run]), float(run_start_times[run]),
+                    start_times, end_times, running_max_end, soft_breaks
+                ))
+            result.sort()
+        return result
+
+    def _split_run(self, pos: int, end: int, section_start: float, start_times: List[float],
+                   end_times: List[float], running_max_end: List[float], soft_breaks: List[int]) -> List[int]:
+        """Return the length and topic boundaries in [pos, end) of one run of segments."""
+        max_duration = self.max_duration
+        result = []
+        while pos < end:
+            # Every segment before lo certainly fits; from there apply the
+            # exact per-segment test so results match IncrementalSegmenter
+            d = end
+            lo = max(pos, bisect_right(running_max_end, section_start + max_duration - 1e-6))
+            for j in range(lo, end):
+                if end_times[j] - section_start > max_duration:
+                    d = j
+                    break
+
+            # Topic shifts only split sections that are long enough already
+            if soft_breaks:
+                for k in range(bisect_left(soft_breaks, pos), len(soft_breaks)):
+                    candidate = soft_breaks[k]
+                    if candidate >= d:
+                        break
+                    if start_times[candidate] - section_start >= self.min_duration:
+                        d = candidate
+                        break
+
+            if d >= end:
+                break
+            result.append(d)
+            section_start = start_times[d]
+            pos = d + 1
+        return result
+
+    def segment(self, segments: Union[Transcript, List[Dict]]) -> List[Section]:
+        """Segment a transcript (or a list of Whisper segment dicts) into sections."""
+        transcript = segments if isinstance(segments, Transcript) else Transcript.from_segments(segments)
+        texts = None
+        if self.semantic:
+            texts = [transcript.segment_text(i) for i in range(len(transcript))]
+        return self.build_sections(transcript, self.boundaries(transcript.starts, transcript.ends, texts))
+
+    def build_sections(self, transcript: Transcript, boundaries: List[int]) -> List[Section]:
+        """Build the section records for the given boundaries.
+
+        Sections read their text from the transcript buffer when needed, so
+        no per-section string is built here. Keeps the historical shape of
+        the output: the section before the first boundary starts at 0 with
+        an empty title and a leading space in its text, and sections whose
+        text is empty are dropped without using up a section number.
+        """
+        n = len(transcript)
+        if n == 0:
+            return []
+        edges = [0, *boundaries, n]
+        first_starts = transcript.starts[edges[:-1]].tolist()
+        last_ends = transcript.ends[np.asarray(edges[1:]) - 1].tolist()
+        text_starts = transcript.text_starts[edges[:-1]].tolist()
+        text_ends = transcript.text_ends[np.asarray(edges[1:]) - 1].tolist()
+
+        sections = []
+        for k in range(len(edges) - 1):
+            a, b = edges[k], edges[k + 1]
+            if a == b:
+                continue
+            if k == 0:
+                sections.append(Section(0, last_ends[k], "", transcript, a, b, leading_space=True))
+            elif text_ends[k] > text_starts[k]:
+                sections.append(Section(
+                    first_starts[k], last_ends[k], f"Section {len(sections) + 1}", transcript, a, b
+                ))
+        return sections
@@ -1,46 +1,290 @@
-import whisper
 import os
-from typing import Dict, List
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import whisper
 from .config import Config
+from .cache import TranscriptionCache
+from .model_registry import _model_nbytes, get_model_registry
+from .segmentation import Segmenter
+from .transcript import Section, Transcript
 
-class Transcriber:
-    def __init__(self, model_size: str = None):
-        """Initialize the transcriber with specified model size."""
-        self.model = whisper.load_model(model_size or Config.DEFAULT_WHISPER_MODEL)
+def split_on_silence(audio: np.ndarray, sample_rate: int, chunk_seconds: float,
+                     search_seconds: float = 10.0, frame_ms: int = 30) -> List[Tuple[int, int]]:
+    """Split PCM samples into roughly chunk_seconds long pieces at quiet points.
+    
+    Frame RMS energy is computed in one vectorized pass; each cut is placed
+    at the quietest frame within search_seconds of the nominal chunk
+    boundary so that words are not split between chunks. Returns a list of
+    (start_sample, end_sample) pairs covering the whole signal.
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(audio) // frame_len
+    chunk_frames = max(1, int(chunk_seconds * 1000 / frame_ms))
+    if n_frames <= chunk_frames:
+        return [(0, len(audio))]
+    
+    frames = audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+    energy = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+    search_frames = max(1, int(search_seconds * 1000 / frame_ms))
+    
+    cuts = [0]
+    while n_frames - cuts[-1] > chunk_frames:
+        target = cuts[-1] + chunk_frames
+        low = max(cuts[-1] + 1, target - search_frames)
+        high = min(n_frames, target + search_frames)
+        cuts.append(low + int(np.argmin(energy[low:high])))
+    
+    bounds = [cut * frame_len for cut in cuts] + [len(audio)]
+    return list(zip(bounds[:-1], bounds[1:]))
 
-    def transcribe(self, audio_path: str) -> Dict:
-        """Transcribe audio file and return the transcription result."""
-        result = self.model.transcribe(audio_path)
-        return result
+def _load_audio(audio: Union[str, np.ndarray]) -> np.ndarray:
+    """Return 16 kHz mono float32 samples for a file path or an already loaded array."""
+    if isinstance(audio, np.ndarray):
+        return audio
+    return whisper.load_audio(audio)
 
-    def segment_transcription(self, transcription: Dict) -> List[Dict]:
-        """Segment the transcription into logical sections."""
-        segments = []
-        current_section = {
+_worker_model = None
+_worker_info = None
+
+def _init_worker(model_size: str, num_threads: int):
+    """Load a private Whisper model in each transcription worker process."""
+    global _worker_model, _worker_info
+    import torch
+    torch.set_num_threads(num_threads)
+    start = time.time()
+    _worker_model = whisper.load_model(model_size)
+    _worker_info = {
+        "pid": os.getpid(),
+        "load_time": time.time() - start,
+        "nbytes": _model_nbytes(_worker_model)
+    }
+
+def _transcribe_chunk(chunk: np.ndarray, offset_seconds: float) -> Tuple[Dict, List[Dict]]:
+    """Transcribe one audio chunk in a worker and shift it onto the global timeline.
+    
+    The worker's model load info is returned with the segments, since
+    worker models never go through the parent's model registry.
+    """
+    result = _worker_model.transcribe(chunk)
+    return _worker_info, [
+        {
+            "start": segment["start"] + offset_seconds,
+            "end": segment["end"] + offset_seconds,
+            "text": segment["text"]
+        }
+        for segment in result["segments"]
+    ]
+
+class IncrementalSegmenter:
+    """Group Whisper segments into sections as they arrive.
+    
+    A section is closed when a segment starts more than max_gap seconds
+    (SEGMENT_MAX_GAP_SECONDS, default 2) after the previous one ended, or
+    when adding it would make the section longer than max_duration seconds
+    (SEGMENT_MAX_SECONDS, default 30). Segmenter applies the same rules to
+    a complete transcription.
+    """
+
+    def __init__(self, max_gap: float = None, max_duration: float = None):
+        self.max_gap = Config.SEGMENT_MAX_GAP_SECONDS if max_gap is None else max_gap
+        self.max_duration = Config.SEGMENT_MAX_SECONDS if max_duration is None else max_duration
+        self.sections_emitted = 0
+        self.current_section = {
             "start": 0,
             "end": 0,
             "text": "",
             "title": ""
         }
+
+    def feed(self, segment: Dict) -> Optional[Dict]:
+        """Add a segment, returning the section it closed, if any."""
+        current_section = self.current_section
+        # If there's a significant pause or the section would get too
+        # long, create a new section
+        if (segment["start"] - current_section["end"] > self.max_gap or
+            segment["end"] - current_section["start"] > self.max_duration):
+            closed = current_section if current_section["text"] else None
+            if closed:
+                self.sections_emitted += 1
+            self.current_section = {
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"],
+                "title": f"Section {self.sections_emitted + 1}"
+            }
+            return closed
+        
+        current_section["end"] = segment["end"]
+        current_section["text"] += " " + segment["text"]
+        return None
+
+    def flush(self) -> Optional[Dict]:
+        """Return the final, still open section, if it has any text."""
+        if not self.current_section["text"]:
+            return None
+        self.sections_emitted += 1
+        closed = self.current_section
+        self.current_section = {"start": closed["end"], "end": closed["end"], "text": "", "title": ""}
+        return closed
+
+class Transcriber:
+    def __init__(self, model_size: str = None, workers: int = None):
+        """Initialize the transcriber with specified model size.
+        
+        With workers > 1, transcribe() splits the audio at silences and
+        transcribes the chunks in a pool of worker processes.
+        """
+        self.model_size = model_size or Config.DEFAULT_WHISPER_MODEL
+        self.workers = max(1, workers or Config.TRANSCRIBE_WORKERS)
+        self.registry = get_model_registry()
+        self._pool = None
+        # Model load info reported by each worker process, keyed by PID
+        self._worker_models: Dict[int, Dict] = {}
+        self._worker_models_lock = threading.Lock()
+        self.cache = TranscriptionCache(
+            os.path.join(Config.CACHE_DIR, "transcriptions.sqlite"),
+            max_bytes=Config.TRANSCRIPTION_CACHE_MAX_MB * 1024 * 1024,
+            max_age=Config.TRANSCRIPTION_CACHE_MAX_AGE_DAYS * 24 * 3600
+        ) if Config.TRANSCRIPTION_CACHE_ENABLED else None
+
+    @property
+    def model(self):
+        """The Whisper model, loaded once per process through the shared registry."""
+        return self.registry.get(self.model_size)
+
+    def model_info(self) -> Dict:
+        """Return load time and resident size of this transcriber's model, if loaded.
         
-        for segment in transcription["segments"]:
-            # If there's a significant pause (more than 2 seconds) or
-            # the segment is longer than 30 seconds, create a new section
-            if (segment["start"] - current_section["end"] > 2 or
-                segment["end"] - current_section["start"] > 30):
-                if current_section["text"]:
-                    segments.append(current_section)
-                current_section = {
-                    "start": segment["start"],
-                    "end": segment["end"],
-                    "text": segment["text"],
-                    "title": f"Section {len(segments) + 1}"
+        Once worker processes have transcribed, this describes their models:
+        the slowest load, the total resident size and the worker count.
+        """
+        with self._worker_models_lock:
+            workers = list(self._worker_models.values())
+        if workers:
+            return {
+                "load_time": max(info["load_time"] for info in workers),
+                "nbytes": sum(info["nbytes"] for info in workers),
+                "workers": len(workers)
+            }
+        return self.registry.stats().get(self.model_size, {})
+
+    def get_cached_transcription(self, source_key: str) -> Optional[Transcript]:
+        """Return the cached transcription for a source fingerprint, or None."""
+        if self.cache is None or not source_key:
+            return None
+        return self.cache.get_transcription(TranscriptionCache.make_key(source_key, self.model_size))
+
+    def transcribe(self, audio_path: Union[str, np.ndarray], source_key: str = None) -> Transcript:
+        """Transcribe audio file and return the transcription as a compact Transcript.
+        
+        Whisper's raw result (tokens, probabilities, per-segment dicts) is
+        dropped as soon as it has been converted.
+        When source_key is given, the result is stored in the transcription
+        cache so the same source and model size can skip Whisper next time.
+        """
+        if self.workers > 1:
+            transcript = self.transcribe_parallel(audio_path)
+        else:
+            with self.registry.model_lock(self.model_size):
+                transcript = Transcript.from_whisper(self.model.transcribe(audio_path))
+        if self.cache is not None and source_key:
+            self.cache.set_transcription(TranscriptionCache.make_key(source_key, self.model_size), transcript)
+        return transcript
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Return the worker pool, starting it on first use."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # spawn avoids forking a process with live torch thread pools
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_size, Config.TRANSCRIBE_THREADS_PER_WORKER)
+            )
+        return self._pool
+
+    def transcribe_parallel(self, audio_path: Union[str, np.ndarray]) -> Transcript:
+        """Transcribe silence-delimited chunks of the audio in parallel worker processes."""
+        audio = _load_audio(audio_path)
+        sample_rate = whisper.audio.SAMPLE_RATE
+        chunks = split_on_silence(audio, sample_rate, Config.TRANSCRIBE_CHUNK_SECONDS)
+        
+        pool = self._get_pool()
+        futures = [
+            pool.submit(_transcribe_chunk, audio[start:end], start / sample_rate)
+            for start, end in chunks
+        ]
+        segments = []
+        for future in futures:
+            worker_info, chunk_segments = future.result()
+            with self._worker_models_lock:
+                self._worker_models[worker_info["pid"]] = worker_info
+            segments.extend(chunk_segments)
+        return Transcript.from_segments(segments)
+
+    def close(self):
+        """Shut down the transcription worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            with self._worker_models_lock:
+                self._worker_models.clear()
+
+    def iter_segments(self, audio_path: Union[str, np.ndarray], source_key: str = None,
+                      chunk_seconds: float = None) -> Iterator[Dict]:
+        """Transcribe audio chunk by chunk, yielding Whisper segments as they finish.
+        
+        Chunks are cut at quiet points near each chunk_seconds boundary.
+        
+        Segment timestamps are shifted onto the global timeline. Once the
+        whole file has been transcribed the result is stored in the
+        transcription cache, as with transcribe().
+        """
+        chunk_seconds = chunk_seconds or Config.STREAM_CHUNK_SECONDS
+        audio = _load_audio(audio_path)
+        
+        collected = []
+        previous_text = None
+        for start, end in split_on_silence(audio, whisper.audio.SAMPLE_RATE, chunk_seconds):
+            chunk = audio[start:end]
+            offset_seconds = start / whisper.audio.SAMPLE_RATE
+            # Condition each chunk on the previous one's text for continuity
+            # Held per chunk, so other streams on the same model interleave
+            with self.registry.model_lock(self.model_size):
+                result = self.model.transcribe(chunk, initial_prompt=previous_text)
+            for segment in result["segments"]:
+                segment = {
+                    "start": segment["start"] + offset_seconds,
+                    "end": segment["end"] + offset_seconds,
+                    "text": segment["text"]
                 }
-            else:
-                current_section["end"] = segment["end"]
-                current_section["text"] += " " + segment["text"]
-        
-        if current_section["text"]:
-            segments.append(current_section)
-            
-        return segments 
\ No newline at end of file
+                collected.append(segment)
+                yield segment
+            previous_text = result["text"][-200:] or None
+        
+        if self.cache is not None and source_key:
+            self.cache.set_transcription(
+                TranscriptionCache.make_key(source_key, self.model_size),
+                Transcript.from_segments(collected)
+            )
+
+    def stream_sections(self, audio_path: Union[str, np.ndarray], source_key: str = None) -> Iterator[Dict]:
+        """Yield finished sections while transcription of later audio continues."""
+        segmenter = IncrementalSegmenter()
+        for segment in self.iter_segments(audio_path, source_key=source_key):
+            section = segmenter.feed(segment)
+            if section:
+                yield section
+        section = segmenter.flush()
+        if section:
+            yield section
+
+    def segment_transcription(self, transcription: Union[Transcript, Dict]) -> List[Section]:
+        """Segment the transcription into logical sections."""
+        if not isinstance(transcription, Transcript):
+            transcription = Transcript.from_whisper(transcription)
+        return Segmenter().segment(transcription) 
\ No newline at end of file
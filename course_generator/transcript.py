@@ -0,0 +1,158 @@
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+class Transcript:
+    """Compact, column-oriented transcription.
+
+    Keeps only what the pipeline uses from Whisper's output: segment start
+    and end times and per-segment confidences as NumPy arrays, and all the
+    segment texts in one string buffer. Segment texts are separated by a
+    single space in the buffer, so the text of any run of consecutive
+    segments is one slice of it. Whisper's tokens, probabilities and
+    per-segment dicts can be dropped as soon as the Transcript is built.
+    """
+
+    __slots__ = ("starts", "ends", "avg_logprobs", "no_speech_probs",
+                 "text", "text_starts", "text_ends", "language")
+
+    def __init__(self, starts: Sequence[float], ends: Sequence[float], texts: Sequence[str],
+                 avg_logprobs: Sequence[float] = None, no_speech_probs: Sequence[float] = None,
+                 language: Optional[str] = None):
+        n = len(texts)
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.avg_logprobs = (
+            np.asarray(avg_logprobs, dtype=np.float32) if avg_logprobs is not None
+            else np.full(n, np.nan, dtype=np.float32)
+        )
+        self.no_speech_probs = (
+            np.asarray(no_speech_probs, dtype=np.float32) if no_speech_probs is not None
+            else np.full(n, np.nan, dtype=np.float32)
+        )
+        self.text = " ".join(texts)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+        self.text_starts = np.zeros(n, dtype=np.int64)
+        np.cumsum(lengths[:-1] + 1, out=self.text_starts[1:])
+        self.text_ends = self.text_starts + lengths
+        self.language = sys.intern(language) if language else None
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict], language: Optional[str] = None) -> "Transcript":
+        """Build a transcript from segment dicts with start, end and text."""
+        segments = list(segments)
+        return cls(
+            [s["start"] for s in segments],
+            [s["end"] for s in segments],
+            [s["text"] for s in segments],
+            avg_logprobs=[s.get("avg_logprob", np.nan) for s in segments],
+            no_speech_probs=[s.get("no_speech_prob", np.nan) for s in segments],
+            language=language
+        )
+
+    @classmethod
+    def from_whisper(cls, result: Dict) -> "Transcript":
+        """Build a transcript from a Whisper transcribe() result."""
+        return cls.from_segments(result["segments"], language=result.get("language"))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def segment_text(self, i: int) -> str:
+        """Return the text of segment i."""
+        return self.text[self.text_starts[i]:self.text_ends[i]]
+
+    def span_text(self, first: int, last: int) -> str:
+        """Return the texts of segments first..last-1 joined by spaces."""
+        if first >= last:
+            return ""
+        return self.text[self.text_starts[first]:self.text_ends[last - 1]]
+
+    def segments(self) -> Iterator[Dict]:
+        """Yield each segment as a start/end/text dict."""
+        for i, (start, end) in enumerate(zip(self.starts.tolist(), self.ends.tolist())):
+            yield {"start": start, "end": end, "text": self.segment_text(i)}
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the transcript's arrays and text buffer."""
+        return (
+            self.starts.nbytes + self.ends.nbytes + self.avg_logprobs.nbytes
+            + self.no_speech_probs.nbytes + self.text_starts.nbytes + self.text_ends.nbytes
+            + sys.getsizeof(self.text)
+        )
+
+class _Record:
+    """Base for __slots__ records that also behave as read-only mappings.
+
+    Existing code reads sections with section["title"], section.get(...)
+    and dict(section, ...), so records support those alongside attribute
+    access.
+    """
+
+    __slots__ = ()
+    _fields: tuple = ()
+
+    def __getitem__(self, key: str):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._fields
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def keys(self) -> tuple:
+        return self._fields
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in self._fields}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Section(_Record):
+    """A section of the transcript whose text is read lazily from the buffer."""
+
+    __slots__ = ("start", "end", "title", "_transcript", "_first", "_last", "_leading_space")
+    _fields = ("start", "end", "text", "title")
+
+    def __init__(self, start: float, end: float, title: str, transcript: Transcript,
+                 first: int, last: int, leading_space: bool = False):
+        self.start = start
+        self.end = end
+        self.title = title
+        self._transcript = transcript
+        self._first = first
+        self._last = last
+        self._leading_space = leading_space
+
+    @property
+    def text(self) -> str:
+        text = self._transcript.span_text(self._first, self._last)
+        return " " + text if self._leading_space else text
+
+class CourseSection(_Record):
+    """A generated course section: title, content, summary and quiz."""
+
+    __slots__ = ("title", "content", "summary", "quiz")
+    _fields = ("title", "content", "summary", "quiz")
+
+    def __init__(self, title: str, content: str, summary: str, quiz: List[Dict]):
+        self.title = title
+        self.content = content
+        self.summary = summary
+        self.quiz = quiz
+
+    @classmethod
+    def from_dict(cls, section: Dict) -> "CourseSection":
+        return cls(section["title"], section["content"], section["summary"], section["quiz"])
+
+def json_default(obj):
+    """json.dump default= hook that serialises section records as dicts."""
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -1,13 +1,29 @@
 import os
 import yt_dlp
 from moviepy.editor import VideoFileClip
+import numpy as np
 import tempfile
 from .config import Config
 import random
 import logging
+import hashlib
+import re
+import shutil
+import subprocess
+import time
+from typing import BinaryIO, Union
+
+# Whisper consumes 16 kHz mono audio, so extract straight to that format
+AUDIO_SAMPLE_RATE = 16000
 
 class VideoProcessor:
-    def __init__(self):
+    def __init__(self, audio_only: bool = None, ydl_factory=None):
+        """Initialize the processor.
+        
+        audio_only downloads only the best audio track of YouTube videos,
+        converted straight to 16 kHz mono WAV (default YOUTUBE_AUDIO_ONLY).
+        ydl_factory replaces yt_dlp.YoutubeDL, e.g. with a mocked extractor.
+        """
         self.temp_dir = os.path.join(Config.TEMP_DIR, tempfile.mkdtemp())
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -15,12 +31,24 @@ class VideoProcessor:
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         ]
         self.logger = logging.getLogger(__name__)
+        self.audio_only = Config.YOUTUBE_AUDIO_ONLY if audio_only is None else audio_only
+        self.youtube_format = 'bestaudio/best' if self.audio_only else 'best'
+        self.ydl_factory = ydl_factory or yt_dlp.YoutubeDL
+        self.downloaded_files = []
+        self.extraction_metrics = {"engine": None, "time": 0.0, "bytes_written": 0}
+        self.upload_metrics = {"bytes": 0, "time": 0.0, "peak_rss_increase": 0}
 
     def download_youtube_video(self, url: str) -> str:
-        """Download a YouTube video and return the local file path."""
+        """Download a YouTube video and return the local file path.
+        
+        Downloads go to this processor's temp_dir, so jobs for the same video
+        never share (or clean up) each other's files. In audio-only mode the
+        returned path is a 16 kHz mono WAV.
+        """
         ydl_opts = {
-            'format': 'best',  # Simple format selection
-            'outtmpl': os.path.join(self.temp_dir, '%(title)s.%(ext)s'),
+            'format': self.youtube_format,  # Simple format selection
+            'outtmpl': os.path.join(self.temp_dir, '%(id)s.%(format_id)s.%(ext)s'),
+            'continuedl': True,
             'nocheckcertificate': True,
             'ignoreerrors': True,
             'no_warnings': True,
@@ -32,62 +60,234 @@ class VideoProcessor:
                 'Sec-Fetch-Mode': 'navigate',
             }
         }
+        if self.audio_only:
+            ydl_opts['postprocessors'] = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'wav'
+            }]
+            ydl_opts['postprocessor_args'] = {
+                'extractaudio': ['-ac', '1', '-ar', str(AUDIO_SAMPLE_RATE)]
+            }
+            ffmpeg_path = self._find_ffmpeg()
+            if ffmpeg_path:
+                ydl_opts['ffmpeg_location'] = ffmpeg_path
         
         try:
             self.logger.info(f"Attempting to download video from: {url}")
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            start = time.time()
+            with self.ydl_factory(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=True)
                 if not info:
                     raise Exception("Failed to extract video information")
                 
                 self.logger.info(f"Video title: {info.get('title', 'Unknown')}")
-                self.logger.info("Starting download...")
                 
-                # Get the actual downloaded file path
-                downloaded_files = [f for f in os.listdir(self.temp_dir) if f.endswith(('.mp4', '.webm', '.mkv'))]
-                if not downloaded_files:
+                # Take the path yt-dlp reports for this video (after any
+                # post-processing) rather than scanning the directory
+                requested = info.get('requested_downloads') or [{}]
+                video_path = requested[0].get('filepath') or info.get('filepath')
+                if not video_path:
                     raise Exception("No video file was downloaded")
-                
-                video_path = os.path.join(self.temp_dir, downloaded_files[0])
                 if not os.path.exists(video_path):
                     raise Exception(f"Downloaded file not found at {video_path}")
                 
+                self.downloaded_files.append(video_path)
+                if self.audio_only:
+                    self.extraction_metrics = {
+                        "engine": "yt-dlp (audio-only)",
+                        "time": time.time() - start,
+                        "bytes_written": os.path.getsize(video_path)
+                    }
                 self.logger.info(f"Successfully downloaded video to: {video_path}")
                 return video_path
         except Exception as e:
             self.logger.error(f"Error downloading YouTube video: {str(e)}")
             raise Exception(f"Error downloading YouTube video: {str(e)}")
 
-    def extract_audio(self, video_path: str) -> str:
-        """Extract audio from video file."""
+    def _current_rss(self) -> int:
+        """Return the current resident set size of this process in bytes (0 if unknown)."""
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+    def save_upload(self, upload: BinaryIO, filename: str = 'upload.mp4', directory: str = None) -> str:
+        """Copy an uploaded file object into the temp dir in fixed-size chunks.
+        
+        Avoids materialising the whole upload as one bytes object. The file
+        lives in temp_dir, so cleanup() removes it with everything else,
+        unless another directory is given, in which case the caller owns it.
+        Peak RSS growth during the copy is recorded in upload_metrics.
+        """
+        directory = directory or self.temp_dir
+        os.makedirs(directory, exist_ok=True)
+        video_path = os.path.join(directory, os.path.basename(filename) or 'upload.mp4')
+        chunk_size = Config.UPLOAD_CHUNK_MB * 1024 * 1024
+        start = time.time()
+        baseline_rss = peak_rss = self._current_rss()
+        written = 0
+        
+        upload.seek(0)
+        with open(video_path, 'wb') as f:
+            for chunk in iter(lambda: upload.read(chunk_size), b''):
+                f.write(chunk)
+                written += len(chunk)
+                peak_rss = max(peak_rss, self._current_rss())
+        
+        self.upload_metrics = {
+            "bytes": written,
+            "time": time.time() - start,
+            "peak_rss_increase": max(0, peak_rss - baseline_rss)
+        }
+        return video_path
+
+    def get_source_key(self, source: str) -> str:
+        """Return a stable fingerprint of a video source for transcription caching.
+        
+        YouTube URLs are keyed on the video ID and download format so a cache
+        hit needs no network access; local files are keyed on a content hash.
+        """
+        if source.startswith(('http://', 'https://')):
+            match = re.search(r'(?:v=|youtu\.be/|shorts/|embed/|live/)([A-Za-z0-9_-]{11})', source)
+            video_id = match.group(1) if match else hashlib.sha256(source.encode('utf-8')).hexdigest()
+            return f"youtube:{video_id}:{self.youtube_format}"
+        
+        digest = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return f"file:{digest.hexdigest()}"
+
+    def _find_ffmpeg(self) -> str:
+        """Find an ffmpeg executable, falling back to the one bundled for moviepy."""
+        ffmpeg_path = shutil.which('ffmpeg')
+        if ffmpeg_path:
+            return ffmpeg_path
+        try:
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except Exception:
+            return None
+
+    def _ffmpeg_command(self, video_path: str, output: str, output_format: str) -> list:
+        """Build an ffmpeg command that demuxes only the first audio stream to 16 kHz mono."""
+        return [
+            self._find_ffmpeg(), '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+            '-i', video_path,
+            '-map', '0:a:0', '-vn',
+            '-ac', '1', '-ar', str(AUDIO_SAMPLE_RATE),
+            '-c:a', 'pcm_s16le', '-f', output_format,
+            output
+        ]
+
+    def _extract_audio_moviepy(self, video_path: str, audio_path: str):
+        """Extract audio by decoding the clip through moviepy."""
+        video = VideoFileClip(video_path)
         try:
-            video = VideoFileClip(video_path)
-            audio_path = os.path.join(self.temp_dir, 'audio.wav')
-            video.audio.write_audiofile(audio_path, codec='pcm_s16le')
+            video.audio.write_audiofile(audio_path, fps=AUDIO_SAMPLE_RATE, nbytes=2,
+                                        codec='pcm_s16le', ffmpeg_params=['-ac', '1'],
+                                        logger=None)
+        finally:
             video.close()
-            return audio_path
+
+    def extract_audio(self, video_path: str) -> str:
+        """Extract audio from video file as a 16 kHz mono WAV.
+        
+        Uses ffmpeg to demux only the audio stream when AUDIO_EXTRACTION_ENGINE
+        is "ffmpeg" (the default), falling back to moviepy if that fails.
+        """
+        audio_path = os.path.join(self.temp_dir, 'audio.wav')
+        start = time.time()
+        engine = Config.AUDIO_EXTRACTION_ENGINE
+        try:
+            if engine == 'ffmpeg' and self._find_ffmpeg():
+                try:
+                    subprocess.run(self._ffmpeg_command(video_path, audio_path, 'wav'),
+                                   check=True, capture_output=True)
+                except subprocess.CalledProcessError as e:
+                    self.logger.warning(
+                        f"ffmpeg audio extraction failed, falling back to moviepy: "
+                        f"{e.stderr.decode(errors='replace').strip()}"
+                    )
+                    engine = 'moviepy'
+            else:
+                engine = 'moviepy'
+            
+            if engine == 'moviepy':
+                self._extract_audio_moviepy(video_path, audio_path)
         except Exception as e:
             raise Exception(f"Error extracting audio: {str(e)}")
+        
+        self.extraction_metrics = {
+            "engine": engine,
+            "time": time.time() - start,
+            "bytes_written": os.path.getsize(audio_path)
+        }
+        return audio_path
 
-    def process_video(self, source: str) -> tuple[str, str]:
-        """Process video from either YouTube URL or local file."""
+    def extract_audio_pcm(self, video_path: str) -> np.ndarray:
+        """Extract audio straight into memory as float32 16 kHz mono samples.
+        
+        ffmpeg pipes raw PCM to stdout, so no temporary WAV is written. The
+        returned array can be passed to Transcriber in place of a path.
+        Falls back to extract_audio when ffmpeg is unavailable.
+        """
+        if not self._find_ffmpeg():
+            return self.extract_audio(video_path)
+        
+        start = time.time()
+        try:
+            result = subprocess.run(self._ffmpeg_command(video_path, '-', 's16le'),
+                                    check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            self.logger.warning(
+                f"ffmpeg PCM extraction failed, falling back to a WAV file: "
+                f"{e.stderr.decode(errors='replace').strip()}"
+            )
+            return self.extract_audio(video_path)
+        
+        audio = np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+        self.extraction_metrics = {
+            "engine": "ffmpeg-pipe",
+            "time": time.time() - start,
+            "bytes_written": 0
+        }
+        return audio
+
+    def process_video(self, source: str, in_memory: bool = False) -> tuple[str, Union[str, np.ndarray]]:
+        """Process video from either YouTube URL or local file.
+        
+        With in_memory=True the audio is returned as a sample array instead
+        of a WAV path (see extract_audio_pcm).
+        """
         try:
             if source.startswith(('http://', 'https://')):
                 video_path = self.download_youtube_video(source)
+                if self.audio_only:
+                    # Already 16 kHz mono WAV, no extraction needed
+                    audio = self.extract_audio_pcm(video_path) if in_memory else video_path
+                    return video_path, audio
             else:
                 if not os.path.exists(source):
                     raise FileNotFoundError(f"Video file not found at {source}")
                 video_path = source
             
-            audio_path = self.extract_audio(video_path)
-            return video_path, audio_path
+            if in_memory:
+                audio = self.extract_audio_pcm(video_path)
+            else:
+                audio = self.extract_audio(video_path)
+            return video_path, audio
         except Exception as e:
             raise Exception(f"Error processing video: {str(e)}")
 
     def cleanup(self):
-        """Clean up temporary files."""
-        import shutil
+        """Clean up temporary files and completed downloads."""
         try:
+            for path in self.downloaded_files:
+                if os.path.exists(path):
+                    os.remove(path)
+            self.downloaded_files = []
             shutil.rmtree(self.temp_dir)
         except Exception as e:
             print(f"Warning: Error during cleanup: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""Compare how TokenBudgetPlanner and FixedBatchPlanner pack sections into requests.
+
+    python -m tests.benchmarks.bench_batching
+
+Run from the repository root. For synthetic courses with short, long and
+mixed sections, reports the number of LLM requests, sections per request,
+how full the context window is, and how many requests overflow it (prompt
+plus expected output larger than the window), which is where the model
+truncates input or output.
+"""
+import random
+from typing import Dict, List
+
+from course_generator.batching import BatchPlanner, FixedBatchPlanner, TokenBudgetPlanner, estimate_tokens
+from course_generator.config import Config
+from course_generator.local_llm import BATCH_SYSTEM_PROMPT, LocalLLM
+
+# About 2.5 spoken words per second
+COURSES = {
+    "30s sections": lambda rng: rng.randint(60, 90),
+    "3min sections": lambda rng: rng.randint(400, 500),
+    "mixed": lambda rng: rng.choice([rng.randint(20, 90), rng.randint(200, 700)]),
+}
+
+
+def course(words, sections: int = 200, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    vocabulary = ["graph", "node", "edge", "search", "queue", "weight", "path", "tree"]
+    return [
+        {"title": f"Section {i + 1}", "text": " ".join(rng.choice(vocabulary) for _ in range(words(rng)))}
+        for i in range(sections)
+    ]
+
+
+def measure(llm: LocalLLM, planner: BatchPlanner, sections: List[Dict], context_window: int) -> Dict:
+    requests, overflows, fill = 0, 0, 0.0
+    system_tokens = estimate_tokens(BATCH_SYSTEM_PROMPT)
+    for batch in planner.plan(sections):
+        used = (
+            system_tokens + estimate_tokens(llm._build_batch_prompt(batch))
+            + Config.LLM_OUTPUT_TOKENS_PER_SECTION * len(batch)
+        )
+        requests += 1
+        overflows += used > context_window
+        fill += min(used, context_window) / context_window
+    return {
+        "requests": requests,
+        "per_request": len(sections) / requests,
+        "fill": fill / requests,
+        "overflows": overflows,
+    }
+
+
+def main():
+    Config.LLM_CACHE_ENABLED = False
+    llm = LocalLLM("model")
+    print(f"{'course':<14} {'window':>6} {'planner':<13} {'requests':>8} {'sections/req':>12} "
+          f"{'fill':>5} {'overflows':>9}")
+    for name, words in COURSES.items():
+        sections = course(words)
+        for context_window in (4096, 8192):
+            planners = {
+                "fixed(2)": FixedBatchPlanner(batch_size=2),
+                "token_budget": TokenBudgetPlanner(
+                    context_window=context_window, prompt_overhead_tokens=llm.prompt_overhead_tokens
+                ),
+            }
+            for planner_name, planner in planners.items():
+                result = measure(llm, planner, sections, context_window)
+                print(f"{name:<14} {context_window:>6} {planner_name:<13} {result['requests']:>8} "
+                      f"{result['per_request']:>12.1f} {result['fill']:>5.0%} {result['overflows']:>9}")
+
+
+if __name__ == "__main__":
+    main()
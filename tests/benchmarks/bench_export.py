@@ -0,0 +1,202 @@
+"""Benchmark the streaming course export against the in-memory one it replaced.
+
+    python -m tests.benchmarks.bench_export [sections ...]
+
+Run from the repository root. For synthetic course dicts of 200 and 2000
+sections by default, reports the time (best of 3) and the peak memory
+traced by tracemalloc while exporting, not counting the course itself:
+
+- DOCX: python-docx Document built in memory, as export_to_docx did,
+  against DocxWriter streaming the body XML through a part file.
+- HTML: the wkhtmltopdf input built by += concatenation, as export_to_pdf
+  did, against WkhtmltopdfBackend's streamed HTML. The conversion to PDF
+  is left out of both, so wkhtmltopdf need not be installed.
+- PDF: BuiltinPdfBackend, which has no in-memory predecessor.
+
+Exports run in-process (EXPORT_WORKERS=0) so tracemalloc sees them, with
+the export cache off. The DOCX outputs are checked to hold the same text.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Callable, Dict, List
+
+from docx import Document
+
+from course_generator import exporter as exporter_module
+from course_generator.config import Config
+from course_generator.exporter import BuiltinPdfBackend, CourseExporter, WkhtmltopdfBackend
+
+
+def course(sections: int, seed: int = 0) -> Dict:
+    rng = random.Random(seed)
+    vocabulary = ["graph", "node", "edge", "search", "queue", "weight", "path", "tree", "<heap>", "&"]
+
+    def words(low: int, high: int) -> str:
+        return " ".join(rng.choice(vocabulary) for _ in range(rng.randint(low, high)))
+
+    return {
+        "title": "Synthetic course",
+        "description": words(20, 40),
+        "objectives": [words(5, 10) for _ in range(5)],
+        "sections": [
+            {
+                "title": f"Section {i + 1}",
+                "content": words(150, 400),
+                "summary": words(30, 60),
+                "quiz": [
+                    {"question": words(8, 15), "options": [words(2, 5) for _ in range(4)],
+                     "correct_answer": words(2, 5)}
+                    for _ in range(3)
+                ]
+            }
+            for i in range(sections)
+        ]
+    }
+
+
+def old_export_to_docx(course_content: Dict, output_path: str):
+    """The python-docx export CourseExporter used before DocxWriter."""
+    doc = Document()
+    doc.add_heading(course_content["title"], 0)
+    doc.add_heading("Learning Objectives", level=1)
+    for objective in course_content["objectives"]:
+        doc.add_paragraph(objective, style='List Bullet')
+    for section in course_content["sections"]:
+        doc.add_heading(section["title"], level=1)
+        doc.add_paragraph(section["content"])
+        doc.add_heading("Summary", level=2)
+        doc.add_paragraph(section["summary"])
+        doc.add_heading("Quiz", level=2)
+        for i, question in enumerate(section["quiz"], 1):
+            doc.add_paragraph(f"Question {i}: {question['question']}")
+            for option in question["options"]:
+                doc.add_paragraph(option, style='List Bullet')
+            doc.add_paragraph(f"Correct Answer: {question['correct_answer']}")
+    doc.save(output_path)
+
+
+def old_export_to_html(course_content: Dict, output_path: str):
+    """The HTML export_to_pdf built for wkhtmltopdf before streaming."""
+    html_content = f"""
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 40px; }}
+            h1 {{ color: #2c3e50; }}
+            h2 {{ color: #34495e; }}
+            .objective {{ margin: 10px 0; }}
+            .section {{ margin: 20px 0; }}
+            .quiz {{ margin: 15px 0; }}
+        </style>
+    </head>
+    <body>
+        <h1>{course_content["title"]}</h1>
+
+        <h2>Learning Objectives</h2>
+        <ul>
+            {"".join(f'<li class="objective">{obj}</li>' for obj in course_content["objectives"])}
+        </ul>
+    """
+    for section in course_content["sections"]:
+        html_content += f"""
+        <div class="section">
+            <h2>{section["title"]}</h2>
+            <p>{section["content"]}</p>
+
+            <h3>Summary</h3>
+            <p>{section["summary"]}</p>
+
+            <h3>Quiz</h3>
+        """
+        for i, question in enumerate(section["quiz"]):
+            html_content += f"""
+            <div class="quiz">
+                <p><strong>Question {i+1}:</strong> {question["question"]}</p>
+                <ul>
+                    {"".join(f'<li>{opt}</li>' for opt in question["options"])}
+                </ul>
+                <p><em>Correct Answer: {question["correct_answer"]}</em></p>
+            </div>
+            """
+        html_content += """
+        </div>
+        """
+    html_content += """
+    </body>
+    </html>
+    """
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(html_content)
+
+
+def streaming_export(exporter: CourseExporter, fmt: str) -> Callable[[Dict, str], None]:
+    def export(course_content: Dict, output_path: str):
+        exporter.export(course_content, {fmt: output_path})
+    return export
+
+
+def docx_text(path: str) -> List[str]:
+    return [paragraph.text for paragraph in Document(path).paragraphs]
+
+
+def measure(export: Callable[[Dict, str], None], course_content: Dict, output_path: str,
+            repeat: int = 3) -> Dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        export(course_content, output_path)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        export(course_content, output_path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": min(times), "peak": peak, "size": os.path.getsize(output_path)}
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [200, 2000]
+    Config.EXPORT_WORKERS = 0
+    Config.EXPORT_CACHE_ENABLED = False
+    # Both HTML paths stop before the PDF conversion: the streamed HTML is
+    # copied to the output path instead of converted
+    exporter_module.pdfkit = types.SimpleNamespace(
+        configuration=lambda wkhtmltopdf: None,
+        from_file=lambda input_path, output_path, configuration=None: shutil.copyfile(input_path, output_path)
+    )
+
+    docx_exporter = CourseExporter()
+    html_exporter = CourseExporter()
+    html_exporter.pdf_backend = WkhtmltopdfBackend("wkhtmltopdf")
+    pdf_exporter = CourseExporter()
+    pdf_exporter.pdf_backend = BuiltinPdfBackend()
+    variants = [
+        ("DOCX", "python-docx", old_export_to_docx),
+        ("DOCX", "streaming", streaming_export(docx_exporter, "DOCX")),
+        ("HTML", "+= concat", old_export_to_html),
+        ("HTML", "streaming", streaming_export(html_exporter, "PDF")),
+        ("PDF", "builtin", streaming_export(pdf_exporter, "PDF")),
+    ]
+
+    print(f"{'sections':>8} {'format':<6} {'export':<12} {'time':>8} {'peak MB':>8} {'output MB':>9}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for count in counts:
+            course_content = course(count)
+            outputs = {}
+            for fmt, name, export in variants:
+                outputs[fmt, name] = os.path.join(work_dir, f"{name.replace(' ', '_')}.{fmt.lower()}")
+                result = measure(export, course_content, outputs[fmt, name])
+                print(f"{count:>8} {fmt:<6} {name:<12} {result['time']:>7.2f}s "
+                      f"{result['peak'] / 2 ** 20:>8.1f} {result['size'] / 2 ** 20:>9.1f}")
+            assert docx_text(outputs["DOCX", "python-docx"]) == docx_text(outputs["DOCX", "streaming"])
+
+
+if __name__ == "__main__":
+    main()
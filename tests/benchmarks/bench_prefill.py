@@ -0,0 +1,149 @@
+"""Compare prompt prefill with and without the stable system-prompt layout.
+
+    python -m tests.benchmarks.bench_prefill [--sections 60] [--ms-per-token 0.5]
+
+Run from the repository root. A local mock Ollama imitates llama.cpp prefix
+caching: it keeps the previous prompt's KV cache (one slot) and only
+evaluates the tokens after the longest prefix shared with it, sleeping
+ms-per-token for each and reporting prompt_eval_count/duration as Ollama
+does. Sections vary in length, so the default token-budget planner sends
+batches of varying size. Three layouts generate the same course:
+
+  chat       LLM_CHAT_LAYOUT=true: system message on /api/chat
+  inline     LLM_CHAT_LAYOUT=false: instructions inlined first on /api/generate
+  legacy     the layout before the split: the batch's section count came
+             first, so batches of different sizes shared no prefix
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import random
+
+from course_generator.batching import TokenBudgetPlanner
+from course_generator.config import Config
+from course_generator.local_llm import LocalLLM
+
+CHARS_PER_TOKEN = 4
+SECTION = {
+    "content": "content", "summary": "summary",
+    "quiz": [{"question": "q", "options": ["a", "b"], "correct_answer": "a"}]
+}
+
+
+class PrefixCachingOllama(BaseHTTPRequestHandler):
+    """Mock Ollama whose prefill cost covers only the uncached part of the prompt."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    ms_per_token = 0.0
+    cached_prompt = ""
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if "messages" in body:
+            # Rendered the way a chat template would, system message first
+            prompt = "".join(f"<|{m['role']}|>{m['content']}" for m in body["messages"])
+        else:
+            prompt = body["prompt"]
+        cls = type(self)
+        with cls.lock:
+            shared = 0
+            for a, b in zip(prompt, cls.cached_prompt):
+                if a != b:
+                    break
+                shared += 1
+            evaluated = -(-(len(prompt) - shared) // CHARS_PER_TOKEN)
+            start = time.perf_counter()
+            time.sleep(evaluated * cls.ms_per_token / 1000)
+            duration = time.perf_counter() - start
+            cls.cached_prompt = prompt
+
+        if "Generate course content for" in prompt:
+            count = int(prompt.split("Generate course content for ")[1].split(" ")[0])
+            content = {"sections": [SECTION] * count}
+        else:
+            content = {"title": "Title", "description": "Description", "objectives": ["Learn"]}
+        text = json.dumps(content)
+        reply = {"prompt_eval_count": evaluated, "prompt_eval_duration": int(duration * 1e9)}
+        reply.update({"message": {"role": "assistant", "content": text}} if "messages" in body
+                     else {"response": text})
+        data = json.dumps(reply).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class LegacyLayoutLLM(LocalLLM):
+    """Puts the batch's first line before the instructions, as prompts were built before."""
+
+    def _messages(self, prompt: str, system: str = None) -> List[Dict]:
+        if not system:
+            return super()._messages(prompt)
+        first, _, rest = prompt.partition("\n")
+        return [{"role": "user", "content": f"{first}\n{system}\n{rest}"}]
+
+
+def synthetic_sections(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    words = ["graph", "node", "edge", "search", "queue", "weight", "path", "tree"]
+    return [
+        {"title": f"Section {i + 1}", "text": " ".join(rng.choice(words) for _ in range(rng.randint(100, 900)))}
+        for i in range(count)
+    ]
+
+
+def run(layout: str, sections: List[Dict], ms_per_token: float = 0.0) -> Dict:
+    """Generate a course against a fresh mock and return its prefill metrics."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PrefixCachingOllama)
+    PrefixCachingOllama.ms_per_token = ms_per_token
+    PrefixCachingOllama.cached_prompt = ""
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    saved = (Config.OLLAMA_ENDPOINTS, Config.LLM_CHAT_LAYOUT, Config.LLM_CACHE_ENABLED)
+    try:
+        Config.OLLAMA_ENDPOINTS = f"http://127.0.0.1:{server.server_port}/api"
+        Config.LLM_CHAT_LAYOUT = layout == "chat"
+        Config.LLM_CACHE_ENABLED = False
+        llm_class = LegacyLayoutLLM if layout == "legacy" else LocalLLM
+        llm = llm_class("model", max_concurrency=1, streaming=False,
+                        batch_planner=TokenBudgetPlanner(context_window=4096))
+        metrics = llm.generate_course_content(sections)["generation_metrics"]
+    finally:
+        Config.OLLAMA_ENDPOINTS, Config.LLM_CHAT_LAYOUT, Config.LLM_CACHE_ENABLED = saved
+        server.shutdown()
+        server.server_close()
+    calls = metrics["total_api_calls"]
+    return {
+        "calls": calls,
+        "prefill_tokens": metrics["prefill_tokens"],
+        "prefill_seconds": float(metrics["prefill_time"].rstrip("s")),
+        "tokens_per_call": metrics["prefill_tokens"] / calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=60)
+    parser.add_argument("--ms-per-token", type=float, default=0.5)
+    args = parser.parse_args()
+    sections = synthetic_sections(args.sections)
+    print(f"{args.sections} sections, token-budget batches, {args.ms_per_token} ms per prefilled token")
+    for layout in ("legacy", "inline", "chat"):
+        result = run(layout, sections, args.ms_per_token)
+        print(f"  {layout:<7} {result['calls']:>3} calls, {result['tokens_per_call']:6.0f} tokens/call prefilled, "
+              f"{result['prefill_seconds'] * 1000 / result['calls']:6.1f} ms/call, "
+              f"{result['prefill_seconds']:.2f}s total")
+
+
+if __name__ == "__main__":
+    main()
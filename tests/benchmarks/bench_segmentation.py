@@ -0,0 +1,91 @@
+"""Benchmark Segmenter against the per-segment loop it replaced.
+
+    python -m tests.benchmarks.bench_segmentation [segments]
+
+Run from the repository root. Times best of 3 on synthetic transcripts of
+100k segments by default, checking that both produce the same sections.
+"""
+import random
+import sys
+import time
+from typing import Dict, List
+
+from course_generator.segmentation import Segmenter
+from course_generator.transcript import Transcript
+
+
+def old_segment_transcription(segments: List[Dict], max_gap: float = 2,
+                              max_duration: float = 30) -> List[Dict]:
+    """The loop Transcriber.segment_transcription used before Segmenter."""
+    sections = []
+    sections_emitted = 0
+    current_section = {"start": 0, "end": 0, "text": "", "title": ""}
+    for segment in segments:
+        if (segment["start"] - current_section["end"] > max_gap or
+                segment["end"] - current_section["start"] > max_duration):
+            if current_section["text"]:
+                sections_emitted += 1
+                sections.append(current_section)
+            current_section = {
+                "start": segment["start"],
+                "end": segment["end"],
+                "text": segment["text"],
+                "title": f"Section {sections_emitted + 1}"
+            }
+            continue
+        current_section["end"] = segment["end"]
+        current_section["text"] += " " + segment["text"]
+    if current_section["text"]:
+        sections.append(current_section)
+    return sections
+
+
+def continuous_speech(n: int, seed: int = 0) -> List[Dict]:
+    """Segments of 2-6 s separated by short pauses, with an occasional long one."""
+    rng = random.Random(seed)
+    segments, t = [], 0.0
+    for i in range(n):
+        duration = rng.uniform(2, 6)
+        segments.append({"start": t, "end": t + duration, "text": f"segment {i} words here"})
+        t += duration + (rng.uniform(2.5, 5) if rng.random() < 0.01 else rng.uniform(0, 0.5))
+    return segments
+
+
+def adversarial(n: int) -> List[Dict]:
+    """A pause after every second segment, so nearly every run is its own section."""
+    segments, t = [], 0.0
+    for i in range(n):
+        segments.append({"start": t, "end": t + 1.0, "text": f"segment {i}"})
+        t += 1.0 + (3.0 if i % 2 else 0.0)
+    return segments
+
+
+def best_of(runs: int, func) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n: int = 100_000):
+    cases = [
+        ("continuous speech, 30s sections", continuous_speech(n), 30),
+        ("continuous speech, 600s sections", continuous_speech(n), 600),
+        ("continuous speech, 3600s sections", continuous_speech(n), 3600),
+        ("adversarial 2-segment sections", adversarial(n), 30),
+    ]
+    print(f"{n} segments, best of 3: old loop vs Segmenter")
+    for name, segments, max_duration in cases:
+        transcript = Transcript.from_segments(segments)
+        segmenter = Segmenter(max_gap=2, max_duration=max_duration, semantic=False)
+        expected = old_segment_transcription(segments, max_duration=max_duration)
+        assert [s.to_dict() for s in segmenter.segment(transcript)] == expected, name
+        old = best_of(3, lambda: old_segment_transcription(segments, max_duration=max_duration))
+        new = best_of(3, lambda: segmenter.segment(transcript))
+        print(f"  {name:<36} {old * 1000:6.0f} ms vs {new * 1000:6.0f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,94 @@
+"""Benchmark serial against parallel transcription of long synthetic audio.
+
+    python -m tests.benchmarks.bench_transcribe [--minutes 60] [--model tiny]
+        [--workers 1 2 4] [--stand-in]
+
+Run from the repository root. The audio is noise with a 300 ms pause every
+7 seconds, so split_on_silence has places to cut. --stand-in replaces
+Whisper with a CPU-bound model whose cost is linear in audio length, for
+machines without Whisper weights; it measures splitting, worker start-up
+and chunk transfer overhead rather than real decoding speed.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import whisper
+
+from course_generator.config import Config
+from course_generator.transcriber import Transcriber, split_on_silence
+
+SAMPLE_RATE = 16000
+
+
+class StandInModel:
+    """Linear-cost substitute for a Whisper model: repeated FFTs over 25 ms frames."""
+
+    def parameters(self):
+        return []
+
+    def buffers(self):
+        return []
+
+    def transcribe(self, audio, initial_prompt=None):
+        frames = audio[:len(audio) // 400 * 400].reshape(-1, 400)
+        for _ in range(40):
+            np.abs(np.fft.rfft(frames, axis=1)).sum()
+        duration = len(audio) / SAMPLE_RATE
+        segments = [
+            {"start": float(start), "end": float(min(start + 5.0, duration)), "text": "words"}
+            for start in np.arange(0, duration, 5.0)
+        ]
+        return {"text": "words", "segments": segments}
+
+
+# Spawned workers import this module again, so the stand-in reaches them
+# through the environment
+if os.environ.get("BENCH_STAND_IN"):
+    whisper.load_model = lambda model_size: StandInModel()
+
+
+def synthetic_audio(minutes: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    audio = (rng.standard_normal(int(minutes * 60 * SAMPLE_RATE)) * 0.1).astype(np.float32)
+    for start in range(0, len(audio), 7 * SAMPLE_RATE):
+        audio[start:start + SAMPLE_RATE * 3 // 10] *= 0.01
+    return audio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--stand-in", action="store_true")
+    args = parser.parse_args()
+    if args.stand_in:
+        os.environ["BENCH_STAND_IN"] = "1"
+        whisper.load_model = lambda model_size: StandInModel()
+    Config.TRANSCRIPTION_CACHE_ENABLED = False
+
+    audio = synthetic_audio(args.minutes)
+    start = time.perf_counter()
+    chunks = split_on_silence(audio, SAMPLE_RATE, Config.TRANSCRIBE_CHUNK_SECONDS)
+    print(f"{os.cpu_count()} CPUs, {args.minutes:g} min of audio, "
+          f"{'stand-in model' if args.stand_in else 'Whisper ' + args.model}")
+    print(f"  split_on_silence: {time.perf_counter() - start:.2f}s, {len(chunks)} chunks")
+    for workers in args.workers:
+        transcriber = Transcriber(model_size=args.model, workers=workers)
+        try:
+            start = time.perf_counter()
+            transcript = transcriber.transcribe(audio)
+            first = time.perf_counter() - start
+            start = time.perf_counter()
+            transcriber.transcribe(audio)
+            warm = time.perf_counter() - start
+        finally:
+            transcriber.close()
+        print(f"  workers={workers}: {first:.1f}s first run (includes model loads), "
+              f"{warm:.1f}s warm, {len(transcript)} segments")
+
+
+if __name__ == "__main__":
+    main()
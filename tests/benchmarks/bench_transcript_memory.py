@@ -0,0 +1,91 @@
+"""Measure the memory a transcript holds before and after Transcript.
+
+    python -m tests.benchmarks.bench_transcript_memory [hours]
+
+Run from the repository root. Builds a synthetic Whisper transcribe()
+result for a 3-hour recording by default (about 4 s per segment, with
+tokens, log probabilities and compression ratios like Whisper's) and
+reports, with tracemalloc, the peak and the memory still held after
+segmentation:
+
+- before: the raw result kept alive next to the section dicts of the
+  per-segment loop, as the pipeline did before Transcript.
+- after: Transcript.from_whisper, the raw result dropped, then
+  Segmenter's Section records.
+
+Both produce the same section texts, which is checked.
+"""
+import random
+import sys
+import tracemalloc
+from typing import Callable, Dict
+
+from course_generator.segmentation import Segmenter
+from course_generator.transcript import Transcript
+from tests.benchmarks.bench_segmentation import old_segment_transcription
+
+
+def whisper_result(hours: float = 3, seed: int = 0) -> Dict:
+    """A synthetic Whisper transcribe() result covering the given duration."""
+    rng = random.Random(seed)
+    vocabulary = ["the", "graph", "node", "edge", "search", "queue", "weight", "path", "tree", "so"]
+    segments, t = [], 0.0
+    while t < hours * 3600:
+        duration = rng.uniform(2, 6)
+        words = [rng.choice(vocabulary) for _ in range(int(duration * 2.5))]
+        segments.append({
+            "id": len(segments),
+            "seek": int(t * 100),
+            "start": t,
+            "end": t + duration,
+            "text": " " + " ".join(words),
+            "tokens": [rng.randint(50365, 51865)] + [rng.randint(300, 50000) for _ in words] + [50257],
+            "temperature": 0.0,
+            "avg_logprob": -rng.random(),
+            "compression_ratio": rng.uniform(1, 2),
+            "no_speech_prob": rng.random() / 10
+        })
+        t += duration + (rng.uniform(2.5, 5) if rng.random() < 0.05 else rng.uniform(0, 0.5))
+    return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": "en"}
+
+
+def before(hours: float):
+    result = whisper_result(hours)
+    return result, old_segment_transcription(result["segments"])
+
+
+def after(hours: float):
+    transcript = Transcript.from_whisper(whisper_result(hours))
+    return transcript, Segmenter(semantic=False).segment(transcript)
+
+
+def traced(func: Callable, *args) -> Dict:
+    """Run func under tracemalloc; return its result with the peak and retained bytes."""
+    tracemalloc.start()
+    try:
+        value = func(*args)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"value": value, "retained": retained, "peak": peak}
+
+
+def main(hours: float = 3):
+    raw = traced(whisper_result, hours)
+    segments = len(raw["value"]["segments"])
+    del raw["value"]
+    old = traced(before, hours)
+    new = traced(after, hours)
+    old_sections, new_sections = old["value"][1], new["value"][1]
+    assert [s["text"] for s in old_sections] == [s.text for s in new_sections]
+
+    print(f"{hours:g} h, {segments} segments, {len(new_sections)} sections; "
+          f"raw Whisper result {raw['retained'] / 2 ** 20:.2f} MB")
+    print(f"{'':<8} {'peak MB':>8} {'retained MB':>11}")
+    for name, result in (("before", old), ("after", new)):
+        print(f"{name:<8} {result['peak'] / 2 ** 20:>8.2f} {result['retained'] / 2 ** 20:>11.2f}")
+    print(f"Transcript.nbytes {new['value'][0].nbytes / 2 ** 20:.2f} MB")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,21 @@
+import time
+
+from course_generator.backend_pool import BackendPool
+
+
+def test_failed_request_ejects_backend_while_others_are_healthy():
+    pool = BackendPool("ollama", ["http://a/api", "http://b/api"], eject_seconds=60)
+    pool._checked = True
+    first = pool.acquire()
+    pool.release(first, failed=True)
+    assert pool.healthy_count() == 1
+    assert pool.acquire() is not first
+
+
+def test_last_healthy_backend_is_never_ejected():
+    pool = BackendPool("ollama", ["http://a/api"], eject_seconds=60)
+    backend = pool.acquire()
+    pool.release(backend, failed=True)
+    assert pool.healthy_count() == 1
+    assert backend.failures == 1
+    assert backend.ejected_until <= time.time()
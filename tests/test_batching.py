@@ -0,0 +1,42 @@
+import random
+
+from course_generator.batching import FixedBatchPlanner, TokenBudgetPlanner, estimate_tokens
+from course_generator.config import Config
+from course_generator.local_llm import BATCH_SYSTEM_PROMPT, LocalLLM
+
+
+def random_sections(rng, count, max_words):
+    return [
+        {"title": f"Section {i + 1}", "text": " ".join("word" for _ in range(rng.randint(1, max_words)))}
+        for i in range(count)
+    ]
+
+
+def test_batches_fit_the_context_window(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", False)
+    rng = random.Random(0)
+    for context_window in (2048, 4096, 8192):
+        llm = LocalLLM("model")
+        planner = TokenBudgetPlanner(context_window=context_window,
+                                     prompt_overhead_tokens=llm.prompt_overhead_tokens)
+        sections = random_sections(rng, 300, 250)
+        planned = []
+        for batch in planner.plan(sections):
+            prompt_tokens = estimate_tokens(BATCH_SYSTEM_PROMPT) + estimate_tokens(llm._build_batch_prompt(batch))
+            assert prompt_tokens + planner.expected_output_tokens(len(batch)) <= context_window
+            assert len(batch) <= planner.max_sections
+            # Responses of varying length move the output estimate between batches
+            planner.observe(len(batch), rng.randint(200, 3000) * len(batch))
+            planned.extend(batch)
+        assert planned == sections
+
+
+def test_oversized_section_is_sent_alone():
+    planner = TokenBudgetPlanner(context_window=1000, prompt_overhead_tokens=100)
+    sections = [{"title": "a", "text": "x" * 40}, {"title": "b", "text": "x" * 8000}, {"title": "c", "text": "x" * 40}]
+    assert [len(batch) for batch in planner.plan(sections)] == [1, 1, 1]
+
+
+def test_fixed_planner_groups_by_count():
+    sections = [{"title": str(i), "text": ""} for i in range(5)]
+    assert [len(batch) for batch in FixedBatchPlanner(batch_size=2).plan(sections)] == [2, 2, 1]
@@ -0,0 +1,62 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from course_generator.http_client import _build_session, connections_opened
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Keep-alive /api/chat endpoint; slow requests outlast the client's read timeout."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle's algorithm
+    # the body would wait for the client's delayed ACK on a reused connection
+    disable_nagle_algorithm = True
+    calls = 0
+    delay = threading.Event()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).calls += 1
+        if self.path == "/api/slow":
+            self.delay.wait(2)
+        data = json.dumps({"message": {"content": "ok"}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeOllama.calls = 0
+    FakeOllama.delay.clear()
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    FakeOllama.delay.set()
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_reuses_one_connection(server):
+    session = _build_session()
+    for _ in range(20):
+        session.post(f"{server}/chat", json={"messages": []}, timeout=(1, 5)).raise_for_status()
+    assert FakeOllama.calls == 20
+    assert connections_opened(session) == 1
+
+
+def test_read_timeout_is_not_retried(server):
+    session = _build_session(max_retries=3)
+    with pytest.raises(requests.exceptions.RequestException):
+        session.post(f"{server}/slow", json={"messages": []}, timeout=(1, 0.2))
+    assert FakeOllama.calls == 1
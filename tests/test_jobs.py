@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import time
+
+from course_generator.config import Config
+from course_generator.jobs import COMPLETED, QUEUED, RUNNING, JobQueue, JobStore
+
+
+def test_claim_skips_jobs_claimed_by_another_store(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first, second = JobStore(path), JobStore(path)
+    job_a = first.submit({"n": 1})
+    job_b = first.submit({"n": 2})
+
+    assert first.claim("worker-1")[0] == job_a
+    assert second.claim("worker-2")[0] == job_b
+    assert second.claim("worker-2") is None
+
+
+def test_new_queue_does_not_requeue_live_jobs(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.submit({})
+    store.claim("live-worker")
+
+    JobQueue(store=store, runner=lambda *args, **kwargs: {})
+    assert store.get(job_id)["status"] == RUNNING
+
+
+def test_stale_jobs_are_requeued(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.submit({})
+    store.claim("dead-worker")
+    with store._lock:
+        store._conn.execute("UPDATE jobs SET heartbeat = ?", (time.time() - 2 * Config.JOB_STALE_SECONDS,))
+        store._conn.commit()
+
+    JobQueue(store=store, runner=lambda *args, **kwargs: {})
+    assert store.get(job_id)["status"] == QUEUED
+
+
+def test_requeued_job_ignores_its_old_owner(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.submit({})
+    store.claim("old-worker")
+    store.requeue_stale(-1)
+    store.claim("new-worker")
+
+    store.fail(job_id, "late failure", "old-worker")
+    assert store.get(job_id)["status"] == RUNNING
+    store.complete(job_id, {}, "new-worker")
+    assert store.get(job_id)["status"] == COMPLETED
+
+
+def test_heartbeat_refreshes_owned_jobs(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.submit({})
+    store.submit({})
+    store.claim("worker-1")
+    assert store.heartbeat("worker-1") == 1
+    assert store.heartbeat("worker-2") == 0
+
+
+def test_adds_owner_columns_to_existing_database(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """CREATE TABLE jobs (
+            id TEXT PRIMARY KEY, status TEXT NOT NULL, params TEXT NOT NULL,
+            progress INTEGER NOT NULL DEFAULT 0, message TEXT NOT NULL DEFAULT '',
+            result TEXT, error TEXT, created REAL NOT NULL, started REAL, finished REAL
+        )"""
+    )
+    conn.execute("INSERT INTO jobs (id, status, params, created) VALUES ('old', 'running', '{}', 0)")
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path)
+    assert store.requeue_stale(Config.JOB_STALE_SECONDS) == 1
+    assert store.claim("worker")[0] == "old"
+
+
+def test_cleanup_removes_old_files_of_finished_jobs_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "RUNS_DIR", str(tmp_path / "runs"))
+    monkeypatch.setattr(Config, "JOB_UPLOAD_DIR", str(tmp_path / "uploads"))
+    os.makedirs(Config.JOB_UPLOAD_DIR)
+    store = JobStore(str(tmp_path / "jobs.db"))
+    old = time.time() - 7200
+    paths = {}
+    for name in ("failed", "queued", "orphan"):
+        paths[name] = os.path.join(Config.JOB_UPLOAD_DIR, f"{name}.mp4")
+        with open(paths[name], "wb") as f:
+            f.write(b"video")
+        os.utime(paths[name], (old, old))
+    failed = store.submit({"source": paths["failed"], "input_type": "file"})
+    store.claim("worker")
+    store.fail(failed, "boom")
+    queued = store.submit({"source": paths["queued"], "input_type": "file"})
+    for job_id in (failed, queued):
+        run_dir = os.path.join(Config.RUNS_DIR, job_id)
+        os.makedirs(run_dir)
+        os.utime(run_dir, (old, old))
+    with store._lock:
+        store._conn.execute("UPDATE jobs SET finished = ? WHERE id = ?", (old, failed))
+        store._conn.commit()
+
+    JobQueue(store=store, runner=lambda *args, **kwargs: {}).cleanup(3600)
+    assert os.listdir(Config.JOB_UPLOAD_DIR) == ["queued.mp4"]
+    assert os.listdir(Config.RUNS_DIR) == [queued]
@@ -0,0 +1,37 @@
+import json
+
+from course_generator.config import Config
+from course_generator.json_stream import SectionStreamParser
+from course_generator.local_llm import LocalLLM
+
+
+def section(content):
+    return {"content": content, "summary": "s", "quiz": [{"question": "q", "options": ["a", "b"], "correct_answer": "a"}]}
+
+
+def test_parser_keeps_positions_of_undecodable_objects():
+    parser = SectionStreamParser()
+    text = '{"sections": [{"content": "A", broken}, ' + json.dumps(section("B")) + "]}"
+    objects = []
+    for i in range(0, len(text), 7):
+        objects.extend(parser.feed(text[i:i + 7]))
+    assert objects == [None, section("B")]
+
+
+def test_bad_object_is_retried_in_its_own_position(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", False)
+    llm = LocalLLM("model", streaming=True)
+    prompts = []
+
+    def fake_stream(prompt, schema=None, bypass_cache=False, system=None):
+        prompts.append(prompt)
+        if len(prompts) == 1:
+            yield '{"sections": [{"content": "A", broken}, ' + json.dumps(section("B")) + "]}"
+        else:
+            yield json.dumps({"sections": [section("A")]})
+
+    llm.generate_response_stream = fake_stream
+    sections = llm._generate_batch([{"title": "A", "text": "a"}, {"title": "B", "text": "b"}])
+
+    assert [(s["title"], s["content"]) for s in sections] == [("A", "A"), ("B", "B")]
+    assert "for 1 sections" in prompts[1] and '"title": "A"' in prompts[1]
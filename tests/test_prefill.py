@@ -0,0 +1,9 @@
+from tests.benchmarks.bench_prefill import run, synthetic_sections
+
+
+def test_system_prompt_layout_reuses_the_cached_prefix():
+    sections = synthetic_sections(20)
+    legacy, inline, chat = (run(layout, sections) for layout in ("legacy", "inline", "chat"))
+    assert legacy["calls"] == inline["calls"] == chat["calls"]
+    assert chat["prefill_tokens"] < legacy["prefill_tokens"]
+    assert inline["prefill_tokens"] < legacy["prefill_tokens"]
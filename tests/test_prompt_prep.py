@@ -0,0 +1,37 @@
+from course_generator.prompt_prep import PromptPreparer, clean_text
+
+
+def test_clean_text_keeps_repeated_digits():
+    assert clean_text("row is 1 0 0 then 0 0 1") == "row is 1 0 0 then 0 0 1"
+
+
+def test_clean_text_keeps_you_know_and_i_mean_in_sentences():
+    text = "Do you know what a hash map is? I mean the data structure."
+    assert clean_text(text) == text
+
+
+def test_clean_text_keeps_short_function_word_repeats():
+    assert clean_text("that that approach had had problems") == "that that approach had had problems"
+
+
+def test_clean_text_keeps_words_that_look_like_fillers():
+    assert clean_text("ER visits rose. Ah, I see.") == "ER visits rose. Ah, I see."
+
+
+def test_clean_text_strips_fillers_asides_and_stutters():
+    text = "So, you know, it works. Um, the graph graph is the key idea the key idea here."
+    assert clean_text(text) == "So, it works. the graph is the key idea here."
+
+
+def test_prepare_leaves_text_alone_within_budget():
+    segments = [{"title": "Section 1", "text": "Um, the the graph graph is, you know, key."}]
+    prepared, before, after = PromptPreparer(clean=True).prepare(segments, max_input_tokens=1000)
+    assert prepared[0]["text"] == segments[0]["text"]
+    assert before == after
+
+
+def test_prepare_cleans_over_budget():
+    segments = [{"title": "Section 1", "text": "Um, the graph graph is key. " * 50}]
+    prepared, before, after = PromptPreparer(clean=True).prepare(segments, max_input_tokens=20)
+    assert "Um" not in prepared[0]["text"]
+    assert after < before
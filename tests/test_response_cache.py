@@ -0,0 +1,40 @@
+import json
+
+from course_generator.config import Config
+from course_generator.local_llm import LocalLLM
+
+VALID = json.dumps({"sections": [{
+    "content": "c", "summary": "s", "quiz": [{"question": "q", "options": ["a", "b"], "correct_answer": "a"}]
+}]})
+
+
+def make_llm(monkeypatch, tmp_path, responses):
+    monkeypatch.setattr(Config, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", True)
+    llm = LocalLLM("model", streaming=False)
+    calls = []
+
+    def fake_request(prompt, schema=None, system=None):
+        calls.append(prompt)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    llm._request_response = fake_request
+    return llm, calls
+
+
+def test_invalid_response_is_not_served_from_cache(monkeypatch, tmp_path):
+    llm, calls = make_llm(monkeypatch, tmp_path, ['{"sections": [{"content": ""}]}', VALID])
+    segments = [{"title": "A", "text": "a"}]
+
+    assert llm._request_sections(segments) == [None]
+    assert llm._request_sections(segments)[0]["content"] == "c"
+    assert len(calls) == 2
+
+
+def test_valid_response_is_served_from_cache(monkeypatch, tmp_path):
+    llm, calls = make_llm(monkeypatch, tmp_path, [VALID])
+    segments = [{"title": "A", "text": "a"}]
+
+    llm._request_sections(segments)
+    assert llm._request_sections(segments)[0]["content"] == "c"
+    assert len(calls) == 1
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from course_generator.batching import FixedBatchPlanner
+from course_generator.checkpoint import RunCheckpoint, remove_stale_runs
+from course_generator.config import Config
+from course_generator.local_llm import LocalLLM
+
+SECTIONS = 16
+
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """Answers /api/chat like Ollama; section requests fail once fail_after are served."""
+
+    fail_after = None
+    section_calls = 0
+    metadata_calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        cls = type(self)
+        with cls.lock:
+            if "Generate course content for" in prompt:
+                if cls.fail_after is not None and cls.section_calls >= cls.fail_after:
+                    self.send_error(500)
+                    return
+                cls.section_calls += 1
+                count = int(prompt.split("for ")[1].split(" ")[0])
+                content = {"sections": [{
+                    "content": "content",
+                    "summary": f"summary {cls.section_calls}",
+                    "quiz": [{"question": "q", "options": ["a", "b"], "correct_answer": "a"}]
+                }] * count}
+            else:
+                cls.metadata_calls += 1
+                content = {"title": "Title", "description": "Description", "objectives": ["Learn"]}
+        data = json.dumps({"message": {"content": json.dumps(content)}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllama)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(Config, "OLLAMA_ENDPOINTS", f"http://127.0.0.1:{server.server_port}/api")
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", False)
+    FakeOllama.fail_after, FakeOllama.section_calls, FakeOllama.metadata_calls = None, 0, 0
+    yield FakeOllama
+    server.shutdown()
+    server.server_close()
+
+
+def make_llm():
+    llm = LocalLLM("model", max_concurrency=1, streaming=False, batch_planner=FixedBatchPlanner(batch_size=1))
+    llm.pool._checked = True
+    return llm
+
+
+def test_failed_run_resumes_only_missing_sections(ollama, tmp_path):
+    segments = [{"title": f"Section {i}", "text": f"text {i}"} for i in range(SECTIONS)]
+
+    # The only backend stays in use, so failed sections fall back to placeholders
+    ollama.fail_after = 3
+    course = make_llm().generate_course_content(segments, checkpoint=RunCheckpoint("run", root=str(tmp_path)))
+    assert [section.summary for section in course["sections"]].count("Summary not available") == SECTIONS - 3
+    assert sorted(RunCheckpoint("run", root=str(tmp_path)).load_sections()) == [0, 1, 2]
+
+    ollama.fail_after, ollama.section_calls, ollama.metadata_calls = None, 0, 0
+    course = make_llm().generate_course_content(segments, checkpoint=RunCheckpoint("run", root=str(tmp_path)))
+
+    assert ollama.section_calls == SECTIONS - 3
+    assert ollama.metadata_calls == 0
+    assert course["generation_metrics"]["resumed_sections"] == 3
+    assert [section.summary for section in course["sections"]][:4] == [
+        "summary 1", "summary 2", "summary 3", "summary 1"
+    ]
+
+
+def test_remove_stale_runs_keeps_recent_and_kept_runs(tmp_path):
+    for run_id in ("old", "kept", "new"):
+        RunCheckpoint(run_id, root=str(tmp_path)).save_segments([])
+    old = time.time() - 7200
+    for run_id in ("old", "kept"):
+        for dirpath, dirnames, filenames in os.walk(tmp_path / run_id):
+            for name in dirnames + filenames + [""]:
+                os.utime(os.path.join(dirpath, name), (old, old))
+
+    assert remove_stale_runs(3600, keep=["kept"], root=str(tmp_path)) == 1
+    assert sorted(os.listdir(tmp_path)) == ["kept", "new"]
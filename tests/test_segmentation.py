@@ -0,0 +1,65 @@
+import random
+import subprocess
+import sys
+
+from course_generator.segmentation import Segmenter
+from course_generator.transcriber import IncrementalSegmenter
+from course_generator.transcript import Transcript
+from tests.benchmarks.bench_segmentation import old_segment_transcription
+
+SCRIPT = """
+from course_generator.segmentation import Segmenter
+# Many distinct words in few buckets, so scores depend on where words hash to
+letters = "abcdefghijklmnopqrstuvwxyz"
+texts = [" ".join("w" + letters[i] + letters[j] + letters[(i * j) % 26] for j in range(20)) for i in range(12)]
+print(Segmenter(semantic=True, semantic_window=3, hash_dim=16).semantic_scores(texts).tolist())
+"""
+
+
+def test_semantic_scores_are_stable_across_processes():
+    outputs = {
+        subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True,
+                       env={"PYTHONHASHSEED": str(seed), "PATH": ""}, cwd=".").stdout
+        for seed in (1, 2, 3)
+    }
+    assert len(outputs) == 1
+
+
+def test_semantic_split_at_topic_shift():
+    segments = [
+        {"start": i * 4.0, "end": i * 4.0 + 3.9, "text": text}
+        for i, text in enumerate(["graphs nodes edges traversal"] * 6 + ["cooking pasta sauce tomatoes"] * 6)
+    ]
+    segmenter = Segmenter(max_gap=2, max_duration=1000, semantic=True, semantic_window=3,
+                          semantic_threshold=0.3, min_duration=0)
+    sections = segmenter.segment(Transcript.from_segments(segments))
+    assert [section["start"] for section in sections] == [0, 24.0]
+
+
+def random_segments(rng):
+    segments, t = [], rng.choice([0.0, rng.uniform(0, 5)])
+    for i in range(rng.randint(0, 60)):
+        duration = rng.choice([rng.uniform(0, 8), rng.uniform(0, 40)])
+        # Whisper end times are not always monotonic
+        end = t + duration if rng.random() > 0.1 else t - rng.uniform(0, 1)
+        segments.append({"start": t, "end": end, "text": rng.choice(["", "word", f"text {i}"])})
+        t += duration + rng.choice([0.0, rng.uniform(0, 1), rng.uniform(1.5, 2.5), 2.0, rng.uniform(2, 6)])
+    return segments
+
+
+def test_segmenters_match_the_old_loop():
+    rng = random.Random(0)
+    for _ in range(1000):
+        segments = random_segments(rng)
+        max_gap, max_duration = rng.choice([(2, 30), (1, 10), (3, 600)])
+        expected = old_segment_transcription(segments, max_gap, max_duration)
+
+        sections = Segmenter(max_gap=max_gap, max_duration=max_duration, semantic=False).segment(
+            Transcript.from_segments(segments)
+        )
+        assert [section.to_dict() for section in sections] == expected
+
+        incremental = IncrementalSegmenter(max_gap=max_gap, max_duration=max_duration)
+        streamed = [section for section in map(incremental.feed, segments) if section]
+        streamed.append(incremental.flush())
+        assert [section for section in streamed if section] == expected
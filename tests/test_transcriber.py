@@ -0,0 +1,86 @@
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import whisper
+
+from course_generator import transcriber as transcriber_module
+from course_generator.config import Config
+from course_generator.model_registry import WhisperModelRegistry
+from course_generator.transcriber import Transcriber
+
+
+class FakeTensor:
+    def __init__(self, array):
+        self.array = array
+
+    def numel(self):
+        return self.array.size
+
+    def element_size(self):
+        return self.array.itemsize
+
+
+class FakeModel:
+    def parameters(self):
+        return [FakeTensor(np.zeros(1000, dtype=np.float32))]
+
+    def buffers(self):
+        return []
+
+    def transcribe(self, audio, initial_prompt=None):
+        return {"text": "words", "segments": [{"start": 0.0, "end": len(audio) / 16000, "text": "words"}]}
+
+
+def test_model_info_reports_worker_models(monkeypatch):
+    monkeypatch.setattr(whisper, "load_model", lambda model_size: FakeModel())
+    monkeypatch.setitem(sys.modules, "torch", types.SimpleNamespace(set_num_threads=lambda n: None))
+    monkeypatch.setattr(Config, "TRANSCRIPTION_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "TRANSCRIBE_CHUNK_SECONDS", 1)
+
+    transcriber = Transcriber(model_size="tiny", workers=2)
+    # Threads stand in for worker processes; they share one PID
+    transcriber._pool = ThreadPoolExecutor(
+        max_workers=2, initializer=transcriber_module._init_worker, initargs=("tiny", 1)
+    )
+    assert transcriber.model_info() == {}
+    transcript = transcriber.transcribe(np.ones(16000 * 3, dtype=np.float32))
+    info = transcriber.model_info()
+    transcriber.close()
+
+    assert len(transcript) > 0
+    assert info["workers"] == 1
+    assert info["nbytes"] == 4000
+
+
+class ReentrancyCheckingModel(FakeModel):
+    """Fails if two transcriptions run on it at once, like Whisper's kv-cache hooks."""
+
+    def __init__(self):
+        self.active = 0
+        self.overlaps = 0
+
+    def transcribe(self, audio, initial_prompt=None):
+        self.active += 1
+        if self.active > 1:
+            self.overlaps += 1
+        time.sleep(0.01)
+        self.active -= 1
+        return super().transcribe(audio, initial_prompt)
+
+
+def test_shared_model_transcribes_one_call_at_a_time(monkeypatch):
+    model = ReentrancyCheckingModel()
+    monkeypatch.setattr(whisper, "load_model", lambda model_size: model)
+    monkeypatch.setattr(Config, "TRANSCRIPTION_CACHE_ENABLED", False)
+    registry = WhisperModelRegistry()
+    transcribers = [Transcriber(model_size="tiny", workers=1) for _ in range(4)]
+    for transcriber in transcribers:
+        transcriber.registry = registry
+
+    audio = np.ones(16000, dtype=np.float32)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda t: [t.transcribe(audio) for _ in range(5)], transcribers))
+    assert model.overlaps == 0
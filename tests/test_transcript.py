@@ -0,0 +1,21 @@
+from course_generator.transcript import Transcript
+from tests.benchmarks.bench_transcript_memory import after, before, traced, whisper_result
+
+
+def test_sections_keep_a_fraction_of_the_whisper_result():
+    old = traced(before, 1)
+    new = traced(after, 1)
+
+    assert [s["text"] for s in old["value"][1]] == [s.text for s in new["value"][1]]
+    assert new["retained"] < old["retained"] / 4
+
+
+def test_transcript_drops_whisper_only_fields():
+    result = whisper_result(0.05)
+    transcript = Transcript.from_whisper(result)
+
+    assert list(transcript.segments()) == [
+        {"start": s["start"], "end": s["end"], "text": s["text"]} for s in result["segments"]
+    ]
+    assert transcript.language == "en"
+    assert not hasattr(transcript, "__dict__")
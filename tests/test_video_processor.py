@@ -0,0 +1,65 @@
+import os
+
+from course_generator.video_processor import AUDIO_SAMPLE_RATE, VideoProcessor
+
+
+class FakeYoutubeDL:
+    """Stands in for yt_dlp.YoutubeDL: records options and writes the file it reports."""
+
+    instances = []
+
+    def __init__(self, opts):
+        self.opts = opts
+        self.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        ext = "wav" if self.opts.get("postprocessors") else "mp4"
+        path = self.opts["outtmpl"].replace("%(id)s", "abc123").replace("%(format_id)s", "140").replace("%(ext)s", ext)
+        with open(path, "wb") as f:
+            f.write(b"media")
+        return {"title": "Video", "requested_downloads": [{"filepath": path}]}
+
+
+def download(audio_only):
+    FakeYoutubeDL.instances = []
+    processor = VideoProcessor(audio_only=audio_only, ydl_factory=FakeYoutubeDL)
+    path = processor.download_youtube_video("https://youtu.be/abc123")
+    return processor, path, FakeYoutubeDL.instances[0].opts
+
+
+def test_audio_only_download():
+    processor, path, opts = download(audio_only=True)
+    try:
+        assert opts["format"] == "bestaudio/best"
+        assert opts["postprocessors"] == [{"key": "FFmpegExtractAudio", "preferredcodec": "wav"}]
+        assert opts["postprocessor_args"] == {"extractaudio": ["-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE)]}
+        assert path == os.path.join(processor.temp_dir, "abc123.140.wav")
+        assert processor.extraction_metrics["engine"] == "yt-dlp (audio-only)"
+    finally:
+        processor.cleanup()
+    assert not os.path.exists(path)
+
+
+def test_full_video_download():
+    processor, path, opts = download(audio_only=False)
+    try:
+        assert opts["format"] == "best"
+        assert "postprocessors" not in opts
+        assert path.endswith(".mp4") and os.path.exists(path)
+    finally:
+        processor.cleanup()
+
+
+def test_processors_download_into_separate_directories():
+    first, first_path, _ = download(audio_only=True)
+    second, second_path, _ = download(audio_only=True)
+    first.cleanup()
+    assert first_path != second_path
+    assert os.path.exists(second_path)
+    second.cleanup()